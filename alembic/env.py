@@ -1,53 +1,38 @@
-import os
 from logging.config import fileConfig
-from dotenv import load_dotenv
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import pool
 from alembic import context
 
 # Import your models
-from db.engine import Base
+from db.engine import Base, make_sync_engine
+from db.settings import settings
 from models.users import Users
 from models.car import Car
 from models.documents import Document
 from models.mechanics import Mechanic
 from models.services import Service
 from models.appointments import Appointment
-
-# Load environment variables
-load_dotenv()
+from models.email_outbox import EmailOutbox
+from models.export_jobs import ExportJob
+from models.table_versions import TableVersion
 
 # Alembic configuration
 config = context.config
 fileConfig(config.config_file_name)
 target_metadata = Base.metadata
 
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_NAME = os.getenv("DB_NAME")
-
-config.set_main_option(
-    "sqlalchemy.url",
-    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-)
-
 
 def run_migrations_offline():
-    url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True
+        url=settings.sync_url,
+        target_metadata=target_metadata,
+        literal_binds=True
     )
     with context.begin_transaction():
         context.run_migrations()
 
 
 def run_migrations_online():
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
+    connectable = make_sync_engine(settings, poolclass=pool.NullPool)
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
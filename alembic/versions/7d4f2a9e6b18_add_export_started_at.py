@@ -0,0 +1,29 @@
+"""Add started_at to export jobs
+
+Revision ID: 7d4f2a9e6b18
+Revises: e3b6c1d8f052
+Create Date: 2026-10-18 01:12:44.307519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4f2a9e6b18'
+down_revision: Union[str, None] = 'e3b6c1d8f052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'export_jobs', sa.Column('started_at', sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('export_jobs') as batch_op:
+        batch_op.drop_column('started_at')
@@ -0,0 +1,28 @@
+"""Add unique constraint on service name
+
+Revision ID: a4d7e2b9c615
+Revises: 5f1a9c3e7b42
+Create Date: 2026-10-17 22:48:51.306274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d7e2b9c615'
+down_revision: Union[str, None] = '5f1a9c3e7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fails if services share a name; rename the duplicates first.
+    with op.batch_alter_table('services') as batch_op:
+        batch_op.create_unique_constraint('uq_services_name', ['name'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('services') as batch_op:
+        batch_op.drop_constraint('uq_services_name', type_='unique')
@@ -0,0 +1,37 @@
+"""Add table versions
+
+Revision ID: e3b6c1d8f052
+Revises: a4d7e2b9c615
+Create Date: 2026-10-17 23:41:12.548203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b6c1d8f052'
+down_revision: Union[str, None] = 'a4d7e2b9c615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = (
+    'appointments', 'cars', 'documents', 'mechanics', 'services', 'users'
+)
+
+
+def upgrade() -> None:
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [
+        {'table_name': name, 'version': 1} for name in VERSIONED_TABLES
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('table_versions')
@@ -0,0 +1,101 @@
+"""
+Recommend Argon2 parameters that make one password verification take
+about `--target-ms` on this host.
+
+Following RFC 9106, memory is preferred over time: the largest memory
+cost up to `--max-memory-mib` is tried first, then the time cost is
+raised while verification stays within the target:
+
+    python -m benchmarks.argon2_calibrate --target-ms 250
+"""
+import argparse
+import os
+import statistics
+import time
+
+from passlib.hash import argon2
+
+PASSWORD = "SecureP@ssw0rd"
+MEMORY_STEPS_MIB = (1024, 512, 256, 128, 64, 46, 19)
+
+
+def verify_ms(
+        time_cost: int,
+        memory_cost: int,
+        parallelism: int,
+        samples: int
+) -> float:
+    """Median time in ms to verify a password hashed with the parameters."""
+    handler = argon2.using(
+        rounds=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    hashed = handler.hash(PASSWORD)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.verify(PASSWORD, hashed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(
+        target_ms: float,
+        max_memory_mib: int,
+        parallelism: int,
+        samples: int
+) -> tuple[int, int, float]:
+    """Return `(time_cost, memory_cost_kib, verify_ms)` for the target."""
+    best = None
+    for memory_mib in MEMORY_STEPS_MIB:
+        if memory_mib > max_memory_mib:
+            continue
+        memory_cost = memory_mib * 1024
+        elapsed = verify_ms(1, memory_cost, parallelism, samples)
+        print(f"  m={memory_mib:>4} MiB t=1  {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            continue
+
+        best = (1, memory_cost, elapsed)
+        time_cost = 2
+        while True:
+            elapsed = verify_ms(time_cost, memory_cost, parallelism, samples)
+            print(f"  m={memory_mib:>4} MiB t={time_cost:<2} "
+                  f"{elapsed:8.1f} ms")
+            if elapsed > target_ms:
+                break
+            best = (time_cost, memory_cost, elapsed)
+            time_cost += 1
+        break
+    if best is None:
+        raise SystemExit(
+            f"Even the smallest memory cost takes longer than "
+            f"{target_ms} ms on this host; raise --target-ms."
+        )
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--max-memory-mib", type=int, default=256)
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=min(os.cpu_count() or 1, 4)
+    )
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"target: {args.target_ms} ms per verification, "
+          f"parallelism: {args.parallelism}")
+    time_cost, memory_cost, elapsed = calibrate(
+        args.target_ms, args.max_memory_mib, args.parallelism, args.samples
+    )
+    print(f"\nrecommended ({elapsed:.1f} ms):")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
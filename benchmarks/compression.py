@@ -0,0 +1,77 @@
+"""
+Weigh the CPU cost of each response encoding against the bytes it saves.
+
+    python -m benchmarks.compression --appointments 50 10000
+
+The payloads are appointment lists rendered as the API renders them.
+Compression pays off on links slower than the break-even bandwidth,
+where sending the saved bytes would take longer than compressing them.
+"""
+import argparse
+import statistics
+import time
+
+from fastapi.responses import ORJSONResponse
+
+from benchmarks.json_rendering import RESPONSE_MODEL, build_payload
+from utils.compression import (
+    BrotliEncoder,
+    GzipEncoder,
+    ZstdEncoder,
+    brotli,
+    zstandard,
+)
+
+LEVELS = [("gzip", GzipEncoder, (1, 6, 9))]
+if brotli is not None:
+    LEVELS.append(("br", BrotliEncoder, (1, 4, 6)))
+if zstandard is not None:
+    LEVELS.append(("zstd", ZstdEncoder, (1, 3, 9)))
+
+
+def render(count: int) -> bytes:
+    payload = build_payload(count)
+    return ORJSONResponse(
+        RESPONSE_MODEL.dump_python(payload, mode="json")
+    ).body
+
+
+def compress(encoder, body: bytes) -> bytes:
+    return encoder.compress(body, flush=False) + encoder.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--appointments", type=int, nargs="+", default=[50, 10_000]
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for count in args.appointments:
+        body = render(count)
+        print(f"\n{count} appointments, {len(body) / 1024:.1f} KiB")
+        print(
+            f"{'encoding':10} {'median':>10} {'MB/s':>8} {'ratio':>7} "
+            f"{'saved':>11} {'break-even':>14}"
+        )
+        for name, encoder_class, levels in LEVELS:
+            for level in levels:
+                timings = []
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    compressed = compress(encoder_class(level), body)
+                    timings.append(time.perf_counter() - started)
+                median = statistics.median(timings)
+                saved = len(body) - len(compressed)
+                print(
+                    f"{f'{name} {level}':10} {median * 1000:7.2f} ms "
+                    f"{len(body) / median / 1e6:8.1f} "
+                    f"{len(body) / len(compressed):6.1f}x "
+                    f"{saved / 1024:7.1f} KiB "
+                    f"{saved * 8 / median / 1e6:9.0f} Mbit/s"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compare email throughput of the pooled `SMTPTransport` against the
+original one-connection-per-message `deliver_email`.
+
+Runs against a local aiosmtpd server that accepts any credentials:
+
+    python -m benchmarks.email_throughput --messages 500 --pool-size 4
+"""
+import argparse
+import asyncio
+import socket
+import time
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from utils import email as email_utils
+from utils.email import SMTPTransport, deliver_email
+
+USERNAME = "noreply@example.com"
+PASSWORD = "secret"
+
+
+class SinkHandler:
+    """Accepts every message, optionally simulating server latency."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+
+def accept_any(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_per_message(port: int, messages: int) -> float:
+    email_utils.SMTP_SERVER = "127.0.0.1"
+    email_utils.SMTP_PORT = port
+    email_utils.SMTP_START_TLS = False
+    email_utils.EMAIL_USERNAME = USERNAME
+    email_utils.EMAIL_PASSWORD = PASSWORD
+
+    started = time.perf_counter()
+    for i in range(messages):
+        deliver_email(f"user{i}@example.com", "Benchmark", "Body")
+    return messages / (time.perf_counter() - started)
+
+
+async def bench_pooled(port: int, messages: int, pool_size: int) -> float:
+    transport = SMTPTransport(
+        hostname="127.0.0.1",
+        port=port,
+        username=USERNAME,
+        password=PASSWORD,
+        start_tls=False,
+        pool_size=pool_size,
+    )
+    started = time.perf_counter()
+    results = await transport.send_many(
+        (f"user{i}@example.com", "Benchmark", "Body")
+        for i in range(messages)
+    )
+    elapsed = time.perf_counter() - started
+    await transport.close()
+
+    failures = [error for error in results if error is not None]
+    if failures:
+        raise RuntimeError(f"{len(failures)} sends failed: {failures[0]}")
+    return messages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument(
+        "--server-delay",
+        type=float,
+        default=0.0,
+        help="Seconds the stand-in server spends on each message."
+    )
+    args = parser.parse_args()
+
+    handler = SinkHandler(args.server_delay)
+    controller = Controller(
+        handler,
+        hostname="127.0.0.1",
+        port=free_port(),
+        authenticator=accept_any,
+        auth_require_tls=False,
+    )
+    controller.start()
+    try:
+        per_message = bench_per_message(controller.port, args.messages)
+        pooled = asyncio.run(
+            bench_pooled(controller.port, args.messages, args.pool_size)
+        )
+    finally:
+        controller.stop()
+
+    print(f"messages:            {args.messages}")
+    print(f"per-message connect: {per_message:10.1f} msg/s")
+    print(f"pooled (size {args.pool_size:>2}):   {pooled:10.1f} msg/s")
+    print(f"speedup:             {pooled / per_message:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare JSON rendering throughput for a large appointment list.
+
+    python -m benchmarks.json_rendering --appointments 10000
+
+Every variant starts from the validated response model, as FastAPI has
+it after checking the endpoint's return value against `response_model`.
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from schemas.appointments import AppointmentDetailRead
+
+RESPONSE_MODEL = TypeAdapter(list[AppointmentDetailRead])
+
+
+def build_payload(count: int) -> list[AppointmentDetailRead]:
+    """Appointments with their car and service, as the list routes return."""
+    start = datetime(2099, 1, 5, 9, tzinfo=timezone.utc)
+    return RESPONSE_MODEL.validate_python([
+        {
+            "appointment_id": index,
+            "user_id": index % 500 + 1,
+            "car_id": index % 800 + 1,
+            "service_id": index % 12 + 1,
+            "mechanic_id": index % 40 + 1,
+            "appointment_date": start + timedelta(hours=index),
+            "status": "PENDING",
+            "car": {
+                "car_id": index % 800 + 1,
+                "user_id": index % 500 + 1,
+                "brand": "Škoda",
+                "model": "Octavia",
+                "year": 2015 + index % 10,
+                "plate_number": f"AA{index % 10000:04d}KX",
+                "vin": f"TMBJG7NE{index:09d}",
+            },
+            "service": {
+                "service_id": index % 12 + 1,
+                "name": "Oil change",
+                "description": "Engine oil and filter replacement",
+                "duration": 60,
+                "price": 89.9,
+            },
+        }
+        for index in range(count)
+    ])
+
+
+def stdlib_encoder(payload) -> bytes:
+    """`jsonable_encoder` walking the models, then stdlib `json`."""
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def stdlib_json(payload) -> bytes:
+    """FastAPI's default: pydantic-core dumps to Python, stdlib `json`."""
+    return JSONResponse(RESPONSE_MODEL.dump_python(payload, mode="json")).body
+
+
+def orjson(payload) -> bytes:
+    """The app's response class: pydantic-core dumps, orjson renders."""
+    return ORJSONResponse(
+        RESPONSE_MODEL.dump_python(payload, mode="json")
+    ).body
+
+
+def pydantic_json(payload) -> bytes:
+    """pydantic-core straight to bytes; the ceiling for this payload."""
+    return RESPONSE_MODEL.dump_json(payload)
+
+
+RENDERERS = [stdlib_encoder, stdlib_json, orjson, pydantic_json]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--appointments", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = build_payload(args.appointments)
+    expected = json.loads(stdlib_json(payload))
+
+    print(f"{'renderer':16} {'median':>10} {'MB/s':>8} {'size':>10}")
+    for render in RENDERERS:
+        body = render(payload)
+        assert json.loads(body) == expected, render.__name__
+
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            render(payload)
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        print(
+            f"{render.__name__:16} {median * 1000:8.2f} ms "
+            f"{len(body) / median / 1e6:8.1f} {len(body):10d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
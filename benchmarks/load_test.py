@@ -0,0 +1,461 @@
+"""
+Replay a weighted request mix against `main.app` with concurrent clients
+and report throughput, latency percentiles and SQL statements per route.
+
+The database is seeded at `--scale` into a temporary SQLite file, or into
+the throwaway database at `--url`. The mix is replayed `--repeat` times
+and the median of each figure across the runs is reported. A report can
+be saved as a baseline and later ones compared against it, failing when
+they regress by more than both the tolerance and the run-to-run noise:
+
+    python -m benchmarks.load_test --clients 20 --requests 5000 \\
+        --output baseline.json
+    python -m benchmarks.load_test --clients 20 --requests 5000 \\
+        --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import replace
+from datetime import date, datetime, time as day_time, timedelta
+from typing import Optional
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.login_latency import percentile
+from db.engine import Base, get_async_db, get_async_read_db, make_engine
+from db.settings import settings
+from main import app
+from models.appointments import Appointment
+from models.car import Car
+from models.mechanics import Mechanic
+from models.services import Service
+from models.users import Users
+from utils.hashing import password_policy
+
+DEFAULT_MIX = os.path.join(os.path.dirname(__file__), "request_mix.jsonl")
+PASSWORD = "SecureP@ssw0rd"
+FULL_PLACEHOLDER = re.compile(r"^\{(\w+)\}$")
+# Bookings land after the seeded calendars so most of them succeed.
+BOOKING_DAYS = (60, 400)
+# Figures whose spread across runs is kept, to tell noise from regressions.
+NOISY_FIGURES = ("rps", "p95_ms", "queries_per_request")
+
+# Statements of the request the current client is waiting for.
+statement_count: ContextVar[Optional[list[int]]] = ContextVar(
+    "statement_count", default=None
+)
+
+
+def count_statement(conn, cursor, statement, parameters, context, many):
+    count = statement_count.get()
+    if count is not None:
+        count[0] += 1
+
+
+def read_mix(path: str) -> list[dict]:
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+async def seed(engine: AsyncEngine, scale: int) -> dict[str, list]:
+    """Insert `scale` units of data and return the IDs to request."""
+    users = 200 * scale
+    mechanics = 10 * scale
+    appointments = 2000 * scale
+    hashed = password_policy.hash(PASSWORD)
+    tomorrow = date.today() + timedelta(days=1)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Users), [
+            {"name": f"Load User {i}", "email": f"load{i}@example.com",
+             "password": hashed}
+            for i in range(users)
+        ])
+        await conn.execute(insert(Service), [
+            {"name": f"Load Service {i}", "price": 20.0 + i,
+             "duration": 30 if i % 2 else 60}
+            for i in range(20)
+        ])
+        await conn.execute(insert(Mechanic), [
+            {"name": f"Load Mechanic {i}", "birth_date": date(1990, 1, 1),
+             "login": f"load_mechanic{i}", "password": hashed,
+             "position": "Technician"}
+            for i in range(mechanics)
+        ])
+        user_ids = (await conn.execute(select(Users.user_id))).scalars().all()
+        await conn.execute(insert(Car), [
+            {"user_id": user_id, "brand": "Toyota", "model": "Corolla",
+             "year": 2020, "plate_number": f"LT{user_id:06}",
+             "vin": f"LOADTEST{user_id:09}"}
+            for user_id in user_ids
+        ])
+
+        ids = {
+            "user_car": (await conn.execute(
+                select(Car.user_id, Car.car_id)
+            )).all(),
+            "service": (await conn.execute(
+                select(Service.service_id)
+            )).scalars().all(),
+            "mechanic": (await conn.execute(
+                select(Mechanic.mechanic_id)
+            )).scalars().all(),
+        }
+
+        # Hour-long bookings filling each mechanic's days from tomorrow.
+        rows = []
+        for i in range(appointments):
+            slot, mechanic = divmod(i, mechanics)
+            day, hour = divmod(slot, 9)
+            user_id, car_id = ids["user_car"][i % len(ids["user_car"])]
+            rows.append({
+                "user_id": user_id,
+                "car_id": car_id,
+                "service_id": ids["service"][0],
+                "mechanic_id": ids["mechanic"][mechanic],
+                "appointment_date": datetime.combine(
+                    tomorrow + timedelta(days=day), day_time(9 + hour)
+                ),
+            })
+        await conn.execute(insert(Appointment), rows)
+        ids["appointment"] = (await conn.execute(
+            select(Appointment.appointment_id)
+        )).scalars().all()
+    return ids
+
+
+def random_picks(ids: dict[str, list], rng: random.Random) -> dict:
+    """Values for the placeholders of one request."""
+    user_id, car_id = rng.choice(ids["user_car"])
+    booking_day = date.today() + timedelta(days=rng.randint(*BOOKING_DAYS))
+    return {
+        "user_id": user_id,
+        "car_id": car_id,
+        "service_id": rng.choice(ids["service"]),
+        "mechanic_id": rng.choice(ids["mechanic"]),
+        "appointment_id": rng.choice(ids["appointment"]),
+        "day": (date.today() + timedelta(days=rng.randint(1, 30)))
+        .isoformat(),
+        "booking_date": f"{booking_day.isoformat()}T"
+                        f"{rng.randint(9, 16):02}:00:00Z",
+    }
+
+
+def fill(value, picks: dict):
+    """Replace `{name}` placeholders, keeping the type of whole values."""
+    if isinstance(value, str):
+        match = FULL_PLACEHOLDER.match(value)
+        if match:
+            return picks[match.group(1)]
+        return value.format(**picks)
+    if isinstance(value, dict):
+        return {key: fill(item, picks) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill(item, picks) for item in value]
+    return value
+
+
+def is_expected(entry: dict, status: int) -> bool:
+    if "expect" in entry:
+        return status in entry["expect"]
+    return 200 <= status < 300
+
+
+async def drive(
+        mix: list[dict],
+        ids: dict[str, list],
+        clients: int,
+        requests: int,
+        seed_value: int
+) -> tuple[dict[str, list], float]:
+    """Send `requests` requests from `clients` clients; samples by route."""
+    samples = defaultdict(list)
+    remaining = iter(range(requests))
+    weights = [entry.get("weight", 1) for entry in mix]
+
+    async def client_loop(client: AsyncClient, rng: random.Random):
+        for _ in remaining:
+            entry = rng.choices(mix, weights)[0]
+            picks = random_picks(ids, rng)
+            count = [0]
+            statement_count.set(count)
+            started = time.perf_counter()
+            response = await client.request(
+                entry["method"],
+                fill(entry["path"], picks),
+                json=fill(entry.get("json"), picks),
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            samples[entry["name"]].append(
+                (elapsed, is_expected(entry, response.status_code), count[0])
+            )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://load-test"
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client_loop(client, random.Random(seed_value + number))
+            for number in range(clients)
+        ))
+        duration = time.perf_counter() - started
+    return samples, duration
+
+
+def summarize(samples: dict[str, list], duration: float) -> dict:
+    routes = {}
+    for name, route_samples in sorted(samples.items()):
+        latencies = [sample[0] for sample in route_samples]
+        routes[name] = {
+            "requests": len(route_samples),
+            "errors": sum(not sample[1] for sample in route_samples),
+            "rps": round(len(route_samples) / duration, 1),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "queries_per_request": round(statistics.mean(
+                sample[2] for sample in route_samples
+            ), 2),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "total": {
+            "requests": total,
+            "errors": sum(route["errors"] for route in routes.values()),
+            "seconds": round(duration, 2),
+            "rps": round(total / duration, 1),
+        },
+        "routes": routes,
+    }
+
+
+def median_of_runs(runs: list[dict]) -> dict:
+    """
+    The median of every figure across the summaries of several runs, with
+    the spread (largest minus smallest) of the noisy ones.
+    """
+    def merge(figures: list[dict]) -> dict:
+        merged = {
+            key: round(statistics.median(item[key] for item in figures), 2)
+            for key in figures[0]
+        }
+        merged["spread"] = {
+            key: round(
+                max(item[key] for item in figures)
+                - min(item[key] for item in figures), 2
+            )
+            for key in NOISY_FIGURES if key in figures[0]
+        }
+        return merged
+
+    names = sorted({name for run in runs for name in run["routes"]})
+    return {
+        "total": merge([run["total"] for run in runs]),
+        "routes": {
+            name: merge([
+                run["routes"][name] for run in runs if name in run["routes"]
+            ])
+            for name in names
+        },
+        "runs": len(runs),
+    }
+
+
+def noise(before: dict, after: dict, key: str) -> float:
+    """The larger run-to-run spread of `key` in the two reports."""
+    return max(
+        before.get("spread", {}).get(key, 0),
+        after.get("spread", {}).get(key, 0),
+    )
+
+
+def compare(
+        current: dict,
+        baseline: dict,
+        tolerance: float,
+        min_samples: int = 0
+) -> list[str]:
+    """
+    Describe every way `current` is worse than `baseline`. A figure has
+    to be worse by more than `tolerance` and by more than it varies from
+    run to run; latency is only compared for routes with at least
+    `min_samples` requests per run in both reports.
+    """
+    regressions = []
+    before, after = baseline["total"], current["total"]
+    if before["rps"] - after["rps"] > max(
+            before["rps"] * tolerance, noise(before, after, "rps")
+    ):
+        regressions.append(
+            f"throughput fell from {before['rps']} "
+            f"to {after['rps']} requests/s"
+        )
+    for name, before in baseline["routes"].items():
+        after = current["routes"].get(name)
+        if after is None:
+            continue
+        sampled = min(before["requests"], after["requests"]) >= min_samples
+        if sampled and after["p95_ms"] - before["p95_ms"] > max(
+                before["p95_ms"] * tolerance, noise(before, after, "p95_ms")
+        ):
+            regressions.append(
+                f"{name}: p95 rose from {before['p95_ms']} "
+                f"to {after['p95_ms']} ms"
+            )
+        # Statement counts do not depend on machine load, so growth
+        # beyond rounding and the mix of outcomes is a regression.
+        if after["queries_per_request"] - before["queries_per_request"] \
+                > max(0.1, noise(before, after, "queries_per_request")):
+            regressions.append(
+                f"{name}: statements per request rose from "
+                f"{before['queries_per_request']} "
+                f"to {after['queries_per_request']}"
+            )
+        error_rate = after["errors"] / after["requests"]
+        if error_rate > before["errors"] / before["requests"] + tolerance:
+            regressions.append(
+                f"{name}: {after['errors']} of {after['requests']} "
+                f"requests failed"
+            )
+    return regressions
+
+
+def print_report(report: dict):
+    print(f"{'route':<28} {'reqs':>6} {'err':>4} {'rps':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql/req':>8}")
+    for name, route in report["routes"].items():
+        print(f"{name:<28} {route['requests']:>6} {route['errors']:>4} "
+              f"{route['rps']:>7} {route['p50_ms']:>8} {route['p95_ms']:>8} "
+              f"{route['p99_ms']:>8} {route['queries_per_request']:>8}")
+    total = report["total"]
+    print(f"\n{total['requests']} requests in {total['seconds']} s: "
+          f"{total['rps']} requests/s, {total['errors']} unexpected "
+          f"responses (medians of {report['runs']} runs; throughput "
+          f"varied by {total['spread']['rps']} requests/s)")
+
+
+async def run(args) -> dict:
+    if args.url:
+        database = replace(settings, url=args.url)
+    else:
+        folder = tempfile.mkdtemp()
+        database = replace(
+            settings,
+            url=f"sqlite+aiosqlite:///{os.path.join(folder, 'load.db')}"
+        )
+    engine = make_engine(database)
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    ids = await seed(engine, args.scale)
+
+    factory = sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def override():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override
+    app.dependency_overrides[get_async_read_db] = override
+    runs = []
+    try:
+        for number in range(args.repeat):
+            # Each run sends its own random requests.
+            samples, duration = await drive(
+                read_mix(args.mix),
+                ids,
+                args.clients,
+                args.requests,
+                args.seed + number * args.clients
+            )
+            runs.append(summarize(samples, duration))
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    report = median_of_runs(runs)
+    report["config"] = {
+        "clients": args.clients,
+        "requests": args.requests,
+        "repeat": args.repeat,
+        "scale": args.scale,
+        "backend": database.backend,
+        "mix": os.path.basename(args.mix),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Runs to take the median of, on the same seeded data."
+    )
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument(
+        "--url",
+        help="Throwaway database to seed instead of a temporary SQLite file."
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Save the results as JSON.")
+    parser.add_argument("--compare", help="Baseline JSON to compare with.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="Allowed relative slowdown before a route is flagged."
+    )
+    parser.add_argument(
+        "--min-samples",
+        type=int,
+        default=50,
+        help="Requests per run a route needs for its latency to be "
+             "compared."
+    )
+    args = parser.parse_args()
+
+    # MechanicRead serializes birth dates as strings, which pydantic warns
+    # about on every mechanic listed.
+    warnings.filterwarnings("ignore", "Pydantic serializer warnings")
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(
+            report, baseline, args.tolerance, args.min_samples
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}.")
+
+
+if __name__ == "__main__":
+    main()
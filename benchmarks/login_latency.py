@@ -0,0 +1,101 @@
+"""
+Compare login latency with Argon2 verification on the event loop against
+verification in the `PasswordHasher` process pool.
+
+Each run starts `--clients` concurrent clients that log in repeatedly,
+while a probe measures how long a trivial request waits for the loop:
+
+    python -m benchmarks.login_latency --clients 16 --logins 8 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from passlib.hash import argon2
+
+from utils.hashing import PasswordHasher
+
+PASSWORD = "SecureP@ssw0rd"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(int(len(ordered) * pct / 100), len(ordered) - 1)
+    return ordered[index]
+
+
+async def run(verify, clients: int, logins: int, hashed: str) -> dict:
+    """Latencies in ms of every login and of the loop probe."""
+    login_latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def client(issued: float):
+        # A login is timed from when the client sent it, which on a
+        # blocked loop is before the coroutine gets to run.
+        for _ in range(logins):
+            assert await verify(PASSWORD, hashed)
+            finished = time.perf_counter()
+            login_latencies.append((finished - issued) * 1000)
+            issued = finished
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = time.perf_counter() - started - 0.005
+            probe_latencies.append(max(lag, 0) * 1000)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(client(started) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return {
+        "login": login_latencies,
+        "probe": probe_latencies,
+        "throughput": clients * logins / elapsed,
+    }
+
+
+async def verify_inline(password: str, hashed: str) -> bool:
+    return argon2.verify(password, hashed)
+
+
+def report(name: str, result: dict):
+    login, probe = result["login"], result["probe"]
+    print(
+        f"{name:<14} login p50 {statistics.median(login):8.1f} ms"
+        f"  p99 {percentile(login, 99):8.1f} ms"
+        f"  | other requests p99 {percentile(probe, 99):8.1f} ms"
+        f"  | {result['throughput']:6.1f} logins/s"
+    )
+
+
+async def main(clients: int, logins: int, workers: int):
+    hashed = argon2.hash(PASSWORD)
+    inline = await run(verify_inline, clients, logins, hashed)
+
+    hasher = PasswordHasher(workers=workers)
+    try:
+        await hasher.verify(PASSWORD, hashed)  # start the workers
+        pooled = await run(hasher.verify, clients, logins, hashed)
+    finally:
+        hasher.shutdown()
+
+    print(f"clients: {clients}, logins per client: {logins}, "
+          f"workers: {workers}, cpus: {os.cpu_count()}")
+    report("event loop", inline)
+    report(f"pool ({workers})", pooled)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.logins, args.workers))
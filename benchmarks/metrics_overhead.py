@@ -0,0 +1,130 @@
+"""
+Measure what request and query instrumentation adds to request latency.
+
+The app is driven in-process against a SQLite file, alternating rounds
+with and without `MetricsMiddleware` and the engine timers so that both
+see the same machine noise:
+
+    python -m benchmarks.metrics_overhead --requests 500 --rounds 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from db.engine import Base, get_async_db, get_async_read_db, make_engine
+from db.settings import DatabaseSettings
+from main import app
+from models.services import Service
+from utils.metrics import MetricsMiddleware, instrument_engine
+
+
+def middleware_stack(with_metrics: bool):
+    """The app's middleware stack with or without metrics."""
+    original = list(app.user_middleware)
+    app.user_middleware = [
+        middleware for middleware in original
+        if with_metrics or middleware.cls is not MetricsMiddleware
+    ]
+    try:
+        return app.build_middleware_stack()
+    finally:
+        app.user_middleware = original
+
+
+async def run(requests: int, rounds: int, services: int) -> dict:
+    """Mean latency in µs per request of every round, by variant."""
+    folder = tempfile.mkdtemp()
+    settings = DatabaseSettings(
+        url=f"sqlite+aiosqlite:///{os.path.join(folder, 'bench.db')}"
+    )
+    engines = {
+        "plain": make_engine(settings),
+        "metrics": make_engine(settings),
+    }
+    instrument_engine(engines["metrics"], "bench")
+
+    async with engines["plain"].begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engines["plain"]) as session:
+        session.add_all(
+            Service(name=f"Service {i}", price=10.0 + i, duration=30)
+            for i in range(services)
+        )
+        await session.commit()
+
+    stacks = {
+        "plain": middleware_stack(False),
+        "metrics": middleware_stack(True),
+    }
+    latencies = {"plain": [], "metrics": []}
+    paths = ["/services/", "/services/1"]
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        for round_number in range(rounds + 1):
+            # Alternate which variant goes first to cancel drift.
+            order = ("plain", "metrics")
+            for variant in order if round_number % 2 else order[::-1]:
+                factory = sessionmaker(
+                    bind=engines[variant],
+                    class_=AsyncSession,
+                    expire_on_commit=False,
+                )
+
+                async def override():
+                    async with factory() as session:
+                        yield session
+
+                app.dependency_overrides[get_async_db] = override
+                app.dependency_overrides[get_async_read_db] = override
+                app.middleware_stack = stacks[variant]
+
+                started = time.perf_counter()
+                for i in range(requests):
+                    response = await client.get(paths[i % len(paths)])
+                    assert response.status_code == 200
+                elapsed = time.perf_counter() - started
+                # The first round only warms up caches and connections.
+                if round_number:
+                    latencies[variant].append(elapsed / requests * 1e6)
+
+    app.dependency_overrides.clear()
+    app.middleware_stack = None
+    for engine in engines.values():
+        await engine.dispose()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--services", type=int, default=20)
+    args = parser.parse_args()
+
+    latencies = asyncio.run(run(args.requests, args.rounds, args.services))
+    plain = statistics.median(latencies["plain"])
+    metered = statistics.median(latencies["metrics"])
+    # Rounds run back to back, so their differences are less noisy than
+    # the difference of the medians.
+    overhead = statistics.median(
+        (with_metrics - without) / without * 100
+        for without, with_metrics in zip(
+            latencies["plain"], latencies["metrics"]
+        )
+    )
+    print(f"without metrics: {plain:8.1f} µs per request")
+    print(f"with metrics:    {metered:8.1f} µs per request")
+    print(f"overhead:        {overhead:8.1f}% (median of paired rounds)")
+
+
+if __name__ == "__main__":
+    main()
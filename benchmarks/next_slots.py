@@ -0,0 +1,72 @@
+"""
+Time the earliest-slot search over synthetic mechanic calendars.
+
+    python -m benchmarks.next_slots --mechanics 300 --days 90
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from utils.availability import (
+    MechanicCalendar,
+    next_free_slots,
+    working_hours,
+)
+
+
+def build_calendars(
+        mechanics: int,
+        days: int,
+        occupancy: float,
+        seed: int
+) -> dict[int, MechanicCalendar]:
+    """Fill each working day with hour-long jobs at the given occupancy."""
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    calendars = {}
+    key = 0
+    for mechanic_id in range(1, mechanics + 1):
+        calendar = MechanicCalendar()
+        for offset in range(days):
+            day_start, day_end = working_hours(today + timedelta(offset))
+            start = day_start
+            while start + timedelta(hours=1) <= day_end:
+                if rng.random() < occupancy:
+                    key += 1
+                    calendar.add(key, start, start + timedelta(hours=1))
+                start += timedelta(hours=1)
+        calendars[mechanic_id] = calendar
+    return calendars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mechanics", type=int, default=300)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--occupancy", type=float, default=0.9)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--duration", type=int, default=90)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    calendars = build_calendars(
+        args.mechanics, args.days, args.occupancy, seed=42
+    )
+    bookings = sum(len(calendar) for calendar in calendars.values())
+    after = datetime.now()
+
+    timings = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        next_free_slots(calendars, args.duration, after, args.count)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    print(f"mechanics: {args.mechanics}, bookings: {bookings}")
+    print(f"median:    {statistics.median(timings):8.2f} ms")
+    print(f"max:       {max(timings):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
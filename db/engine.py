@@ -1,22 +1,62 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import declarative_base
 
-# Load environment variables
-load_dotenv()
+from db.routing import reads_from_primary
+from db.settings import DatabaseSettings, read_settings, settings
+
+
+def engine_options(settings: DatabaseSettings, pooled: bool = True) -> dict:
+    """Keyword arguments for `create_engine` built from `settings`."""
+    options = {
+        "echo": settings.echo,
+        "echo_pool": settings.echo_pool,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+    connect_args = dict(settings.connect_args)
+    if settings.statement_timeout_ms and settings.backend == "mysql":
+        # MySQL applies the limit to SELECTs, which is where runaway
+        # statements come from; writes are bounded by lock timeouts.
+        connect_args.setdefault(
+            "init_command",
+            f"SET SESSION MAX_EXECUTION_TIME={settings.statement_timeout_ms}"
+        )
+    if connect_args:
+        options["connect_args"] = connect_args
+    # SQLite keeps the pool SQLAlchemy picks for it, which takes no sizes.
+    if pooled and settings.backend != "sqlite":
+        options.update(
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_timeout=settings.pool_timeout,
+            pool_recycle=settings.pool_recycle,
+        )
+    return options
+
+
+def make_engine(settings: DatabaseSettings) -> AsyncEngine:
+    """The application's async engine for `settings`."""
+    return create_async_engine(settings.url, **engine_options(settings))
 
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
 
-SQLALCHEMY_DATABASE_URL = \
-    f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+def make_sync_engine(settings: DatabaseSettings, **kwargs) -> Engine:
+    """
+    A blocking engine on the same database, for tools such as Alembic.
+    Passing `poolclass` leaves the pool sizes out.
+    """
+    options = engine_options(settings, pooled="poolclass" not in kwargs)
+    options.update(kwargs)
+    return create_engine(settings.sync_url, **options)
 
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, future=True, echo=True)
+
+SQLALCHEMY_DATABASE_URL = settings.url.render_as_string(hide_password=False)
+
+engine = make_engine(settings)
 
 SessionLocal = sessionmaker(
     bind=engine,
@@ -24,9 +64,35 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Without a replica, reads share the primary's engine and pool.
+read_engine = make_engine(read_settings) if read_settings else engine
+
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
 async def get_async_db():
     async with SessionLocal() as session:
         yield session
+
+
+async def get_async_read_db():
+    """
+    Session for handlers that only read, on the replica when one is
+    configured. Clients that have just written read from the primary.
+    """
+    factory = SessionLocal if reads_from_primary() else ReadSessionLocal
+    async with factory() as session:
+        yield session
+
+
+async def dispose_engines():
+    """Close the pooled connections of the primary and the replica."""
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
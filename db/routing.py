@@ -0,0 +1,103 @@
+"""
+Read-your-writes routing between the primary and the read replica.
+
+A client that has just written keeps reading from the primary for
+`DB_READ_YOUR_WRITES_SECONDS`, so it never sees the replica lag behind
+its own changes. The window is carried in a cookie set on the response
+to any request that flushed a change or ran an ORM INSERT, UPDATE or
+DELETE statement.
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+
+from db.settings import READ_YOUR_WRITES_SECONDS
+
+PRIMARY_COOKIE = "read_primary_until"
+
+
+@dataclass
+class RoutingState:
+    """What the current request has done and where it should read."""
+    read_primary: bool = False
+    wrote: bool = False
+
+
+routing_state: ContextVar[Optional[RoutingState]] = ContextVar(
+    "routing_state", default=None
+)
+
+
+def reads_from_primary() -> bool:
+    """Whether reads of the current request must go to the primary."""
+    state = routing_state.get()
+    return state is not None and (state.read_primary or state.wrote)
+
+
+@event.listens_for(Session, "after_flush")
+def mark_write(session, flush_context):
+    state = routing_state.get()
+    if state is not None:
+        state.wrote = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def mark_statement_write(orm_execute_state):
+    # Bulk statements such as `execute(insert(Model), rows)` never flush.
+    if orm_execute_state.is_insert or orm_execute_state.is_update \
+            or orm_execute_state.is_delete:
+        mark_write(orm_execute_state.session, None)
+
+
+def cookie_window_open(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name != b"cookie":
+            continue
+        morsel = SimpleCookie(value.decode("latin-1")).get(PRIMARY_COOKIE)
+        if morsel is None:
+            continue
+        try:
+            return float(morsel.value) > time.time()
+        except ValueError:
+            return False
+    return False
+
+
+class ReadYourWritesMiddleware:
+    """Pin a client's reads to the primary for a while after it writes."""
+
+    def __init__(self, app, window: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # The state is shared by reference, so flushes in tasks started
+        # for this request still mark it.
+        state = RoutingState(read_primary=cookie_window_open(scope))
+        token = routing_state.set(state)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                until = time.time() + self.window
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{PRIMARY_COOKIE}={until:.3f}; "
+                    f"Max-Age={int(self.window) or 1}; Path=/; HttpOnly"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            routing_state.reset(token)
@@ -0,0 +1,92 @@
+import os
+from dataclasses import dataclass, field, replace
+from typing import Optional, Union
+
+from dotenv import load_dotenv
+from sqlalchemy.engine import URL, make_url
+
+load_dotenv()
+
+# Blocking drivers for tools, such as Alembic, that cannot run async.
+SYNC_DRIVERS = {
+    "mysql+aiomysql": "mysql+pymysql",
+    "sqlite+aiosqlite": "sqlite",
+}
+
+
+def parse_echo(value: Optional[str]) -> Union[bool, str]:
+    """`DB_ECHO` value: off by default, `true` for SQL, `debug` for rows."""
+    value = (value or "false").lower()
+    if value == "debug":
+        return "debug"
+    return value in ("true", "info", "1")
+
+
+def url_from_env() -> URL:
+    """`DATABASE_URL` if set, otherwise a MySQL URL from the `DB_*` vars."""
+    if os.getenv("DATABASE_URL"):
+        return make_url(os.getenv("DATABASE_URL"))
+    return URL.create(
+        "mysql+aiomysql",
+        username=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", 3306)),
+        database=os.getenv("DB_NAME"),
+    )
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Connection and pool settings for the application's database."""
+    url: Union[URL, str]
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # 0 lets statements run for as long as the server allows.
+    statement_timeout_ms: int = 0
+    echo: Union[bool, str] = False
+    echo_pool: Union[bool, str] = False
+    connect_args: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        object.__setattr__(self, "url", make_url(self.url))
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        return cls(
+            url=url_from_env(),
+            pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 20)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            pool_pre_ping=(
+                os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+            ),
+            statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0)),
+            echo=parse_echo(os.getenv("DB_ECHO")),
+            echo_pool=parse_echo(os.getenv("DB_ECHO_POOL")),
+        )
+
+    @property
+    def backend(self) -> str:
+        return self.url.get_backend_name()
+
+    @property
+    def sync_url(self) -> URL:
+        """The same database through its blocking driver."""
+        driver = SYNC_DRIVERS.get(self.url.drivername, self.url.drivername)
+        return self.url.set(drivername=driver)
+
+
+settings = DatabaseSettings.from_env()
+
+# The replica shares the primary's pool settings; without a URL, reads go
+# to the primary.
+read_settings = (
+    replace(settings, url=os.getenv("DATABASE_READ_URL"))
+    if os.getenv("DATABASE_READ_URL") else None
+)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", 5))
@@ -0,0 +1,81 @@
+"""
+Per-table version counters behind the GET endpoints' ETags.
+
+A commit that changed rows of a versioned table increments the table's
+version in the same transaction, so a version read alongside the data
+always describes it. Changes are collected from flushed objects and
+from ORM INSERT, UPDATE and DELETE statements; rolled back ones do not
+count.
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.table_versions import VERSIONED_TABLES, TableVersion
+
+CHANGED_TABLES = "changed_tables"
+
+
+def mark_changed(session: Session, table_name: str):
+    if table_name in VERSIONED_TABLES:
+        session.info.setdefault(CHANGED_TABLES, set()).add(table_name)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_flushed(session, flush_context):
+    for obj in (*session.new, *session.deleted):
+        mark_changed(session, obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            mark_changed(session, obj.__table__.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update \
+            or orm_execute_state.is_delete:
+        table = orm_execute_state.statement.table
+        mark_changed(orm_execute_state.session, table.name)
+
+
+@event.listens_for(Session, "before_commit")
+def bump_versions(session):
+    # Releasing a savepoint fires this too; only the outermost commit
+    # bumps, so the version rows are locked as late as possible.
+    if session.in_nested_transaction():
+        return
+    # Commit flushes after this hook; flush first to see every change.
+    session.flush()
+    changed = session.info.pop(CHANGED_TABLES, None)
+    if changed:
+        session.connection().execute(
+            update(TableVersion)
+            .where(TableVersion.table_name.in_(sorted(changed)))
+            .values(version=TableVersion.version + 1)
+        )
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def forget_changes(session, previous_transaction):
+    # Savepoints and failed flushes roll back inner transactions; the
+    # changes made before them may still commit. At worst a version is
+    # bumped that did not need it.
+    if previous_transaction.parent is None:
+        session.info.pop(CHANGED_TABLES, None)
+
+
+async def table_versions(
+        db: AsyncSession,
+        table_names: Iterable[str]
+) -> Optional[dict[str, int]]:
+    """Current versions of the tables; None if any is not tracked."""
+    table_names = list(table_names)
+    stmt = select(TableVersion.table_name, TableVersion.version).where(
+        TableVersion.table_name.in_(table_names)
+    )
+    versions = dict((await db.execute(stmt)).all())
+    if len(versions) < len(table_names):
+        return None
+    return versions
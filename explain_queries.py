@@ -0,0 +1,113 @@
+"""
+Print the database's query plan for each query the routers run on a hot
+path, to check that they use the indexes instead of scanning tables.
+
+    python explain_queries.py
+    python explain_queries.py --url sqlite+aiosqlite:///./test.db
+"""
+import argparse
+import asyncio
+from dataclasses import replace
+from datetime import datetime
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.future import select
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from db.engine import SQLALCHEMY_DATABASE_URL, make_engine
+from db.settings import settings
+from models.appointments import AppointmentStatus
+from models.car import Car
+from models.documents import Document
+from routers.appointments import (
+    build_appointments_query,
+    build_references_query
+)
+from routers.mechanics import build_mechanic_appointments_query
+from utils.availability import build_calendar_query
+from utils.dates import utcnow
+from utils.outbox import build_due_emails_query
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN` wrapper around a select statement."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+def _process(element, compiler, **kw) -> str:
+    # Compile the select as a nested statement so its columns do not
+    # become the result columns; the plan rows have their own shape.
+    compiler.stack.append({
+        "correlate_froms": set(),
+        "asfrom_froms": set(),
+        "selectable": element.statement,
+    })
+    try:
+        return compiler.process(element.statement, **kw)
+    finally:
+        compiler.stack.pop()
+
+
+@compiles(Explain)
+def _explain(element, compiler, **kw):
+    return "EXPLAIN " + _process(element, compiler, **kw)
+
+
+@compiles(Explain, "sqlite")
+def _explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + _process(element, compiler, **kw)
+
+
+def hot_queries() -> dict:
+    """Name and statement of every query worth checking."""
+    cursor = (datetime(2025, 1, 1, 9), 1)
+    return {
+        "appointments page": build_appointments_query(),
+        "appointments page after cursor": build_appointments_query(
+            after=cursor
+        ),
+        "appointments of a user": build_appointments_query(user_id=1),
+        "appointments of a mechanic": build_appointments_query(
+            mechanic_id=1
+        ),
+        "appointments by status": build_appointments_query(
+            status=AppointmentStatus.PENDING, after=cursor
+        ),
+        "appointment references": build_references_query(1, 1, 1, 1),
+        "mechanic calendars": build_calendar_query([1, 2, 3]),
+        "mechanic appointments": build_mechanic_appointments_query(1),
+        "mechanic document of a type": select(Document).where(
+            Document.mechanic_id == 1, Document.type == "photo"
+        ),
+        "cars of a user": select(Car).where(Car.user_id == 1),
+        "due outbox emails": build_due_emails_query(utcnow(), 50),
+    }
+
+
+async def explain_queries(url: str):
+    engine = make_engine(replace(settings, url=url))
+    try:
+        async with engine.connect() as conn:
+            for name, stmt in hot_queries().items():
+                print(f"-- {name}")
+                rows = await conn.execute(Explain(stmt))
+                for row in rows:
+                    print("   ", " | ".join(str(value) for value in row))
+                print()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--url",
+        default=SQLALCHEMY_DATABASE_URL,
+        help="Database URL, defaults to the application's database."
+    )
+    args = parser.parse_args()
+    asyncio.run(explain_queries(args.url))
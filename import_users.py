@@ -0,0 +1,61 @@
+"""
+Create users in bulk from a JSON list or a CSV file with `name`, `email`,
+`password` and optional `role` columns:
+
+    python import_users.py customers.csv
+"""
+import argparse
+import asyncio
+import csv
+import json
+
+from pydantic import ValidationError
+
+from db.engine import SessionLocal, engine
+from routers.users import USER_IMPORT_CHUNK_SIZE, import_users
+from schemas.users import UserCreate
+from utils.hashing import close_hasher
+
+
+def read_rows(path: str) -> list[dict]:
+    with open(path, newline="") as file:
+        if path.endswith(".csv"):
+            return [
+                {key: value for key, value in row.items() if value}
+                for row in csv.DictReader(file)
+            ]
+        return json.load(file)
+
+
+async def main(path: str, chunk_size: int):
+    users, invalid = [], 0
+    for number, row in enumerate(read_rows(path), start=1):
+        try:
+            users.append(UserCreate(**row))
+        except ValidationError as e:
+            invalid += 1
+            print(f"Row {number}: {e.errors()[0]['msg']}")
+
+    try:
+        async with SessionLocal() as session:
+            results = await import_users(users, session, chunk_size)
+    finally:
+        close_hasher()
+        await engine.dispose()
+
+    for result in results:
+        if result.error:
+            print(f"{users[result.index].email}: {result.error}")
+    created = sum(result.user is not None for result in results)
+    print(f"Created {created} users, rejected {len(results) - created} "
+          f"rows and skipped {invalid} invalid rows.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="JSON or CSV file with the users.")
+    parser.add_argument(
+        "--chunk-size", type=int, default=USER_IMPORT_CHUNK_SIZE
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.chunk_size))
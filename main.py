@@ -1,14 +1,78 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from db.engine import dispose_engines, engine, read_engine
+from db.routing import ReadYourWritesMiddleware
 from routers import (
     users,
     cars,
     services,
     mechanics,
     appointments,
-    documents
+    documents,
+    exports,
+    metrics
+)
+from utils.compression import CompressionMiddleware
+from utils.email import close_transport
+from utils.exports import (
+    EXPORT_RUNNER_ENABLED,
+    close_export_runner,
+    get_export_runner,
 )
+from utils.hashing import close_hasher
+from utils.metrics import (
+    METRICS_DIR,
+    MetricsMiddleware,
+    MetricsSync,
+    instrument_engine,
+)
+from utils.query_budget import QueryBudgetMiddleware, track_queries
+from utils.outbox import OUTBOX_DISPATCHER_ENABLED, OutboxDispatcher
+from utils.warmup import warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up before taking traffic and run the email outbox dispatcher,
+    the export queue and the metrics sync alongside the API. On shutdown
+    a running export is put back in the queue and the dispatcher
+    finishes its batch before the transport, the hashing pool and the
+    engines are closed.
+    """
+    await warm_up()
+    dispatcher = OutboxDispatcher()
+    if OUTBOX_DISPATCHER_ENABLED:
+        dispatcher.start()
+    if EXPORT_RUNNER_ENABLED:
+        get_export_runner().start()
+    metrics_sync = MetricsSync(METRICS_DIR)
+    if METRICS_DIR:
+        metrics_sync.start()
+    yield
+    await close_export_runner()
+    await dispatcher.stop()
+    await metrics_sync.stop()
+    await close_transport()
+    close_hasher()
+    await dispose_engines()
+
+
+# Responses are rendered with orjson rather than the stdlib json module;
+# see benchmarks/json_rendering.py.
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-app = FastAPI()
+instrument_engine(engine, "primary")
+track_queries(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine, "replica")
+    track_queries(read_engine)
 
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(cars.router, prefix="/cars", tags=["Cars"])
@@ -20,6 +84,8 @@ app.include_router(
     tags=["Appointments"]
 )
 app.include_router(documents.router, prefix="/documents", tags=["Documents"])
+app.include_router(exports.router, prefix="/exports", tags=["Exports"])
+app.include_router(metrics.router, tags=["Metrics"])
 
 
 @app.get("/")
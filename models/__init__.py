@@ -6,6 +6,9 @@ from models.users import Users
 from models.documents import Document
 from models.mechanics import Mechanic
 from models.services import Service
+from models.email_outbox import EmailOutbox
+from models.export_jobs import ExportJob
+from models.table_versions import TableVersion
 
 
 Base = declarative_base()
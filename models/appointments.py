@@ -5,8 +5,10 @@ from sqlalchemy import (
     Integer,
     ForeignKey,
     DateTime,
-    Enum
+    Enum,
+    Index
 )
+from sqlalchemy.orm import relationship
 from db.engine import Base
 
 
@@ -38,3 +40,34 @@ class Appointment(Base):
         default=AppointmentStatus.PENDING,
         nullable=False
     )
+
+    __table_args__ = (
+        Index(
+            "ix_appointments_date_id",
+            "appointment_date",
+            "appointment_id"
+        ),
+        Index(
+            "ix_appointments_user_date",
+            "user_id",
+            "appointment_date",
+            "appointment_id"
+        ),
+        Index(
+            "ix_appointments_mechanic_date",
+            "mechanic_id",
+            "appointment_date",
+            "appointment_id"
+        ),
+        Index(
+            "ix_appointments_status_date",
+            "status",
+            "appointment_date",
+            "appointment_id"
+        ),
+    )
+
+    user = relationship("Users", back_populates="appointments")
+    car = relationship("Car", back_populates="appointments")
+    service = relationship("Service", back_populates="appointments")
+    mechanic = relationship("Mechanic", back_populates="appointments")
@@ -3,6 +3,7 @@ from sqlalchemy import (
     Integer,
     String,
     ForeignKey)
+from sqlalchemy.orm import relationship
 from db.engine import Base
 
 
@@ -10,9 +11,21 @@ class Car(Base):
     __tablename__ = "cars"
 
     car_id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    user_id = Column(
+        Integer,
+        ForeignKey("users.user_id"),
+        nullable=False,
+        index=True
+    )
     brand = Column(String(50), nullable=False)
     model = Column(String(50), nullable=False)
     year = Column(Integer, nullable=False)
     plate_number = Column(String(10), unique=True, nullable=False)
     vin = Column(String(17), unique=True, nullable=False)
+
+    user = relationship("Users", back_populates="cars")
+    appointments = relationship(
+        "Appointment",
+        back_populates="car",
+        passive_deletes=True
+    )
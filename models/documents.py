@@ -2,7 +2,8 @@ from sqlalchemy import (
     Column,
     Integer,
     String,
-    ForeignKey
+    ForeignKey,
+    Index
 )
 from db.engine import Base
 
@@ -18,3 +19,7 @@ class Document(Base):
     )
     type = Column(String(50), nullable=False)
     file_path = Column(String(255), nullable=False)
+
+    __table_args__ = (
+        Index("ix_documents_mechanic_id_type", "mechanic_id", "type"),
+    )
@@ -0,0 +1,37 @@
+import enum
+
+from sqlalchemy import Column, Integer, String, DateTime, Enum
+from db.engine import Base
+from utils.dates import utcnow
+
+
+class ExportFormat(enum.Enum):
+    JSONL = "jsonl"
+    CSV = "csv"
+
+
+class ExportStatus(enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    export_id = Column(Integer, primary_key=True, index=True)
+    format = Column(Enum(ExportFormat), nullable=False)
+    status = Column(
+        Enum(ExportStatus),
+        default=ExportStatus.PENDING,
+        nullable=False
+    )
+    date_from = Column(DateTime, nullable=True)
+    date_to = Column(DateTime, nullable=True)
+    file_path = Column(String(255), nullable=True)
+    row_count = Column(Integer, default=0, nullable=False)
+    error = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -5,6 +5,7 @@ from sqlalchemy import (
     Date,
     Enum
 )
+from sqlalchemy.orm import relationship
 from db.engine import Base
 from enum import Enum as PyEnum
 
@@ -28,3 +29,9 @@ class Mechanic(Base):
         default=MechanicRole.MECHANIC
     )
     position = Column(String(100), nullable=False)
+
+    appointments = relationship(
+        "Appointment",
+        back_populates="mechanic",
+        passive_deletes=True
+    )
@@ -2,8 +2,10 @@ from sqlalchemy import (
     Column,
     Integer,
     String,
-    Float
+    Float,
+    UniqueConstraint
 )
+from sqlalchemy.orm import relationship
 from db.engine import Base
 
 
@@ -15,3 +17,13 @@ class Service(Base):
     description = Column(String(255), nullable=True)
     price = Column(Float, nullable=False)
     duration = Column(Integer, nullable=False)
+
+    appointments = relationship(
+        "Appointment",
+        back_populates="service",
+        passive_deletes=True
+    )
+
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_services_name"),
+    )
@@ -0,0 +1,32 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    event
+)
+from db.engine import Base
+
+# Tables whose GET responses carry an ETag built from their version.
+VERSIONED_TABLES = (
+    "appointments",
+    "cars",
+    "documents",
+    "mechanics",
+    "services",
+    "users",
+)
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, default=1, nullable=False)
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def seed_versions(table, connection, **kw):
+    """Start every versioned table at version 1 (see the migration)."""
+    connection.execute(table.insert(), [
+        {"table_name": name, "version": 1} for name in VERSIONED_TABLES
+    ])
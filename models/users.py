@@ -4,6 +4,7 @@ from sqlalchemy import (
     String,
     Enum
 )
+from sqlalchemy.orm import relationship
 from db.engine import Base
 from enum import Enum as PyEnum
 
@@ -26,3 +27,10 @@ class Users(Base):
         default=UserRole.CUSTOMER,
         nullable=False
     )
+
+    cars = relationship("Car", back_populates="user", passive_deletes=True)
+    appointments = relationship(
+        "Appointment",
+        back_populates="user",
+        passive_deletes=True
+    )
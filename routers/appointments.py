@@ -1,38 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import defaultdict
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import ValidationError
+from sqlalchemy import and_, literal, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from datetime import datetime, timezone
-from db.engine import get_async_db
+from sqlalchemy.sql import Select
+from datetime import datetime, timedelta, timezone
+from db.engine import get_async_db, get_async_read_db
 from models.appointments import Appointment, AppointmentStatus
 from models.users import Users
 from models.car import Car
 from models.services import Service
 from models.mechanics import Mechanic
 from schemas.appointments import (
+    AppointmentBulkResult,
     AppointmentCreate,
+    AppointmentPage,
     AppointmentRead,
     AppointmentUpdate
 )
-from utils.email import send_email
+from utils.availability import (
+    MechanicCalendar,
+    availability_index,
+    load_calendars,
+    lock_mechanics,
+)
+from utils.dates import to_naive_utc
+from utils.etag import table_etag
+from utils.outbox import enqueue_email, enqueue_emails
+from utils.pagination import decode_cursor, encode_cursor
+from utils.query_budget import query_budget
 
 router = APIRouter()
 
+CONFIRMATION_SUBJECT = "Appointment Confirmation"
+BULK_MAX_APPOINTMENTS = 500
+# The ORM inserts appointments one row at a time on SQLite and MySQL, on
+# top of a few statements that load the references and calendars.
+BULK_QUERY_BUDGET = BULK_MAX_APPOINTMENTS + 10
+
+
+def build_references_query(
+    user_id: int,
+    car_id: int,
+    service_id: int,
+    mechanic_id: Optional[int],
+) -> Select:
+    """
+    Select the user, car, service and (optionally) mechanic in one row.
+    Each is outer-joined to a single-row anchor, so a missing one comes
+    back as None instead of dropping the row.
+    """
+    entities = [Users, Car, Service]
+    if mechanic_id:
+        entities.append(Mechanic)
+
+    anchor = select(literal(1).label("anchor")).subquery()
+    stmt = (
+        select(*entities)
+        .select_from(anchor)
+        .outerjoin(Users, Users.user_id == user_id)
+        .outerjoin(Car, Car.car_id == car_id)
+        .outerjoin(Service, Service.service_id == service_id)
+    )
+    if mechanic_id:
+        stmt = stmt.outerjoin(Mechanic, Mechanic.mechanic_id == mechanic_id)
+    return stmt
+
+
+async def validate_appointment_references(
+    user_id: int,
+    car_id: int,
+    service_id: int,
+    mechanic_id: Optional[int],
+    db: AsyncSession,
+) -> tuple[Users, Car, Service, Optional[Mechanic]]:
+    """
+    Validate that the user, car, service and mechanic exist and that the
+    car belongs to the user, fetching all of them in one round trip.
+    """
+    stmt = build_references_query(user_id, car_id, service_id, mechanic_id)
+    row = (await db.execute(stmt)).one()
+    user, car, service = row[:3]
+    mechanic = row[3] if mechanic_id else None
 
-async def validate_user(user_id: int, db: AsyncSession):
-    """Validate if a user exists."""
-    stmt = select(Users).where(Users.user_id == user_id)
-    user = (await db.execute(stmt)).scalar_one_or_none()
+    check_appointment_references(
+        user_id, car_id, service_id, mechanic_id, user, car, service, mechanic
+    )
+    return user, car, service, mechanic
+
+
+def check_appointment_references(
+    user_id: int,
+    car_id: int,
+    service_id: int,
+    mechanic_id: Optional[int],
+    user: Optional[Users],
+    car: Optional[Car],
+    service: Optional[Service],
+    mechanic: Optional[Mechanic],
+):
+    """
+    Raise if a referenced row was not found (None) or the car does not
+    belong to the user.
+    """
     if not user:
         raise HTTPException(
             status_code=404, detail=f"User with ID {user_id} not found."
         )
-    return user
-
-
-async def validate_car(car_id: int, user_id: int, db: AsyncSession):
-    """Validate if a car exists and belongs to the user."""
-    stmt = select(Car).where(Car.car_id == car_id)
-    car = (await db.execute(stmt)).scalar_one_or_none()
     if not car:
         raise HTTPException(
             status_code=404,
@@ -43,52 +120,66 @@ async def validate_car(car_id: int, user_id: int, db: AsyncSession):
             detail=f"Car with ID {car_id} does"
             f" not belong to User with ID {user_id}.",
         )
-    return car
-
-
-async def validate_service(service_id: int, db: AsyncSession):
-    """Validate if a service exists."""
-    stmt = select(Service).where(Service.service_id == service_id)
-    service = (await db.execute(stmt)).scalar_one_or_none()
     if not service:
         raise HTTPException(
             status_code=404,
             detail=f"Service with ID {service_id} not found."
         )
-    return service
+    if mechanic_id and not mechanic:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Mechanic with ID {mechanic_id} not found."
+        )
 
 
-async def validate_mechanic(mechanic_id: int, db: AsyncSession):
-    """Validate if a mechanic exists."""
-    stmt = select(Mechanic).where(Mechanic.mechanic_id == mechanic_id)
-    mechanic = (await db.execute(stmt)).scalar_one_or_none()
-    if not mechanic:
+async def get_service_duration(service_id: int, db: AsyncSession) -> int:
+    """Return the duration of a service in minutes."""
+    stmt = select(Service.duration).where(Service.service_id == service_id)
+    duration = (await db.execute(stmt)).scalar_one_or_none()
+    if duration is None:
         raise HTTPException(
             status_code=404,
-            detail=f"Mechanic with ID {mechanic_id} not found."
+            detail=f"Service with ID {service_id} not found."
         )
-    return mechanic
+    return duration
 
 
-@router.post(
-    "/",
-    response_model=AppointmentRead,
-    status_code=status.HTTP_201_CREATED
-)
-async def create_appointment(
-    appointment: AppointmentCreate, db: AsyncSession = Depends(get_async_db)
+async def check_mechanic_availability(
+    mechanic_id: int,
+    appointment_date: datetime,
+    duration: int,
+    db: AsyncSession,
+    appointment_id: Optional[int] = None,
 ):
-    """Create a new appointment with validation."""
-    await validate_user(appointment.user_id, db)
-    await validate_car(appointment.car_id, appointment.user_id, db)
-    await validate_service(appointment.service_id, db)
-    if appointment.mechanic_id:
-        await validate_mechanic(appointment.mechanic_id, db)
+    """
+    Reject a booking that overlaps another appointment of the mechanic.
+    The mechanic's row stays locked until the caller commits, and the
+    overlapping bookings are read from the database, not from the cache,
+    so bookings made by other workers are seen. `appointment_id` is
+    ignored so an appointment can be moved.
+    """
+    start = to_naive_utc(appointment_date)
+    end = start + timedelta(minutes=duration)
+    await lock_mechanics([mechanic_id], db)
+    calendars = await load_calendars([mechanic_id], db, start, end)
+    if not calendars[mechanic_id].is_free(start, end, ignore=appointment_id):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Mechanic with ID {mechanic_id} is already "
+                   f"booked at this time."
+        )
+
+
+def is_active(status) -> bool:
+    """Whether an appointment in `status` occupies the mechanic."""
+    return AppointmentStatus(getattr(status, "value", status)) \
+        != AppointmentStatus.CANCELED
+
 
+def parse_appointment_date(value: str) -> datetime:
+    """Parse an ISO 8601 booking date into naive UTC; it must be future."""
     try:
-        appointment_date = datetime.fromisoformat(
-            appointment.appointment_date.replace("Z", "+00:00")
-        )
+        appointment_date = datetime.fromisoformat(value.replace("Z", "+00:00"))
     except ValueError:
         raise HTTPException(
             status_code=400,
@@ -100,6 +191,48 @@ async def create_appointment(
             status_code=400,
             detail="Appointment date must be in the future."
         )
+    return to_naive_utc(appointment_date)
+
+
+def confirmation_email_body(user: Users, appointment: Appointment) -> str:
+    """Text of the email confirming a new appointment."""
+    appointment_date = appointment.appointment_date
+    return (
+        f"Dear {user.name},\n\n"
+        f"Your appointment has been confirmed:\n"
+        f"Date: {appointment_date.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        f"Service: {appointment.service_id}\n"
+        f"Thank you for choosing our service!"
+    )
+
+
+@router.post(
+    "/",
+    response_model=AppointmentRead,
+    status_code=status.HTTP_201_CREATED
+)
+@query_budget(6)
+async def create_appointment(
+    appointment: AppointmentCreate, db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new appointment with validation."""
+    appointment_date = parse_appointment_date(appointment.appointment_date)
+
+    user, _, service, _ = await validate_appointment_references(
+        appointment.user_id,
+        appointment.car_id,
+        appointment.service_id,
+        appointment.mechanic_id,
+        db,
+    )
+
+    if appointment.mechanic_id and is_active(appointment.status):
+        await check_mechanic_availability(
+            appointment.mechanic_id,
+            appointment_date,
+            service.duration,
+            db
+        )
 
     new_appointment = Appointment(
         user_id=appointment.user_id,
@@ -110,34 +243,268 @@ async def create_appointment(
         status=appointment.status,
     )
     db.add(new_appointment)
+
+    enqueue_email(
+        db,
+        user.email,
+        CONFIRMATION_SUBJECT,
+        confirmation_email_body(user, new_appointment)
+    )
+
     await db.commit()
-    await db.refresh(new_appointment)
-
-    user_stmt = select(Users).where(Users.user_id == appointment.user_id)
-    user = (await db.execute(user_stmt)).scalar_one_or_none()
-    if user:
-        email_body = (
-            f"Dear {user.name},\n\n"
-            f"Your appointment has been confirmed:\n"
-            f"Date: {appointment_date.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"Service: {appointment.service_id}\n"
-            f"Thank you for choosing our service!"
-        )
-        send_email(user.email, "Appointment Confirmation", email_body)
+
+    if new_appointment.mechanic_id and is_active(new_appointment.status):
+        availability_index.record(
+            new_appointment.mechanic_id,
+            new_appointment.appointment_id,
+            appointment_date,
+            service.duration
+        )
     return new_appointment
 
 
-@router.get("/", response_model=list[AppointmentRead])
-async def get_all_appointments(db: AsyncSession = Depends(get_async_db)):
-    """Retrieve all appointments."""
-    stmt = select(Appointment)
-    appointments = (await db.execute(stmt)).scalars().all()
-    return appointments
+async def load_by_ids(model, key, ids: set[int], db: AsyncSession) -> dict:
+    """Fetch the rows of `model` whose `key` column is in `ids`."""
+    if not ids:
+        return {}
+    stmt = select(model).where(key.in_(ids))
+    rows = (await db.execute(stmt)).scalars().all()
+    return {getattr(row, key.key): row for row in rows}
+
+
+@router.post("/bulk", response_model=list[AppointmentBulkResult])
+@query_budget(BULK_QUERY_BUDGET)
+async def create_appointments_bulk(
+    appointments: list[dict],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many appointments in one transaction. Every item is validated
+    on its own, including its schema: invalid ones are reported with the
+    error a single booking would get and the valid ones are created
+    together.
+    """
+    if len(appointments) > BULK_MAX_APPOINTMENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_MAX_APPOINTMENTS} appointments "
+                   f"can be booked at once."
+        )
+
+    results = [
+        AppointmentBulkResult(index=index)
+        for index in range(len(appointments))
+    ]
+    items: dict[int, AppointmentCreate] = {}
+    for index, raw_item in enumerate(appointments):
+        try:
+            items[index] = AppointmentCreate.model_validate(raw_item)
+        except ValidationError as e:
+            results[index].error = e.errors()[0]["msg"]
+
+    users = await load_by_ids(
+        Users, Users.user_id, {item.user_id for item in items.values()}, db
+    )
+    cars = await load_by_ids(
+        Car, Car.car_id, {item.car_id for item in items.values()}, db
+    )
+    services = await load_by_ids(
+        Service,
+        Service.service_id,
+        {item.service_id for item in items.values()},
+        db
+    )
+    mechanics = await load_by_ids(
+        Mechanic,
+        Mechanic.mechanic_id,
+        {item.mechanic_id for item in items.values() if item.mechanic_id},
+        db
+    )
+
+    created: list[tuple[int, Appointment, Users, Service]] = []
+
+    await lock_mechanics(mechanics, db)
+    calendars = await load_calendars(list(mechanics), db)
+    # Bookings accepted earlier in this batch, per mechanic.
+    batch = defaultdict(MechanicCalendar)
+
+    for index, item in items.items():
+        try:
+            appointment_date = parse_appointment_date(
+                item.appointment_date
+            )
+            if item.status not in AppointmentStatus.__members__:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid status '{item.status}'."
+                )
+            check_appointment_references(
+                item.user_id,
+                item.car_id,
+                item.service_id,
+                item.mechanic_id,
+                users.get(item.user_id),
+                cars.get(item.car_id),
+                services.get(item.service_id),
+                mechanics.get(item.mechanic_id),
+            )
+            service = services[item.service_id]
+            if item.mechanic_id and is_active(item.status):
+                end = appointment_date + timedelta(
+                    minutes=service.duration
+                )
+                if not (
+                    calendars[item.mechanic_id].is_free(
+                        appointment_date, end
+                    )
+                    and batch[item.mechanic_id].is_free(
+                        appointment_date, end
+                    )
+                ):
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Mechanic with ID {item.mechanic_id} "
+                               f"is already booked at this time."
+                    )
+                batch[item.mechanic_id].add(index, appointment_date, end)
+        except HTTPException as exc:
+            results[index].error = exc.detail
+            continue
+
+        new_appointment = Appointment(
+            user_id=item.user_id,
+            car_id=item.car_id,
+            service_id=item.service_id,
+            mechanic_id=item.mechanic_id,
+            appointment_date=appointment_date,
+            status=item.status,
+        )
+        created.append(
+            (index, new_appointment, users[item.user_id], service)
+        )
+
+    if not created:
+        return results
+
+    db.add_all([appointment for _, appointment, _, _ in created])
+    await enqueue_emails(db, [
+        (
+            user.email,
+            CONFIRMATION_SUBJECT,
+            confirmation_email_body(user, appointment)
+        )
+        for _, appointment, user, _ in created
+    ])
+    await db.commit()
+
+    for index, appointment, _, service in created:
+        results[index].appointment = AppointmentRead.model_validate(
+            appointment
+        )
+        if appointment.mechanic_id and is_active(appointment.status):
+            availability_index.record(
+                appointment.mechanic_id,
+                appointment.appointment_id,
+                appointment.appointment_date,
+                service.duration
+            )
+    return results
+
+
+def build_appointments_query(
+    user_id: Optional[int] = None,
+    mechanic_id: Optional[int] = None,
+    status: Optional[AppointmentStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    after: Optional[tuple[datetime, int]] = None,
+) -> Select:
+    """
+    Select appointments matching the filters in keyset order, starting
+    after the `(appointment_date, appointment_id)` key `after`.
+    """
+    stmt = select(Appointment).order_by(
+        Appointment.appointment_date, Appointment.appointment_id
+    )
+    if user_id is not None:
+        stmt = stmt.where(Appointment.user_id == user_id)
+    if mechanic_id is not None:
+        stmt = stmt.where(Appointment.mechanic_id == mechanic_id)
+    if status is not None:
+        stmt = stmt.where(Appointment.status == status)
+    if date_from is not None:
+        stmt = stmt.where(
+            Appointment.appointment_date >= to_naive_utc(date_from)
+        )
+    if date_to is not None:
+        stmt = stmt.where(
+            Appointment.appointment_date < to_naive_utc(date_to)
+        )
+    if after is not None:
+        last_date, last_id = after
+        stmt = stmt.where(
+            or_(
+                Appointment.appointment_date > last_date,
+                and_(
+                    Appointment.appointment_date == last_date,
+                    Appointment.appointment_id > last_id,
+                ),
+            )
+        )
+    return stmt
+
+
+@router.get("/", response_model=AppointmentPage)
+@query_budget(1)
+async def get_all_appointments(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    mechanic_id: Optional[int] = None,
+    status: Optional[AppointmentStatus] = None,
+    date_from: Optional[datetime] = Query(
+        None, description="Inclusive lower bound of `appointment_date`."
+    ),
+    date_to: Optional[datetime] = Query(
+        None, description="Exclusive upper bound of `appointment_date`."
+    ),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Retrieve appointments one page at a time, ordered by date and ID.
+    Follow `next_cursor` to walk the full result set.
+    """
+    stmt = build_appointments_query(
+        user_id,
+        mechanic_id,
+        status,
+        date_from,
+        date_to,
+        after=decode_cursor(cursor) if cursor else None,
+    )
+
+    appointments = (
+        await db.execute(stmt.limit(limit + 1))
+    ).scalars().all()
+
+    next_cursor = None
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        last = appointments[-1]
+        next_cursor = encode_cursor(
+            last.appointment_date, last.appointment_id
+        )
+    return AppointmentPage(items=appointments, next_cursor=next_cursor)
 
 
-@router.get("/{appointment_id}", response_model=AppointmentRead)
+@router.get(
+    "/{appointment_id}",
+    response_model=AppointmentRead,
+    dependencies=[Depends(table_etag("appointments"))]
+)
+@query_budget(2)
 async def get_appointment(
-    appointment_id: int, db: AsyncSession = Depends(get_async_db)
+    appointment_id: int, db: AsyncSession = Depends(get_async_read_db)
 ):
     """Retrieve an appointment by ID."""
     stmt = select(Appointment).where(
@@ -163,28 +530,36 @@ async def update_appointment(
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found.")
 
-    if updated_appointment.appointment_date:
-        try:
-            appointment_date = datetime.fromisoformat(
-                updated_appointment.appointment_date.replace("Z", "+00:00")
-            )
-            if appointment_date <= datetime.now(timezone.utc):
-                raise HTTPException(
-                    status_code=400,
-                    detail="Appointment date must be in the future."
-                )
-            updated_appointment.appointment_date = appointment_date
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid date format. Use YYYY-MM-DD format."
-            )
+    changes = updated_appointment.dict(exclude_unset=True)
+    if changes.get("appointment_date"):
+        changes["appointment_date"] = to_naive_utc(
+            changes["appointment_date"]
+        )
+
+    previous_mechanic_id = appointment.mechanic_id
+    mechanic_id = changes.get("mechanic_id", appointment.mechanic_id)
+    service_id = changes.get("service_id", appointment.service_id)
+    appointment_date = changes.get(
+        "appointment_date", appointment.appointment_date
+    )
+    active = is_active(changes.get("status", appointment.status))
+
+    duration = await get_service_duration(service_id, db)
+    if mechanic_id and active:
+        await check_mechanic_availability(
+            mechanic_id, appointment_date, duration, db, appointment_id
+        )
 
-    for key, value in updated_appointment.dict(exclude_unset=True).items():
+    for key, value in changes.items():
         setattr(appointment, key, value)
 
     await db.commit()
-    await db.refresh(appointment)
+
+    availability_index.forget(previous_mechanic_id, appointment_id)
+    if mechanic_id and active:
+        availability_index.record(
+            mechanic_id, appointment_id, appointment_date, duration
+        )
     return appointment
 
 
@@ -202,9 +577,32 @@ async def update_appointment_status(
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found.")
 
+    mechanic_id = appointment.mechanic_id
+    reactivated = not is_active(appointment.status) and is_active(status)
+
+    duration = None
+    if mechanic_id and reactivated:
+        duration = await get_service_duration(appointment.service_id, db)
+        await check_mechanic_availability(
+            mechanic_id,
+            appointment.appointment_date,
+            duration,
+            db,
+            appointment_id
+        )
+
     appointment.status = status
     await db.commit()
-    await db.refresh(appointment)
+
+    if not is_active(status):
+        availability_index.forget(mechanic_id, appointment_id)
+    elif duration is not None:
+        availability_index.record(
+            mechanic_id,
+            appointment_id,
+            appointment.appointment_date,
+            duration
+        )
     return appointment
 
 
@@ -222,5 +620,6 @@ async def delete_appointment(
 
     await db.delete(appointment)
     await db.commit()
+    availability_index.forget(appointment.mechanic_id, appointment_id)
     return {"message": f"Appointment with ID"
                        f" {appointment_id} has been deleted."}
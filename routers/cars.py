@@ -6,59 +6,38 @@ from fastapi import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from db.engine import get_async_db
+from db.engine import get_async_db, get_async_read_db
 from models.car import Car
 from schemas.car import (
     CarCreate,
     CarRead,
     CarUpdate
 )
+from utils.etag import table_etag
+from utils.integrity import commit_or_conflict
+from utils.query_budget import query_budget
 
 router = APIRouter()
 
 
-async def validate_car_uniqueness(
-        car_data: dict,
-        db: AsyncSession,
-        car_id: int = None
-):
-    """Validate that the car's plate number and VIN are unique."""
-    stmt = select(Car).where(Car.plate_number == car_data["plate_number"])
-    if car_id:
-        stmt = stmt.where(Car.car_id != car_id)
-    result = await db.execute(stmt)
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=400,
-            detail="Car with this plate number already exists."
-        )
-
-    stmt = select(Car).where(Car.vin == car_data["vin"])
-    if car_id:
-        stmt = stmt.where(Car.car_id != car_id)
-    result = await db.execute(stmt)
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=400,
-            detail="Car with this VIN already exists."
-        )
+CAR_UNIQUE_MESSAGES = {
+    "plate_number": "Car with this plate number already exists.",
+    "vin": "Car with this VIN already exists.",
+}
 
 
 @router.post("/", response_model=CarRead, status_code=status.HTTP_201_CREATED)
 async def create_car(car: CarCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new car."""
-    car_data = car.dict()
-    await validate_car_uniqueness(car_data, db)
-
-    new_car = Car(**car_data)
+    new_car = Car(**car.dict())
     db.add(new_car)
-    await db.commit()
-    await db.refresh(new_car)
+    await commit_or_conflict(db, CAR_UNIQUE_MESSAGES)
     return new_car
 
 
 @router.get("/", response_model=list[CarRead])
-async def get_all_cars(db: AsyncSession = Depends(get_async_db)):
+@query_budget(1)
+async def get_all_cars(db: AsyncSession = Depends(get_async_read_db)):
     """Retrieve all cars."""
     stmt = select(Car)
     cars = (await db.execute(stmt)).scalars().all()
@@ -67,8 +46,13 @@ async def get_all_cars(db: AsyncSession = Depends(get_async_db)):
     return cars
 
 
-@router.get("/{car_id}", response_model=CarRead)
-async def get_car(car_id: int, db: AsyncSession = Depends(get_async_db)):
+@router.get(
+    "/{car_id}",
+    response_model=CarRead,
+    dependencies=[Depends(table_etag("cars"))]
+)
+@query_budget(2)
+async def get_car(car_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Retrieve a car by ID."""
     stmt = select(Car).where(Car.car_id == car_id)
     car = (await db.execute(stmt)).scalar_one_or_none()
@@ -89,15 +73,10 @@ async def update_car(
     if not car:
         raise HTTPException(status_code=404, detail="Car not found.")
 
-    updated_car_data = updated_car.dict(exclude_unset=True)
-    if "plate_number" in updated_car_data or "vin" in updated_car_data:
-        await validate_car_uniqueness(updated_car_data, db, car_id=car_id)
-
-    for key, value in updated_car_data.items():
+    for key, value in updated_car.dict(exclude_unset=True).items():
         setattr(car, key, value)
 
-    await db.commit()
-    await db.refresh(car)
+    await commit_or_conflict(db, CAR_UNIQUE_MESSAGES)
     return car
 
 
@@ -9,10 +9,12 @@ from fastapi import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from db.engine import get_async_db
+from db.engine import get_async_db, get_async_read_db
 from models.documents import Document
 from models.mechanics import Mechanic
 from schemas.documents import DocumentRead
+from utils.etag import table_etag
+from utils.query_budget import query_budget
 import os
 import aiofiles
 
@@ -78,12 +80,12 @@ async def create_document_with_file(
     )
     db.add(new_document)
     await db.commit()
-    await db.refresh(new_document)
     return new_document
 
 
 @router.get("/", response_model=list[DocumentRead])
-async def get_all_documents(db: AsyncSession = Depends(get_async_db)):
+@query_budget(1)
+async def get_all_documents(db: AsyncSession = Depends(get_async_read_db)):
     """Retrieve all documents."""
     stmt = select(Document)
     documents = (await db.execute(stmt)).scalars().all()
@@ -92,10 +94,15 @@ async def get_all_documents(db: AsyncSession = Depends(get_async_db)):
     return documents
 
 
-@router.get("/{document_id}", response_model=DocumentRead)
+@router.get(
+    "/{document_id}",
+    response_model=DocumentRead,
+    dependencies=[Depends(table_etag("documents"))]
+)
+@query_budget(2)
 async def get_document(
         document_id: int,
-        db: AsyncSession = Depends(get_async_db)
+        db: AsyncSession = Depends(get_async_read_db)
 ):
     """Retrieve a document by ID."""
     stmt = select(Document).where(Document.document_id == document_id)
@@ -149,7 +156,6 @@ async def update_document(
     document.file_path = file_path
 
     await db.commit()
-    await db.refresh(document)
     return document
 
 
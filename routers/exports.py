@@ -0,0 +1,86 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.engine import get_async_db, get_async_read_db
+from models.export_jobs import ExportFormat, ExportJob, ExportStatus
+from schemas.exports import ExportCreate, ExportRead
+from utils.dates import to_naive_utc
+from utils.exports import get_export_runner
+from utils.query_budget import query_budget
+
+router = APIRouter()
+
+
+def to_read(job: ExportJob) -> ExportRead:
+    """Export job with a download link once its file is ready."""
+    export = ExportRead.model_validate(job)
+    if job.status == ExportStatus.COMPLETED:
+        export.download_url = f"/exports/{job.export_id}/download"
+    return export
+
+
+async def get_export_job(export_id: int, db: AsyncSession) -> ExportJob:
+    """Retrieve an export job or raise 404."""
+    job = await db.get(ExportJob, export_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export not found.")
+    return job
+
+
+@router.post(
+    "/appointments",
+    response_model=ExportRead,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def create_appointments_export(
+    export: ExportCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start exporting appointments to a gzip-compressed JSONL or CSV file.
+    Poll `GET /exports/{export_id}` until it is completed.
+    """
+    job = ExportJob(format=ExportFormat(export.format.value))
+    if export.date_from:
+        job.date_from = to_naive_utc(export.date_from)
+    if export.date_to:
+        job.date_to = to_naive_utc(export.date_to)
+    db.add(job)
+    await db.commit()
+
+    # The export runs in the runner's own task, not in this request.
+    get_export_runner().wake()
+    return to_read(job)
+
+
+@router.get("/{export_id}", response_model=ExportRead)
+@query_budget(1)
+async def get_export(
+        export_id: int,
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """Retrieve the state of an export job."""
+    return to_read(await get_export_job(export_id, db))
+
+
+@router.get("/{export_id}/download")
+@query_budget(1)
+async def download_export(
+        export_id: int,
+        db: AsyncSession = Depends(get_async_read_db)
+):
+    """Download the compressed file of a completed export."""
+    job = await get_export_job(export_id, db)
+    if job.status != ExportStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="Export is not ready.")
+    if not os.path.exists(job.file_path):
+        raise HTTPException(
+            status_code=404, detail="Export file no longer exists."
+        )
+    return FileResponse(
+        job.file_path,
+        media_type="application/gzip",
+        filename=os.path.basename(job.file_path),
+    )
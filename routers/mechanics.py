@@ -4,32 +4,39 @@ from fastapi import (
     HTTPException,
     status
 )
+from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from passlib.hash import argon2
-from db.engine import get_async_db
-from models import Car, Service
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql import Select
+from db.engine import get_async_db, get_async_read_db
 from models.mechanics import Mechanic
 from models.appointments import Appointment
 from schemas.mechanics import (
+    FreeSlotRead,
     MechanicCreate,
     MechanicRead,
     MechanicUpdate
 )
-from schemas.appointments import AppointmentRead
+from schemas.appointments import AppointmentDetailRead
+from utils.availability import availability_index, working_hours
+from utils.dates import utcnow
+from utils.etag import table_etag
+from utils.hashing import get_hasher
+from utils.integrity import commit_or_conflict
+from utils.query_budget import query_budget
 
 router = APIRouter()
 
 
-async def is_login_unique(login: str, db: AsyncSession) -> bool:
-    """Check if a mechanic login is unique."""
-    stmt = select(Mechanic).where(Mechanic.login == login)
-    result = await db.execute(stmt)
-    return result.scalar_one_or_none() is None
+LOGIN_CONFLICT_MESSAGES = {
+    "login": "Mechanic with this login already exists.",
+}
 
 
 @router.get("/", response_model=list[MechanicRead])
-async def get_all_mechanics(db: AsyncSession = Depends(get_async_db)):
+@query_budget(1)
+async def get_all_mechanics(db: AsyncSession = Depends(get_async_read_db)):
     """Retrieve all mechanics."""
     stmt = select(Mechanic)
     mechanics = (await db.execute(stmt)).scalars().all()
@@ -38,10 +45,15 @@ async def get_all_mechanics(db: AsyncSession = Depends(get_async_db)):
     return mechanics
 
 
-@router.get("/{mechanic_id}", response_model=MechanicRead)
+@router.get(
+    "/{mechanic_id}",
+    response_model=MechanicRead,
+    dependencies=[Depends(table_etag("mechanics"))]
+)
+@query_budget(2)
 async def get_mechanic(
         mechanic_id: int,
-        db: AsyncSession = Depends(get_async_db)
+        db: AsyncSession = Depends(get_async_read_db)
 ):
     """Retrieve a mechanic by ID."""
     stmt = select(Mechanic).where(Mechanic.mechanic_id == mechanic_id)
@@ -60,12 +72,7 @@ async def create_mechanic(
     mechanic: MechanicCreate, db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new mechanic."""
-    if not await is_login_unique(mechanic.login, db):
-        raise HTTPException(
-            status_code=400, detail="Mechanic with this login already exists."
-        )
-
-    hashed_password = argon2.hash(mechanic.password)
+    hashed_password = await get_hasher().hash(mechanic.password)
     new_mechanic = Mechanic(
         name=mechanic.name,
         birth_date=mechanic.birth_date,
@@ -75,8 +82,7 @@ async def create_mechanic(
         position=mechanic.position,
     )
     db.add(new_mechanic)
-    await db.commit()
-    await db.refresh(new_mechanic)
+    await commit_or_conflict(db, LOGIN_CONFLICT_MESSAGES)
     return new_mechanic
 
 
@@ -93,21 +99,15 @@ async def update_mechanic(
     if not mechanic:
         raise HTTPException(status_code=404, detail="Mechanic not found.")
 
-    if updated_mechanic.login and updated_mechanic.login != mechanic.login:
-        if not await is_login_unique(updated_mechanic.login, db):
-            raise HTTPException(
-                status_code=400,
-                detail="Mechanic with this login already exists."
-            )
-
     if updated_mechanic.password:
-        updated_mechanic.password = argon2.hash(updated_mechanic.password)
+        updated_mechanic.password = await get_hasher().hash(
+            updated_mechanic.password
+        )
 
     for key, value in updated_mechanic.dict(exclude_unset=True).items():
         setattr(mechanic, key, value)
 
-    await db.commit()
-    await db.refresh(mechanic)
+    await commit_or_conflict(db, LOGIN_CONFLICT_MESSAGES)
     return mechanic
 
 
@@ -128,12 +128,26 @@ async def delete_mechanic(
     return {"message": f"Mechanic with ID {mechanic_id} has been deleted."}
 
 
+def build_mechanic_appointments_query(mechanic_id: int) -> Select:
+    """Select a mechanic's appointments with their car and service."""
+    return (
+        select(Appointment)
+        .where(Appointment.mechanic_id == mechanic_id)
+        .options(
+            joinedload(Appointment.car),
+            joinedload(Appointment.service)
+        )
+        .order_by(Appointment.appointment_date, Appointment.appointment_id)
+    )
+
+
 @router.get(
     "/{mechanic_id}/appointments",
-    response_model=list[AppointmentRead]
+    response_model=list[AppointmentDetailRead]
 )
+@query_budget(2)
 async def get_mechanic_appointments(
-    mechanic_id: int, db: AsyncSession = Depends(get_async_db)
+    mechanic_id: int, db: AsyncSession = Depends(get_async_read_db)
 ):
     """Retrieve all appointments assigned to a specific mechanic."""
     stmt = select(Mechanic).where(Mechanic.mechanic_id == mechanic_id)
@@ -141,23 +155,38 @@ async def get_mechanic_appointments(
     if not mechanic:
         raise HTTPException(status_code=404, detail="Mechanic not found.")
 
-    appointments_stmt = select(Appointment).where(
-        Appointment.mechanic_id == mechanic_id
-    )
+    appointments_stmt = build_mechanic_appointments_query(mechanic_id)
     appointments = (await db.execute(appointments_stmt)).scalars().all()
     if not appointments:
         raise HTTPException(
             status_code=404, detail="No appointments found for this mechanic."
         )
+    return appointments
 
-    for appointment in appointments:
-        car_stmt = select(Car).where(Car.car_id == appointment.car_id)
-        service_stmt = select(Service).where(
-            Service.service_id == appointment.service_id
-        )
-        appointment.car = (await db.execute(car_stmt)).scalar_one_or_none()
-        appointment.service = (
-            await db.execute(service_stmt)
-        ).scalar_one_or_none()
 
-    return appointments
+@router.get(
+    "/{mechanic_id}/free-slots",
+    response_model=list[FreeSlotRead]
+)
+@query_budget(2)
+async def get_mechanic_free_slots(
+    mechanic_id: int,
+    day: date,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List the unbooked intervals of a mechanic's working day (UTC)."""
+    stmt = select(Mechanic).where(Mechanic.mechanic_id == mechanic_id)
+    mechanic = (await db.execute(stmt)).scalar_one_or_none()
+    if not mechanic:
+        raise HTTPException(status_code=404, detail="Mechanic not found.")
+
+    day_start, day_end = working_hours(day)
+    day_start = max(day_start, utcnow())
+    if day_start >= day_end:
+        return []
+
+    calendar = await availability_index.calendar(mechanic_id, db)
+    return [
+        FreeSlotRead(start=start, end=end)
+        for start, end in calendar.free_slots(day_start, day_end)
+    ]
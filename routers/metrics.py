@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils.metrics import METRICS_DIR, registry
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Current metrics in the Prometheus text exposition format, of all
+    workers when they share `METRICS_DIR`.
+    """
+    return PlainTextResponse(
+        registry.render_all(METRICS_DIR), media_type=PROMETHEUS_CONTENT_TYPE
+    )
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from db.engine import get_async_db
+from db.engine import get_async_db, get_async_read_db
 from models.services import Service
 from schemas.services import (
     ServiceCreate,
     ServiceRead,
+    ServiceSlotRead,
     ServiceUpdate
 )
+from utils.availability import availability_index, next_free_slots
+from utils.dates import to_naive_utc, utcnow
+from utils.etag import table_etag
+from utils.integrity import commit_or_conflict
+from utils.query_budget import query_budget
 
 router = APIRouter()
 
@@ -24,6 +33,12 @@ async def get_service_by_id(service_id: int, db: AsyncSession) -> Service:
     return service
 
 
+def name_conflict_messages(name: str) -> dict[str, str]:
+    """Messages for a violation of the unique service name."""
+    message = f"A service with the name '{name}' already exists."
+    return {"name": message, "uq_services_name": message}
+
+
 @router.post(
     "/",
     response_model=ServiceRead,
@@ -33,25 +48,21 @@ async def create_service(
     service: ServiceCreate, db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Create a new service. Checks for duplicate service names.
+    Create a new service. Service names are unique.
     """
-    stmt = select(Service).where(Service.name == service.name)
-    existing_service = (await db.execute(stmt)).scalar_one_or_none()
-    if existing_service:
-        raise HTTPException(
-            status_code=400,
-            detail=f"A service with the name '{service.name}' already exists.",
-        )
-
     new_service = Service(**service.dict())
     db.add(new_service)
-    await db.commit()
-    await db.refresh(new_service)
+    await commit_or_conflict(db, name_conflict_messages(service.name))
     return new_service
 
 
-@router.get("/", response_model=list[ServiceRead])
-async def get_all_services(db: AsyncSession = Depends(get_async_db)):
+@router.get(
+    "/",
+    response_model=list[ServiceRead],
+    dependencies=[Depends(table_etag("services"))]
+)
+@query_budget(2)
+async def get_all_services(db: AsyncSession = Depends(get_async_read_db)):
     """
     Retrieve all services.
     """
@@ -62,10 +73,15 @@ async def get_all_services(db: AsyncSession = Depends(get_async_db)):
     return services
 
 
-@router.get("/{service_id}", response_model=ServiceRead)
+@router.get(
+    "/{service_id}",
+    response_model=ServiceRead,
+    dependencies=[Depends(table_etag("services"))]
+)
+@query_budget(2)
 async def get_service(
         service_id: int,
-        db: AsyncSession = Depends(get_async_db)
+        db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Retrieve a service by ID.
@@ -73,6 +89,38 @@ async def get_service(
     return await get_service_by_id(service_id, db)
 
 
+@router.get(
+    "/{service_id}/next-slots",
+    response_model=list[ServiceSlotRead]
+)
+# The service, then the mechanics and their calendars when not cached.
+@query_budget(3)
+async def get_next_slots(
+        service_id: int,
+        count: int = Query(5, ge=1, le=50),
+        after: Optional[datetime] = Query(
+            None, description="Search from this time instead of now."
+        ),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Find the earliest slots, across all mechanics, in which the service
+    fits into working hours between existing bookings. Times are UTC.
+    """
+    service = await get_service_by_id(service_id, db)
+    search_from = utcnow()
+    if after is not None:
+        search_from = max(search_from, to_naive_utc(after))
+
+    calendars = await availability_index.all_calendars(db)
+    return [
+        ServiceSlotRead(mechanic_id=mechanic_id, start=start, end=end)
+        for mechanic_id, start, end in next_free_slots(
+            calendars, service.duration, search_from, count
+        )
+    ]
+
+
 @router.put("/{service_id}", response_model=ServiceRead)
 async def update_service(
     service_id: int,
@@ -84,21 +132,10 @@ async def update_service(
     """
     service = await get_service_by_id(service_id, db)
 
-    if updated_service.name and updated_service.name != service.name:
-        stmt = select(Service).where(Service.name == updated_service.name)
-        existing_service = (await db.execute(stmt)).scalar_one_or_none()
-        if existing_service:
-            raise HTTPException(
-                status_code=400,
-                detail=f"A service with the name "
-                       f"'{updated_service.name}' already exists.",
-            )
-
     for key, value in updated_service.dict(exclude_unset=True).items():
         setattr(service, key, value)
 
-    await db.commit()
-    await db.refresh(service)
+    await commit_or_conflict(db, name_conflict_messages(service.name))
     return service
 
 
@@ -1,3 +1,7 @@
+import hashlib
+import math
+from typing import Optional
+
 import jwt
 
 from fastapi import (
@@ -7,27 +11,51 @@ from fastapi import (
     status
 )
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from passlib.hash import argon2
 from datetime import (
     datetime,
     timedelta,
     timezone
 )
 
-from db.engine import get_async_db
+from db.engine import get_async_db, get_async_read_db
+from db.versions import table_versions
 from models.users import Users
 from schemas.users import (
     UserCreate,
+    UserImportResult,
     UserRead,
     UserUpdate
 )
+from utils.cache import principal_cache, token_cache
+from utils.etag import table_etag
+from utils.hashing import get_hasher, needs_rehash
+from utils.integrity import commit_or_conflict, violated_unique_key
+from utils.query_budget import query_budget
 
 
 SECRET_KEY = "your_secret_key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+USER_IMPORT_MAX_ROWS = 5000
+USER_IMPORT_CHUNK_SIZE = 500
+# One uniqueness check, then a savepoint, an INSERT and a release per
+# chunk, one read-back of the created users and the table version bump
+# on commit. Retrying a chunk row by row after a race goes over the
+# budget.
+USER_IMPORT_QUERY_BUDGET = 3 + 3 * math.ceil(
+    USER_IMPORT_MAX_ROWS / USER_IMPORT_CHUNK_SIZE
+)
+USER_UNIQUE_MESSAGES = {
+    "email": "Email already exists.",
+    "ix_users_email": "Email already exists.",
+    "name": "Name already exists.",
+    "ix_users_name": "Name already exists.",
+}
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -54,12 +82,33 @@ async def get_user_by_id(user_id: int, db: AsyncSession) -> Users:
     return user
 
 
-async def validate_user_email_uniqueness(email: str, db: AsyncSession):
+def decode_token(token: str) -> int:
     """
-    Check if a user with the given email already exists.
+    Return the user ID of a valid JWT. Verified tokens are remembered by
+    their hash until they expire, so each is only verified once.
     """
-    if await get_user_by_email(email, db):
-        raise HTTPException(status_code=400, detail="Email already exists.")
+    key = hashlib.sha256(token.encode()).digest()
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        return user_id
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user_id = payload.get("user_id")
+    if user_id is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid authentication token."
+        )
+    token_cache.set(key, user_id, expires_at=payload.get("exp"))
+    return user_id
+
+
+def detached_copy(user: Users) -> Users:
+    """A session-independent copy of the user's columns for caching."""
+    return Users(**{
+        column.key: getattr(user, column.key)
+        for column in Users.__table__.columns
+    })
 
 
 async def get_current_user(
@@ -70,14 +119,7 @@ async def get_current_user(
     Get the currently authenticated user from the JWT token.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")
-        if user_id is None:
-            raise HTTPException(
-                status_code=401,
-                detail="Invalid authentication token."
-            )
-        return await get_user_by_id(user_id, db)
+        user_id = decode_token(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired.")
     except jwt.InvalidTokenError:
@@ -86,6 +128,17 @@ async def get_current_user(
             detail="Invalid authentication token."
         )
 
+    if principal_cache.needs_check():
+        # Read before any user is loaded, so a write in between empties
+        # the cache on the next check rather than being missed.
+        versions = await table_versions(db, ["users"])
+        principal_cache.check(versions and versions["users"])
+    user = principal_cache.get(user_id)
+    if user is None:
+        user = detached_copy(await get_user_by_id(user_id, db))
+        principal_cache.set(user_id, user)
+    return user
+
 
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def create_user(
@@ -95,9 +148,7 @@ async def create_user(
     """
     Create a new user in the database.
     """
-    await validate_user_email_uniqueness(user.email, db)
-
-    hashed_password = argon2.hash(user.password)
+    hashed_password = await get_hasher().hash(user.password)
     new_user = Users(
         name=user.name,
         email=user.email,
@@ -105,12 +156,158 @@ async def create_user(
         role=user.role.value,
     )
     db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
+    await commit_or_conflict(db, USER_UNIQUE_MESSAGES)
     return new_user
 
 
+async def get_taken_emails_and_names(
+    emails: set[str],
+    names: set[str],
+    db: AsyncSession
+) -> tuple[set[str], set[str]]:
+    """Return which of the emails and names are already in use."""
+    stmt = select(Users.email, Users.name).where(
+        or_(Users.email.in_(emails), Users.name.in_(names))
+    )
+    rows = (await db.execute(stmt)).all()
+    return {row.email for row in rows}, {row.name for row in rows}
+
+
+async def insert_user_rows(
+    rows: list[dict],
+    db: AsyncSession
+) -> list[Optional[str]]:
+    """
+    Insert a chunk of user rows in one statement inside a savepoint. If a
+    concurrent writer took an email or name meanwhile, retry the rows one
+    by one so only the conflicting ones fail. Returns the error of each
+    row, None for inserted ones.
+    """
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(Users), rows)
+        return [None] * len(rows)
+    except IntegrityError:
+        pass
+
+    errors = []
+    for row in rows:
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(Users), [row])
+            errors.append(None)
+        except IntegrityError as e:
+            errors.append(USER_UNIQUE_MESSAGES.get(
+                violated_unique_key(e), "Email or name already exists."
+            ))
+    return errors
+
+
+async def import_users(
+    users: list[UserCreate],
+    db: AsyncSession,
+    chunk_size: Optional[int] = None
+) -> list[UserImportResult]:
+    """
+    Create many users in one transaction. Uniqueness of the whole batch is
+    checked with one query, then rows are hashed and inserted `chunk_size`
+    at a time. Hashing uses a share of the pool (`IMPORT_HASH_WORKERS`)
+    so logins keep being served during a large import. Invalid rows are
+    reported per item without aborting the rest.
+    """
+    chunk_size = chunk_size or USER_IMPORT_CHUNK_SIZE
+    results = [UserImportResult(index=index) for index in range(len(users))]
+    taken_emails, taken_names = await get_taken_emails_and_names(
+        {user.email for user in users}, {user.name for user in users}, db
+    )
+
+    accepted = []
+    for index, user in enumerate(users):
+        if user.email in taken_emails:
+            results[index].error = USER_UNIQUE_MESSAGES["email"]
+        elif user.name in taken_names:
+            results[index].error = USER_UNIQUE_MESSAGES["name"]
+        else:
+            # Later duplicates within the batch are rejected too.
+            taken_emails.add(user.email)
+            taken_names.add(user.name)
+            accepted.append(index)
+
+    inserted = []
+    for start in range(0, len(accepted), chunk_size):
+        indexes = accepted[start:start + chunk_size]
+        hashed_passwords = await get_hasher().hash_many(
+            [users[index].password for index in indexes]
+        )
+        chunk = [
+            {
+                "name": users[index].name,
+                "email": users[index].email,
+                "password": hashed_password,
+                "role": users[index].role.value,
+            }
+            for index, hashed_password in zip(indexes, hashed_passwords)
+        ]
+        errors = await insert_user_rows(chunk, db)
+        for index, error in zip(indexes, errors):
+            if error:
+                results[index].error = error
+            else:
+                inserted.append(index)
+
+    # Not every driver returns the ids of a multi-row INSERT, so the
+    # created users are read back once for the whole batch.
+    if inserted:
+        stmt = select(Users).where(
+            Users.email.in_([users[index].email for index in inserted])
+        )
+        created = {
+            user.email: user for user in (await db.execute(stmt)).scalars()
+        }
+        for index in inserted:
+            results[index].user = UserRead.model_validate(
+                created[users[index].email]
+            )
+
+    await db.commit()
+    return results
+
+
+@router.post("/bulk", response_model=list[UserImportResult])
+@query_budget(USER_IMPORT_QUERY_BUDGET)
+async def create_users_bulk(
+        users: list[dict],
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many users at once, reporting the outcome of every row. Rows
+    are validated one by one, so an invalid row fails alone.
+    """
+    if len(users) > USER_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {USER_IMPORT_MAX_ROWS} users "
+                   f"can be created at once."
+        )
+
+    results = [UserImportResult(index=index) for index in range(len(users))]
+    valid_users, valid_indexes = [], []
+    for index, row in enumerate(users):
+        try:
+            valid_users.append(UserCreate.model_validate(row))
+            valid_indexes.append(index)
+        except ValidationError as e:
+            results[index].error = e.errors()[0]["msg"]
+
+    if valid_users:
+        for result in await import_users(valid_users, db):
+            result.index = valid_indexes[result.index]
+            results[result.index] = result
+    return results
+
+
 @router.post("/auth/login")
+@query_budget(3)
 async def login_user(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_async_db),
@@ -119,12 +316,20 @@ async def login_user(
     Authenticate a user and generate a JWT token.
     """
     user = await get_user_by_email(form_data.username, db)
-    if not user or not argon2.verify(form_data.password, user.password):
+    if not user or not await get_hasher().verify(
+            form_data.password, user.password
+    ):
         raise HTTPException(
             status_code=401,
             detail="Invalid email or password."
         )
 
+    if needs_rehash(user.password):
+        # The password is at hand, so move the hash to the current policy.
+        user.password = await get_hasher().hash(form_data.password)
+        await db.commit()
+        principal_cache.pop(user.user_id)
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = jwt.encode(
         {
@@ -146,7 +351,8 @@ async def get_user_profile(current_user: Users = Depends(get_current_user)):
 
 
 @router.get("/", response_model=list[UserRead])
-async def get_all_users(db: AsyncSession = Depends(get_async_db)):
+@query_budget(1)
+async def get_all_users(db: AsyncSession = Depends(get_async_read_db)):
     """
     Retrieve all users from the database.
     """
@@ -155,8 +361,16 @@ async def get_all_users(db: AsyncSession = Depends(get_async_db)):
     return result.scalars().all()
 
 
-@router.get("/{user_id}", response_model=UserRead)
-async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+@router.get(
+    "/{user_id}",
+    response_model=UserRead,
+    dependencies=[Depends(table_etag("users"))]
+)
+@query_budget(2)
+async def get_user(
+        user_id: int,
+        db: AsyncSession = Depends(get_async_read_db)
+):
     """
     Retrieve a user by their ID.
     """
@@ -173,17 +387,17 @@ async def update_user(
     Update a user's details in the database.
     """
     user = await get_user_by_id(user_id, db)
-    if updated_user.email and updated_user.email != user.email:
-        await validate_user_email_uniqueness(updated_user.email, db)
 
     if updated_user.password:
-        updated_user.password = argon2.hash(updated_user.password)
+        updated_user.password = await get_hasher().hash(
+            updated_user.password
+        )
 
     for key, value in updated_user.dict(exclude_unset=True).items():
         setattr(user, key, value)
 
-    await db.commit()
-    await db.refresh(user)
+    await commit_or_conflict(db, USER_UNIQUE_MESSAGES)
+    principal_cache.pop(user_id)
     return user
 
 
@@ -195,4 +409,5 @@ async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
     user = await get_user_by_id(user_id, db)
     await db.delete(user)
     await db.commit()
+    principal_cache.pop(user_id)
     return {"message": f"User with ID {user_id} has been deleted."}
@@ -1,8 +1,11 @@
 from enum import Enum
 from typing import Optional
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime, timezone
 
+from schemas.car import CarRead
+from schemas.services import ServiceRead
+
 
 class AppointmentStatus(str, Enum):
     PENDING = "PENDING"
@@ -54,6 +57,29 @@ class AppointmentRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class AppointmentDetailRead(AppointmentRead):
+    """Schema for reading an appointment with its car and service."""
+    car: CarRead
+    service: ServiceRead
+
+
+class AppointmentPage(BaseModel):
+    """A page of appointments ordered by date, then ID."""
+    items: list[AppointmentRead]
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Pass as `cursor` to fetch the next page; "
+                    "null on the last page."
+    )
+
+
+class AppointmentBulkResult(BaseModel):
+    """Outcome of one item of a bulk booking, in request order."""
+    index: int
+    appointment: Optional[AppointmentRead] = None
+    error: Optional[str] = None
+
+
 class AppointmentUpdate(BaseModel):
     """Schema for updating an appointment."""
     user_id: Optional[int] = None
@@ -63,10 +89,11 @@ class AppointmentUpdate(BaseModel):
     appointment_date: Optional[datetime] = None
     status: Optional[AppointmentStatus] = None
 
-    @model_validator(mode="before")
+    @field_validator("appointment_date")
     @classmethod
-    def validate_date(cls, values):
-        appointment_date = values.get("appointment_date")
-        if appointment_date and appointment_date <= datetime.now():
+    def validate_date(cls, appointment_date):
+        """Ensure the new appointment date is not in the past."""
+        if appointment_date and \
+                appointment_date <= datetime.now(appointment_date.tzinfo):
             raise ValueError("Appointment date must be in the future.")
-        return values
+        return appointment_date
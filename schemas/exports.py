@@ -0,0 +1,44 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ExportFormat(str, Enum):
+    JSONL = "jsonl"
+    CSV = "csv"
+
+
+class ExportStatus(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class ExportCreate(BaseModel):
+    """Schema for requesting an export of appointments."""
+    format: ExportFormat = ExportFormat.JSONL
+    date_from: Optional[datetime] = Field(
+        None, description="Only appointments on or after this date."
+    )
+    date_to: Optional[datetime] = Field(
+        None, description="Only appointments before this date."
+    )
+
+
+class ExportRead(BaseModel):
+    """Schema for reading the state of an export job."""
+    export_id: int
+    format: ExportFormat
+    status: ExportStatus
+    date_from: Optional[datetime]
+    date_to: Optional[datetime]
+    row_count: int
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+    download_url: Optional[str] = None
+
+    model_config = {"from_attributes": True}
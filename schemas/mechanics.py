@@ -96,3 +96,9 @@ class MechanicRead(BaseModel):
 class MechanicUpdate(MechanicBase):
     """Schema for updating mechanic details."""
     pass
+
+
+class FreeSlotRead(BaseModel):
+    """Schema for a free interval in a mechanic's working day."""
+    start: datetime
+    end: datetime
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import Optional
 
@@ -38,3 +39,10 @@ class ServiceUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=255)
     price: Optional[float] = Field(None, gt=0)
     duration: Optional[int] = Field(None, gt=0)
+
+
+class ServiceSlotRead(BaseModel):
+    """Schema for a free slot in which a mechanic can perform a service."""
+    mechanic_id: int
+    start: datetime
+    end: datetime
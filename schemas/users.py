@@ -39,6 +39,13 @@ class UserRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class UserImportResult(BaseModel):
+    """Outcome of one row of a bulk user import, in request order."""
+    index: int
+    user: Optional[UserRead] = None
+    error: Optional[str] = None
+
+
 class UserUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=2, max_length=50)
     email: Optional[EmailStr]
@@ -0,0 +1,105 @@
+"""
+Run the API in production: several worker processes, uvloop and
+httptools when they are installed, and a graceful shutdown that lets
+in-flight requests and the email outbox batch finish:
+
+    python serve.py --workers 4
+
+Each worker warms up its connection pool and the availability index
+before it accepts requests (see `utils/warmup.py`). The CPUs are shared
+out between the workers' password hashing pools, and the workers share
+their metrics through `METRICS_DIR` so any of them answers `/metrics`
+for all.
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import uvicorn
+from dotenv import load_dotenv
+
+from utils.metrics import is_snapshot
+
+load_dotenv()
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", 30))
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", 5))
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def share_out_workers(workers: int) -> Optional[str]:
+    """
+    Set up the environment the workers read at start-up. Every worker has
+    its own hashing pool, so unless `HASH_WORKERS` is set they get an
+    equal share of the CPUs rather than one process per CPU each. Returns
+    the metrics directory if one was created for this run.
+    """
+    os.environ.setdefault(
+        "HASH_WORKERS", str(max((os.cpu_count() or 1) // workers, 1))
+    )
+    if workers < 2:
+        return None
+    metrics_dir = os.environ.get("METRICS_DIR")
+    if metrics_dir:
+        # Snapshots of an earlier run would be added to this one's.
+        for name in os.listdir(metrics_dir):
+            if is_snapshot(name.removesuffix(".tmp")):
+                os.remove(os.path.join(metrics_dir, name))
+        return None
+    metrics_dir = tempfile.mkdtemp(prefix="metrics-")
+    os.environ["METRICS_DIR"] = metrics_dir
+    return metrics_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument(
+        "--no-access-log",
+        action="store_true",
+        help="Skip the per-request log line, e.g. behind a proxy that "
+             "logs requests already."
+    )
+    args = parser.parse_args()
+    created_dir = share_out_workers(args.workers)
+
+    loop = "uvloop" if installed("uvloop") else "asyncio"
+    http = "httptools" if installed("httptools") else "h11"
+    print(f"Starting {args.workers} workers on {args.host}:{args.port} "
+          f"with the {loop} loop and the {http} parser, "
+          f"{os.environ['HASH_WORKERS']} hashing processes each.")
+
+    try:
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            loop=loop,
+            http=http,
+            lifespan="on",
+            access_log=not args.no_access_log,
+            proxy_headers=True,
+            forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+            timeout_keep_alive=KEEPALIVE_TIMEOUT,
+            timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+        )
+    finally:
+        if created_dir:
+            shutil.rmtree(created_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
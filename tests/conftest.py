@@ -1,24 +1,35 @@
 import pytest
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from datetime import date
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
-from db.engine import Base, get_async_db
+from db.engine import Base, get_async_db, get_async_read_db, make_engine
+from db.settings import DatabaseSettings
 
 from main import app
+from models.car import Car
+from models.mechanics import Mechanic
+from models.services import Service
+from models.users import Users
+from utils.availability import availability_index
+from utils.cache import principal_cache, token_cache
+import utils.query_budget
+from utils.hashing import close_hasher
+from utils.query_budget import track_queries
 
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+TEST_DATABASE_SETTINGS = DatabaseSettings(url="sqlite+aiosqlite:///./test.db")
 
 
 @pytest.fixture(scope="session")
 async def async_engine():
     """Create an async engine for the test database."""
-    engine = create_async_engine(
-        SQLALCHEMY_TEST_DATABASE_URL,
-        future=True,
-        echo=False
-    )
+    engine = make_engine(TEST_DATABASE_SETTINGS)
     async with engine.begin() as conn:
+        # Rebuild the schema so a test.db left by older code is updated.
+        await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+    track_queries(engine)
     yield engine
     await engine.dispose()
 
@@ -41,13 +52,92 @@ def override_get_async_db(async_session):
     async def _override():
         yield async_session
     app.dependency_overrides[get_async_db] = _override
+    app.dependency_overrides[get_async_read_db] = _override
     yield
     app.dependency_overrides.pop(get_async_db)
+    app.dependency_overrides.pop(get_async_read_db)
+
+
+@pytest.fixture(scope="function")
+async def async_client(override_get_async_db):
+    """HTTP client bound to the app and the test database session."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(
+        transport=transport,
+        base_url="http://test"
+    ) as client:
+        yield client
 
 
 @pytest.fixture(autouse=True)
 async def clean_database(async_session: AsyncSession):
-    """Delete all data from the database."""
+    """Delete all data from the database, keeping the table versions."""
     for table in reversed(Base.metadata.sorted_tables):
+        if table.name == "table_versions":
+            continue
         await async_session.execute(text(f"DELETE FROM {table.name}"))
     await async_session.commit()
+    availability_index.invalidate()
+    principal_cache.clear()
+    token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def shared_hasher():
+    """Shut the shared hasher down, as its queue belongs to one loop."""
+    yield
+    close_hasher()
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(monkeypatch):
+    """Fail any request that exceeds its endpoint's query budget."""
+    monkeypatch.setattr(utils.query_budget, "QUERY_BUDGET_MODE", "raise")
+
+
+@pytest.fixture(scope="function")
+def request_queries(monkeypatch):
+    """The statements of every request made while the test runs."""
+    recorded = []
+    monkeypatch.setattr(utils.query_budget, "recorded_requests", recorded)
+    return recorded
+
+
+@pytest.fixture(scope="function")
+def query_counter(async_engine):
+    """Record every SQL statement executed while the test runs."""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", _record)
+
+
+@pytest.fixture(scope="function")
+async def booking_refs(async_session: AsyncSession):
+    """A user with a car, a service and a mechanic to book appointments."""
+    user = Users(name="John", email="john@example.com", password="hash")
+    service = Service(name="Oil Change", price=50.0, duration=60)
+    mechanic = Mechanic(
+        name="Jane",
+        birth_date=date(1990, 1, 1),
+        login="jane",
+        password="hash",
+        position="Technician"
+    )
+    async_session.add_all([user, service, mechanic])
+    await async_session.flush()
+    car = Car(
+        user_id=user.user_id,
+        brand="Toyota",
+        model="Corolla",
+        year=2020,
+        plate_number="AA1234BB",
+        vin="1HGCM82633A123456"
+    )
+    async_session.add(car)
+    await async_session.commit()
+    return {"user": user, "car": car, "service": service, "mechanic": mechanic}
@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from models.users import Users
+
+
+def booking_payload(refs: dict, **overrides) -> dict:
+    """Request body for POST /appointments/ built from `booking_refs`."""
+    appointment_date = datetime.now(timezone.utc) + timedelta(days=1)
+    payload = {
+        "user_id": refs["user"].user_id,
+        "car_id": refs["car"].car_id,
+        "service_id": refs["service"].service_id,
+        "mechanic_id": refs["mechanic"].mechanic_id,
+        "appointment_date": appointment_date.isoformat(),
+        "status": "PENDING",
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.mark.asyncio
+async def test_validation_uses_one_query(
+        async_client,
+        booking_refs,
+        query_counter
+):
+    """Test that all references are validated in a single SELECT."""
+    # The first booking also loads the mechanic's calendar.
+    await async_client.post("/appointments/", json=booking_payload(
+        booking_refs,
+        appointment_date=(
+            datetime.now(timezone.utc) + timedelta(days=2)
+        ).isoformat()
+    ))
+    query_counter.clear()
+
+    response = await async_client.post(
+        "/appointments/", json=booking_payload(booking_refs)
+    )
+    assert response.status_code == 201
+
+    first_write = next(
+        i for i, statement in enumerate(query_counter)
+        if statement.lstrip().upper().startswith("INSERT")
+    )
+    # The other SELECTs lock the mechanic and read its overlapping
+    # bookings; only one reads the references.
+    selects_before_write = [
+        statement for statement in query_counter[:first_write]
+        if statement.lstrip().upper().startswith("SELECT")
+        and "JOIN users" in statement
+    ]
+    assert len(selects_before_write) == 1
+    assert not any(
+        "FROM users" in statement
+        for statement in query_counter[first_write:]
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("field, status_code, detail", [
+    ("user_id", 404, "User with ID 999 not found."),
+    ("car_id", 404, "Car with ID 999 not found."),
+    ("service_id", 404, "Service with ID 999 not found."),
+    ("mechanic_id", 404, "Mechanic with ID 999 not found."),
+])
+async def test_missing_reference(
+        async_client,
+        booking_refs,
+        field,
+        status_code,
+        detail
+):
+    """Test that each missing reference keeps its 404 response."""
+    response = await async_client.post(
+        "/appointments/", json=booking_payload(booking_refs, **{field: 999})
+    )
+    assert response.status_code == status_code
+    assert response.json()["detail"] == detail
+
+
+@pytest.mark.asyncio
+async def test_car_of_another_user(async_client, booking_refs, async_session):
+    """Test that booking someone else's car is rejected."""
+    other = Users(name="Bob", email="bob@example.com", password="hash")
+    async_session.add(other)
+    await async_session.commit()
+
+    response = await async_client.post(
+        "/appointments/",
+        json=booking_payload(booking_refs, user_id=other.user_id)
+    )
+    assert response.status_code == 400
+    assert "does not belong" in response.json()["detail"]
@@ -0,0 +1,124 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from models.appointments import Appointment
+from models.email_outbox import EmailOutbox
+from tests.test_appointment_booking import booking_payload
+
+
+def at(days: int, hour: int) -> str:
+    """ISO date `days` from now at `hour`:00 UTC."""
+    day = datetime.now(timezone.utc) + timedelta(days=days)
+    return day.replace(hour=hour, minute=0, second=0, microsecond=0) \
+        .isoformat()
+
+
+async def count(async_session, model) -> int:
+    stmt = select(func.count()).select_from(model)
+    return (await async_session.execute(stmt)).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_bulk_creates_all(async_client, booking_refs, async_session):
+    """Test that valid items are created and each gets an email."""
+    response = await async_client.post("/appointments/bulk", json=[
+        booking_payload(booking_refs, appointment_date=at(2, hour))
+        for hour in (9, 10, 11)
+    ])
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert all(result["error"] is None for result in results)
+    assert len({
+        result["appointment"]["appointment_id"] for result in results
+    }) == 3
+
+    assert await count(async_session, Appointment) == 3
+    assert await count(async_session, EmailOutbox) == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_reports_item_errors(
+        async_client,
+        booking_refs,
+        async_session
+):
+    """Test that invalid items are reported and the rest are created."""
+    response = await async_client.post("/appointments/bulk", json=[
+        booking_payload(booking_refs, appointment_date=at(2, 9)),
+        booking_payload(booking_refs, car_id=999),
+        # Overlaps the first item of the same batch.
+        booking_payload(booking_refs, appointment_date=at(2, 9)),
+        booking_payload(booking_refs, status="UNKNOWN"),
+    ])
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["appointment"] is not None
+    assert results[1]["error"] == "Car with ID 999 not found."
+    assert "already booked" in results[2]["error"]
+    assert results[3]["error"] == "Invalid status 'UNKNOWN'."
+    assert await count(async_session, Appointment) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_reports_invalid_items(
+        async_client,
+        booking_refs,
+        async_session
+):
+    """Test that an item failing the schema does not reject the batch."""
+    response = await async_client.post("/appointments/bulk", json=[
+        booking_payload(booking_refs, appointment_date=at(2, 9)),
+        booking_payload(
+            booking_refs, appointment_date="2001-01-01T09:00:00Z"
+        ),
+        booking_payload(booking_refs, appointment_date="next week"),
+        {"user_id": booking_refs["user"].user_id},
+    ])
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["appointment"] is not None
+    assert "must be in the future" in results[1]["error"]
+    assert "Invalid date format" in results[2]["error"]
+    assert results[3]["error"] == "Field required"
+    assert await count(async_session, Appointment) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_respects_existing_bookings(async_client, booking_refs):
+    """Test that a batch cannot overlap an earlier booking."""
+    await async_client.post("/appointments/", json=booking_payload(
+        booking_refs, appointment_date=at(3, 9)
+    ))
+    response = await async_client.post("/appointments/bulk", json=[
+        booking_payload(booking_refs, appointment_date=at(3, 9)),
+    ])
+    assert "already booked" in response.json()[0]["error"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_query_count(async_client, booking_refs, query_counter):
+    """Test that queries do not grow with the number of items."""
+    await async_client.post("/appointments/bulk", json=[
+        booking_payload(booking_refs, appointment_date=at(2, 9)),
+    ])
+    query_counter.clear()
+
+    response = await async_client.post("/appointments/bulk", json=[
+        booking_payload(booking_refs, appointment_date=at(4, hour))
+        for hour in range(9, 17)
+    ])
+    assert all(result["error"] is None for result in response.json())
+
+    selects = [
+        statement for statement in query_counter
+        if statement.lstrip().upper().startswith("SELECT")
+    ]
+    # The references, then the mechanic lock and the calendars.
+    assert len(selects) == 6
+    assert sum(
+        "INSERT INTO email_outbox" in statement
+        for statement in query_counter
+    ) == 1
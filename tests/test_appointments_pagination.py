@@ -0,0 +1,98 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.appointments import Appointment, AppointmentStatus
+
+
+@pytest.fixture
+async def appointments(async_session: AsyncSession):
+    """Five appointments, two of them sharing the same date."""
+    base = datetime(2030, 1, 1, 9, 0)
+    dates = [
+        base,
+        base + timedelta(hours=1),
+        base + timedelta(hours=1),
+        base + timedelta(days=1),
+        base + timedelta(days=2),
+    ]
+    records = [
+        Appointment(
+            user_id=1 + i % 2,
+            car_id=1,
+            service_id=1,
+            mechanic_id=1 + i % 2,
+            appointment_date=appointment_date,
+            status=(
+                AppointmentStatus.COMPLETED if i == 4
+                else AppointmentStatus.PENDING
+            ),
+        )
+        for i, appointment_date in enumerate(dates)
+    ]
+    async_session.add_all(records)
+    await async_session.commit()
+    return records
+
+
+@pytest.mark.asyncio
+async def test_walk_all_pages(async_client, appointments):
+    """Test that following cursors returns every row once, in order."""
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await async_client.get("/appointments/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(item["appointment_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [record.appointment_id for record in appointments]
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_cursor(async_client, appointments):
+    """Test that a page holding the remaining rows ends the walk."""
+    response = await async_client.get("/appointments/", params={"limit": 5})
+
+    page = response.json()
+    assert len(page["items"]) == 5
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_filters(async_client, appointments):
+    """Test filtering by mechanic, status and date range."""
+    response = await async_client.get(
+        "/appointments/", params={"mechanic_id": 2}
+    )
+    assert [item["mechanic_id"] for item in response.json()["items"]] \
+        == [2, 2]
+
+    response = await async_client.get(
+        "/appointments/", params={"status": "COMPLETED"}
+    )
+    assert [item["appointment_id"] for item in response.json()["items"]] \
+        == [appointments[4].appointment_id]
+
+    response = await async_client.get("/appointments/", params={
+        "date_from": "2030-01-01T10:00:00Z",
+        "date_to": "2030-01-02T09:00:00Z",
+    })
+    assert [item["appointment_id"] for item in response.json()["items"]] \
+        == [appointments[1].appointment_id, appointments[2].appointment_id]
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor(async_client, appointments):
+    """Test that a malformed cursor is rejected."""
+    response = await async_client.get(
+        "/appointments/", params={"cursor": "not-a-cursor"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,262 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from models.appointments import Appointment
+from utils.availability import MechanicCalendar, next_free_slots
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return datetime(2030, 1, 1, hour, minute)
+
+
+@pytest.fixture
+def calendar():
+    """A calendar booked 10:00-11:00 and 13:00-14:30."""
+    calendar = MechanicCalendar()
+    calendar.add(1, at(10), at(11))
+    calendar.add(2, at(13), at(14, 30))
+    return calendar
+
+
+def test_is_free(calendar):
+    """Test overlap detection, treating intervals as half-open."""
+    assert calendar.is_free(at(9), at(10))
+    assert calendar.is_free(at(11), at(13))
+    assert not calendar.is_free(at(10, 30), at(11, 30))
+    assert not calendar.is_free(at(9), at(15))
+    assert not calendar.is_free(at(14), at(14, 15))
+
+
+def test_is_free_ignores_own_booking(calendar):
+    """Test that an appointment can be moved within its own interval."""
+    assert not calendar.is_free(at(10, 30), at(11, 30))
+    assert calendar.is_free(at(10, 30), at(11, 30), ignore=1)
+    assert not calendar.is_free(at(12, 30), at(13, 30), ignore=1)
+
+
+def test_remove_and_replace(calendar):
+    """Test that removing or re-adding a key frees its old interval."""
+    calendar.remove(1)
+    assert calendar.is_free(at(10), at(11))
+
+    calendar.add(2, at(16), at(17))
+    assert calendar.is_free(at(13), at(14, 30))
+    assert not calendar.is_free(at(16, 30), at(17))
+    assert len(calendar) == 1
+
+
+def test_free_slots(calendar):
+    """Test listing the gaps inside a working day."""
+    assert calendar.free_slots(at(9), at(18)) == [
+        (at(9), at(10)),
+        (at(11), at(13)),
+        (at(14, 30), at(18)),
+    ]
+    assert calendar.free_slots(at(10, 30), at(13, 30)) == [
+        (at(11), at(13)),
+    ]
+
+
+def test_overlapping_bookings(calendar):
+    """Test that a long booking hidden behind a shorter one still counts."""
+    calendar.add(3, at(9), at(12, 30))
+
+    assert not calendar.is_free(at(11, 30), at(12, 30))
+    assert calendar.is_free(at(11, 30), at(12, 30), ignore=3)
+    assert calendar.free_slots(at(11), at(18)) == [
+        (at(12, 30), at(13)),
+        (at(14, 30), at(18)),
+    ]
+
+
+def test_next_free_slots_merges_mechanics(calendar):
+    """Test that the earliest slots are picked across all calendars."""
+    busy_morning = MechanicCalendar()
+    busy_morning.add(3, at(9), at(12))
+
+    slots = next_free_slots(
+        {1: calendar, 2: busy_morning},
+        duration=60,
+        after=at(9, 10),
+        count=4,
+        step_minutes=30,
+    )
+
+    assert slots == [
+        (1, at(11), at(12)),
+        (1, at(11, 30), at(12, 30)),
+        (1, at(12), at(13)),
+        (2, at(12), at(13)),
+    ]
+
+
+def test_next_free_slots_skips_full_days():
+    """Test that the search continues on the next working day."""
+    full = MechanicCalendar()
+    full.add(1, at(9), at(18))
+
+    slots = next_free_slots({1: full}, 60, at(8), count=1)
+
+    next_day = timedelta(days=1)
+    assert slots == [(1, at(9) + next_day, at(10) + next_day)]
+
+
+def booking(refs: dict, appointment_date: datetime) -> dict:
+    return {
+        "user_id": refs["user"].user_id,
+        "car_id": refs["car"].car_id,
+        "service_id": refs["service"].service_id,
+        "mechanic_id": refs["mechanic"].mechanic_id,
+        "appointment_date": appointment_date.isoformat(),
+        "status": "PENDING",
+    }
+
+
+@pytest.fixture
+def tomorrow_ten():
+    tomorrow = datetime.now(timezone.utc) + timedelta(days=1)
+    return tomorrow.replace(hour=10, minute=0, second=0, microsecond=0)
+
+
+@pytest.mark.asyncio
+async def test_overlapping_booking_rejected(
+        async_client,
+        booking_refs,
+        tomorrow_ten
+):
+    """Test that a mechanic cannot be double-booked."""
+    response = await async_client.post(
+        "/appointments/", json=booking(booking_refs, tomorrow_ten)
+    )
+    assert response.status_code == 201
+
+    response = await async_client.post(
+        "/appointments/",
+        json=booking(booking_refs, tomorrow_ten + timedelta(minutes=30))
+    )
+    assert response.status_code == 400
+    assert "already booked" in response.json()["detail"]
+
+    response = await async_client.post(
+        "/appointments/",
+        json=booking(booking_refs, tomorrow_ten + timedelta(hours=1))
+    )
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_booking_by_another_worker_is_seen(
+        async_client,
+        async_engine,
+        booking_refs,
+        tomorrow_ten
+):
+    """Test that a booking is checked against the database, not a cache."""
+    mechanic_id = booking_refs["mechanic"].mechanic_id
+    response = await async_client.get(
+        f"/mechanics/{mechanic_id}/free-slots",
+        params={"day": tomorrow_ten.date().isoformat()}
+    )
+    assert response.status_code == 200
+
+    # Booked through another connection, as another worker would.
+    Session = sessionmaker(bind=async_engine, class_=AsyncSession)
+    async with Session() as other:
+        other.add(Appointment(
+            user_id=booking_refs["user"].user_id,
+            car_id=booking_refs["car"].car_id,
+            service_id=booking_refs["service"].service_id,
+            mechanic_id=mechanic_id,
+            appointment_date=tomorrow_ten.replace(tzinfo=None),
+            status="PENDING",
+        ))
+        await other.commit()
+
+    response = await async_client.post(
+        "/appointments/", json=booking(booking_refs, tomorrow_ten)
+    )
+    assert response.status_code == 400
+    assert "already booked" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_update_into_conflict_rejected(
+        async_client,
+        booking_refs,
+        tomorrow_ten
+):
+    """Test that moving or reactivating an appointment is checked."""
+    first = await async_client.post(
+        "/appointments/", json=booking(booking_refs, tomorrow_ten)
+    )
+    second = await async_client.post(
+        "/appointments/",
+        json=booking(booking_refs, tomorrow_ten + timedelta(hours=2))
+    )
+    second_id = second.json()["appointment_id"]
+
+    response = await async_client.put(
+        f"/appointments/{second_id}",
+        json={"appointment_date": tomorrow_ten.isoformat()}
+    )
+    assert response.status_code == 400
+
+    first_id = first.json()["appointment_id"]
+    response = await async_client.patch(
+        f"/appointments/{first_id}/status", params={"status": "CANCELED"}
+    )
+    assert response.status_code == 200
+
+    response = await async_client.put(
+        f"/appointments/{second_id}",
+        json={"appointment_date": tomorrow_ten.isoformat()}
+    )
+    assert response.status_code == 200
+
+    response = await async_client.patch(
+        f"/appointments/{first_id}/status", params={"status": "PENDING"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_free_slots_endpoint(async_client, booking_refs, tomorrow_ten):
+    """Test that booked time is excluded from a mechanic's free slots."""
+    await async_client.post(
+        "/appointments/", json=booking(booking_refs, tomorrow_ten)
+    )
+    mechanic_id = booking_refs["mechanic"].mechanic_id
+
+    response = await async_client.get(
+        f"/mechanics/{mechanic_id}/free-slots",
+        params={"day": tomorrow_ten.date().isoformat()}
+    )
+    assert response.status_code == 200
+    slots = [(slot["start"][11:16], slot["end"][11:16])
+             for slot in response.json()]
+    assert slots == [("09:00", "10:00"), ("11:00", "18:00")]
+
+
+@pytest.mark.asyncio
+async def test_next_slots_endpoint(async_client, booking_refs, tomorrow_ten):
+    """Test that the earliest slots skip existing bookings."""
+    await async_client.post(
+        "/appointments/",
+        json=booking(booking_refs, tomorrow_ten - timedelta(hours=1))
+    )
+    service_id = booking_refs["service"].service_id
+
+    response = await async_client.get(
+        f"/services/{service_id}/next-slots",
+        params={
+            "count": 2,
+            "after": (tomorrow_ten - timedelta(hours=1)).isoformat()
+        }
+    )
+    assert response.status_code == 200
+    slots = response.json()
+    assert [slot["start"][11:16] for slot in slots] == ["10:00", "10:15"]
+    assert slots[0]["mechanic_id"] == booking_refs["mechanic"].mechanic_id
@@ -0,0 +1,151 @@
+import gzip
+import threading
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import Response, StreamingResponse
+
+import utils.compression
+from models.services import Service
+from utils.compression import (
+    CompressionMiddleware,
+    GzipEncoder,
+    choose_encoding,
+)
+
+BODY = b'{"items": [' + b'{"status": "PENDING"}, ' * 200 + b"{}]}"
+
+
+async def fetch(app, accept_encoding="gzip", **middleware_options):
+    transport = ASGITransport(
+        app=CompressionMiddleware(app, **middleware_options)
+    )
+    async with AsyncClient(
+            transport=transport, base_url="http://test"
+    ) as client:
+        return await client.get(
+            "/", headers={"Accept-Encoding": accept_encoding}
+        )
+
+
+@pytest.mark.parametrize("header, encoding", [
+    ("gzip, deflate, br, zstd", "zstd"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*;q=0.1, zstd;q=0", "br"),
+    ("gzip;q=0", None),
+    ("", None),
+])
+def test_choose_encoding(monkeypatch, header, encoding):
+    monkeypatch.setattr(
+        utils.compression, "ENCODERS", dict.fromkeys(["zstd", "br", "gzip"])
+    )
+    assert choose_encoding(header) == encoding
+
+
+@pytest.mark.asyncio
+async def test_large_json_is_compressed():
+    response = await fetch(Response(BODY, media_type="application/json"))
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY) / 10
+    assert response.content == BODY
+
+
+@pytest.mark.asyncio
+async def test_small_and_binary_responses_are_left_alone():
+    response = await fetch(Response(b"{}", media_type="application/json"))
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+
+    gzipped = gzip.compress(BODY)
+    response = await fetch(
+        Response(gzipped, media_type="application/gzip"),
+        minimum_size=10
+    )
+    assert "content-encoding" not in response.headers
+    assert response.content == gzipped
+
+
+@pytest.mark.asyncio
+async def test_client_without_gzip_gets_identity():
+    response = await fetch(
+        Response(BODY, media_type="application/json"),
+        accept_encoding="identity"
+    )
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == BODY
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_is_compressed_per_chunk():
+    lines = [b'{"appointment_id": %d}\n' % number for number in range(500)]
+    response = await fetch(
+        StreamingResponse(iter(lines), media_type="application/x-ndjson")
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b"".join(lines)
+
+
+@pytest.mark.asyncio
+async def test_large_body_is_compressed_in_a_thread(monkeypatch):
+    threads = []
+
+    class RecordingEncoder(GzipEncoder):
+        def compress(self, data, flush=True):
+            threads.append(threading.get_ident())
+            return super().compress(data, flush)
+
+    monkeypatch.setitem(utils.compression.ENCODERS, "gzip", RecordingEncoder)
+    response = await fetch(
+        Response(BODY, media_type="application/json"),
+        thread_minimum_size=len(BODY)
+    )
+
+    assert response.content == BODY
+    assert threads and threads[0] != threading.get_ident()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding, package", [
+    ("br", "brotli"), ("zstd", "zstandard"),
+])
+async def test_optional_encodings(encoding, package):
+    pytest.importorskip(package)
+    response = await fetch(
+        Response(BODY, media_type="application/json"),
+        accept_encoding=encoding
+    )
+
+    assert response.headers["content-encoding"] == encoding
+    assert response.content == BODY
+
+
+@pytest.mark.asyncio
+async def test_compressed_catalog_keeps_conditional_requests(
+        async_client,
+        async_session
+):
+    """Test that the ETag of a compressed body is weak and still matches."""
+    async_session.add_all([
+        Service(name=f"Service {number}", price=50.0, duration=60)
+        for number in range(30)
+    ])
+    await async_session.commit()
+
+    response = await async_client.get(
+        "/services/", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"services.')
+
+    response = await async_client.get(
+        "/services/",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
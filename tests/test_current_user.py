@@ -0,0 +1,127 @@
+import jwt
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from models.users import Users
+from routers.users import ALGORITHM, SECRET_KEY
+from utils.cache import TTLCache, principal_cache
+
+
+def make_token(user_id: int, expires_in: timedelta) -> str:
+    return jwt.encode(
+        {
+            "user_id": user_id,
+            "exp": datetime.now(timezone.utc) + expires_in,
+        },
+        SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+
+
+@pytest.fixture
+async def user(async_session):
+    user = Users(name="John", email="john@example.com", password="hash")
+    async_session.add(user)
+    await async_session.commit()
+    return user
+
+
+def auth(user: Users, expires_in=timedelta(minutes=5)) -> dict:
+    token = make_token(user.user_id, expires_in)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio
+async def test_profile_is_cached(async_client, user, query_counter):
+    """Test that repeated authenticated calls skip the user SELECT."""
+    headers = auth(user)
+    response = await async_client.get("/users/me", headers=headers)
+    assert response.json()["email"] == "john@example.com"
+    # The users table version, then the user.
+    assert len(query_counter) == 2
+
+    query_counter.clear()
+    response = await async_client.get("/users/me", headers=headers)
+    assert response.json()["email"] == "john@example.com"
+    assert query_counter == []
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates_principal(async_client, user):
+    """Test that an updated user is not served from the cache."""
+    headers = auth(user)
+    await async_client.get("/users/me", headers=headers)
+
+    response = await async_client.put(f"/users/{user.user_id}", json={
+        "name": "Johnny", "email": "john@example.com"
+    })
+    assert response.status_code == 200
+    response = await async_client.get("/users/me", headers=headers)
+    assert response.json()["name"] == "Johnny"
+
+
+@pytest.mark.asyncio
+async def test_delete_invalidates_principal(async_client, user):
+    """Test that a deleted user can no longer authenticate."""
+    headers = auth(user)
+    await async_client.get("/users/me", headers=headers)
+    assert user.user_id in principal_cache._entries
+
+    await async_client.delete(f"/users/{user.user_id}")
+    response = await async_client.get("/users/me", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_user_deleted_by_another_worker(
+        async_client,
+        async_session,
+        user,
+        monkeypatch
+):
+    """Test that a user deleted elsewhere is dropped on the next check."""
+    headers = auth(user)
+    await async_client.get("/users/me", headers=headers)
+
+    # Deleted without going through this worker's endpoint.
+    await async_session.delete(user)
+    await async_session.commit()
+    response = await async_client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+
+    monkeypatch.setattr(principal_cache, "check_interval", 0)
+    response = await async_client.get("/users/me", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_expired_token_rejected(async_client, user):
+    """Test that an expired token is not accepted."""
+    headers = auth(user, expires_in=timedelta(seconds=-1))
+    response = await async_client.get("/users/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has expired."
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that the cache drops the least recently used entry."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    """Test that entries expire at `expires_at` or after the TTL."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("past", 1, expires_at=0)
+    cache.set("live", 2)
+
+    assert cache.get("past") is None
+    assert cache.get("live") == 2
+    assert len(cache) == 1
@@ -0,0 +1,112 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models.email_outbox import EmailOutbox, EmailOutboxStatus
+from utils import outbox
+from utils.dates import utcnow
+from utils.outbox import dispatch_pending, enqueue_email
+
+
+class RecordingSender:
+    """Async sender stand-in that records messages or fails on demand."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sent = []
+
+    async def __call__(self, to_email: str, subject: str, body: str):
+        if self.fail:
+            raise ConnectionError("SMTP server unavailable")
+        self.sent.append((to_email, subject, body))
+
+
+@pytest.mark.asyncio
+async def test_enqueue_email(async_session: AsyncSession):
+    """Test that an enqueued email is stored as pending on commit."""
+    email = enqueue_email(
+        async_session, "john@example.com", "Subject", "Body"
+    )
+    await async_session.commit()
+
+    assert email.email_id is not None
+    assert email.status == EmailOutboxStatus.PENDING
+    assert email.attempts == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatch_marks_email_sent(async_session: AsyncSession):
+    """Test that a due email is delivered and marked as sent."""
+    email = enqueue_email(
+        async_session, "john@example.com", "Subject", "Body"
+    )
+    await async_session.commit()
+
+    sender = RecordingSender()
+    processed = await dispatch_pending(async_session, sender)
+
+    assert processed == 1
+    assert sender.sent == [("john@example.com", "Subject", "Body")]
+    assert email.status == EmailOutboxStatus.SENT
+    assert email.sent_at is not None
+
+
+@pytest.mark.asyncio
+async def test_dispatch_retries_with_backoff(async_session: AsyncSession):
+    """Test that a failed delivery is rescheduled with backoff."""
+    email = enqueue_email(
+        async_session, "john@example.com", "Subject", "Body"
+    )
+    await async_session.commit()
+
+    await dispatch_pending(async_session, RecordingSender(fail=True))
+
+    assert email.status == EmailOutboxStatus.PENDING
+    assert email.attempts == 1
+    assert email.last_error == "SMTP server unavailable"
+    assert email.next_attempt_at > utcnow()
+
+    processed = await dispatch_pending(async_session, RecordingSender())
+    assert processed == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatch_gives_up_after_max_attempts(
+        async_session: AsyncSession,
+        monkeypatch
+):
+    """Test that an email is marked failed after the last attempt."""
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 1)
+    email = enqueue_email(
+        async_session, "john@example.com", "Subject", "Body"
+    )
+    await async_session.commit()
+
+    await dispatch_pending(async_session, RecordingSender(fail=True))
+
+    assert email.status == EmailOutboxStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_create_appointment_queues_confirmation(
+        async_session: AsyncSession,
+        async_client,
+        booking_refs
+):
+    """Test that booking writes the confirmation to the outbox."""
+    appointment_date = datetime.now(timezone.utc) + timedelta(days=1)
+    response = await async_client.post("/appointments/", json={
+        "user_id": booking_refs["user"].user_id,
+        "car_id": booking_refs["car"].car_id,
+        "service_id": booking_refs["service"].service_id,
+        "mechanic_id": booking_refs["mechanic"].mechanic_id,
+        "appointment_date": appointment_date.isoformat(),
+        "status": "PENDING",
+    })
+    assert response.status_code == 201
+
+    emails = (await async_session.execute(select(EmailOutbox))).scalars().all()
+    assert len(emails) == 1
+    assert emails[0].to_email == "john@example.com"
+    assert emails[0].status == EmailOutboxStatus.PENDING
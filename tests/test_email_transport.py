@@ -0,0 +1,143 @@
+import asyncio
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP
+
+from utils.email import SMTPTransport
+
+
+def free_port() -> int:
+    """Return a TCP port that is free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """aiosmtpd handler that records messages and peak concurrency."""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.messages = []
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.messages.append(envelope)
+        self.active -= 1
+        return "250 Message accepted for delivery"
+
+
+class CountingController(Controller):
+    """Controller whose SMTP sessions report new connections."""
+
+    def factory(self):
+        handler = self.handler
+
+        class CountingSMTP(SMTP):
+            def connection_made(self, transport):
+                handler.connections += 1
+                super().connection_made(transport)
+
+        return CountingSMTP(handler)
+
+
+@pytest.fixture
+def smtp_server():
+    """Local SMTP stand-in without TLS or authentication."""
+    def _start(delay: float = 0):
+        handler = RecordingHandler(delay)
+        controller = CountingController(
+            handler, hostname="127.0.0.1", port=free_port()
+        )
+        controller.start()
+        # Ignore the readiness probe made by `start()`.
+        handler.connections = 0
+        servers.append(controller)
+        return controller
+
+    servers = []
+    yield _start
+    for controller in servers:
+        controller.stop()
+
+
+def make_transport(controller, pool_size: int = 2) -> SMTPTransport:
+    return SMTPTransport(
+        hostname=controller.hostname,
+        port=controller.port,
+        username="",
+        start_tls=False,
+        pool_size=pool_size,
+        from_email="noreply@example.com",
+    )
+
+
+@pytest.mark.asyncio
+async def test_send_delivers_message(smtp_server):
+    """Test that a single email reaches the SMTP server."""
+    controller = smtp_server()
+    transport = make_transport(controller)
+
+    await transport.send("john@example.com", "Subject", "Body")
+    await transport.close()
+
+    assert len(controller.handler.messages) == 1
+    assert controller.handler.messages[0].rcpt_tos == ["john@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_send_many_reuses_sessions(smtp_server):
+    """Test that a batch is sent over at most `pool_size` connections."""
+    controller = smtp_server()
+    transport = make_transport(controller, pool_size=2)
+
+    results = await transport.send_many(
+        (f"user{i}@example.com", "Subject", "Body") for i in range(20)
+    )
+    await transport.close()
+
+    assert results == [None] * 20
+    assert len(controller.handler.messages) == 20
+    assert controller.handler.connections <= 2
+
+
+@pytest.mark.asyncio
+async def test_in_flight_sends_are_capped(smtp_server):
+    """Test that concurrent sends never exceed the pool size."""
+    controller = smtp_server(delay=0.02)
+    transport = make_transport(controller, pool_size=3)
+
+    await transport.send_many(
+        (f"user{i}@example.com", "Subject", "Body") for i in range(12)
+    )
+    await transport.close()
+
+    assert controller.handler.max_active == 3
+
+
+@pytest.mark.asyncio
+async def test_send_many_reports_failures():
+    """Test that per-message errors are returned instead of raised."""
+    transport = SMTPTransport(
+        hostname="127.0.0.1",
+        port=free_port(),
+        username="",
+        start_tls=False,
+        pool_size=1,
+        timeout=1,
+        from_email="noreply@example.com",
+    )
+
+    results = await transport.send_many(
+        [("john@example.com", "Subject", "Body")]
+    )
+
+    assert isinstance(results[0], Exception)
+    assert transport.in_flight == 0
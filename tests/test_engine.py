@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import pool
+
+from db.engine import engine_options, make_engine, make_sync_engine
+from db.settings import DatabaseSettings, parse_echo, url_from_env
+
+MYSQL_URL = "mysql+aiomysql://app:s3cr%40t@db:3306/car_service"
+
+
+def test_url_from_env_quotes_credentials(monkeypatch):
+    """Test that the URL is built from the parts, not by formatting."""
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setenv("DB_USER", "app")
+    monkeypatch.setenv("DB_PASSWORD", "p@ss/word")
+    monkeypatch.setenv("DB_HOST", "db")
+    monkeypatch.setenv("DB_PORT", "3307")
+    monkeypatch.setenv("DB_NAME", "car_service")
+
+    url = url_from_env()
+    assert url.password == "p@ss/word"
+    assert url.port == 3307
+    assert url.drivername == "mysql+aiomysql"
+
+
+def test_database_url_overrides_parts(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///./dev.db")
+    assert DatabaseSettings.from_env().backend == "sqlite"
+
+
+@pytest.mark.parametrize("value, echo", [
+    (None, False), ("false", False), ("true", True), ("DEBUG", "debug"),
+])
+def test_parse_echo(value, echo):
+    assert parse_echo(value) == echo
+
+
+def test_pool_options():
+    """Test that pool sizes and the statement timeout reach the engine."""
+    settings = DatabaseSettings(
+        url=MYSQL_URL, pool_size=3, max_overflow=1, statement_timeout_ms=500
+    )
+    options = engine_options(settings)
+
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 1
+    assert options["connect_args"] == {
+        "init_command": "SET SESSION MAX_EXECUTION_TIME=500"
+    }
+
+    engine = make_engine(settings)
+    assert engine.pool.size() == 3
+    assert engine.echo is False
+
+
+def test_sqlite_keeps_default_pool():
+    settings = DatabaseSettings(
+        url="sqlite+aiosqlite:///./test.db", statement_timeout_ms=500
+    )
+    options = engine_options(settings)
+
+    assert "pool_size" not in options
+    assert "connect_args" not in options
+
+
+def test_sync_engine_uses_blocking_driver():
+    """Test the engine Alembic builds from the same settings."""
+    engine = make_sync_engine(
+        DatabaseSettings(url=MYSQL_URL), poolclass=pool.NullPool
+    )
+
+    assert engine.url.drivername == "mysql+pymysql"
+    assert engine.url.password == "s3cr@t"
+    assert isinstance(engine.pool, pool.NullPool)
@@ -0,0 +1,159 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from db.versions import table_versions
+from models.users import Users
+from routers import users as users_router
+
+
+@pytest.mark.asyncio
+async def test_unchanged_catalog_is_not_resent(
+        async_client,
+        booking_refs,
+        request_queries
+):
+    """Test that a matching If-None-Match gets an empty 304."""
+    response = await async_client.get("/services/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    request_queries.clear()
+    response = await async_client.get(
+        "/services/", headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    # Only the version is read; the services are not loaded.
+    assert request_queries[0].count == 1
+
+
+@pytest.mark.asyncio
+async def test_write_changes_the_etag(async_client, booking_refs):
+    service_id = booking_refs["service"].service_id
+    response = await async_client.get(f"/services/{service_id}")
+    etag = response.headers["etag"]
+
+    response = await async_client.put(
+        f"/services/{service_id}", json={"price": 65.0}
+    )
+    assert response.status_code == 200
+
+    response = await async_client.get(
+        f"/services/{service_id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["price"] == 65.0
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_rejected_write_keeps_the_version(
+        async_client,
+        async_session,
+        booking_refs
+):
+    """Test that a rolled back change does not invalidate the ETag."""
+    before = await table_versions(async_session, ["services"])
+
+    response = await async_client.post("/services/", json={
+        "name": booking_refs["service"].name, "price": 10.0, "duration": 30
+    })
+    assert response.status_code == 400
+
+    assert await table_versions(async_session, ["services"]) == before
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_bumps_the_version(async_client, async_session):
+    """Test that INSERT statements count, not just flushed objects."""
+    [before] = (await table_versions(async_session, ["users"])).values()
+
+    response = await async_client.post("/users/bulk", json=[
+        {
+            "name": f"User {number}",
+            "email": f"user{number}@example.com",
+            "password": "secret123",
+        }
+        for number in range(3)
+    ])
+    assert response.status_code == 200
+
+    assert await table_versions(async_session, ["users"]) == {
+        "users": before + 1
+    }
+
+
+@pytest.mark.asyncio
+async def test_savepoints_bump_once_on_commit(
+        async_client,
+        async_session,
+        monkeypatch,
+        query_counter
+):
+    """Test that only the outermost commit bumps, once per table."""
+    monkeypatch.setattr(users_router, "USER_IMPORT_CHUNK_SIZE", 2)
+    [before] = (await table_versions(async_session, ["users"])).values()
+    query_counter.clear()
+
+    response = await async_client.post("/users/bulk", json=[
+        {
+            "name": f"User {number}",
+            "email": f"user{number}@example.com",
+            "password": "secret123",
+        }
+        for number in range(5)
+    ])
+    assert response.status_code == 200
+
+    assert sum(
+        statement.startswith("UPDATE table_versions")
+        for statement in query_counter
+    ) == 1
+    assert await table_versions(async_session, ["users"]) == {
+        "users": before + 1
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_savepoint_keeps_earlier_changes(async_session):
+    """Test that a rolled back savepoint does not drop earlier changes."""
+    [before] = (await table_versions(async_session, ["users"])).values()
+
+    async with async_session.begin_nested():
+        async_session.add(
+            Users(name="A", email="a@example.com", password="x")
+        )
+    with pytest.raises(IntegrityError):
+        async with async_session.begin_nested():
+            async_session.add(
+                Users(name="A", email="b@example.com", password="x")
+            )
+    await async_session.commit()
+
+    assert await table_versions(async_session, ["users"]) == {
+        "users": before + 1
+    }
+
+
+@pytest.mark.asyncio
+async def test_missing_version_disables_etags(
+        async_client,
+        async_session,
+        booking_refs
+):
+    """Test that an untracked table is served without an ETag."""
+    await async_session.execute(
+        text("DELETE FROM table_versions WHERE table_name = 'cars'")
+    )
+    try:
+        car_id = booking_refs["car"].car_id
+        response = await async_client.get(
+            f"/cars/{car_id}", headers={"If-None-Match": '"cars.1"'}
+        )
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+    finally:
+        await async_session.rollback()
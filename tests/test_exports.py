@@ -0,0 +1,272 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.appointments import Appointment, AppointmentStatus
+from models.export_jobs import ExportFormat, ExportJob, ExportStatus
+from utils import exports
+from utils.dates import utcnow
+
+
+@pytest.fixture
+def export_folder(tmp_path, monkeypatch):
+    """Write export files to a temporary folder."""
+    monkeypatch.setattr(exports, "EXPORT_FOLDER", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+async def appointments(async_session, booking_refs):
+    """Five appointments of the `booking_refs` user, one day apart."""
+    start = datetime(2025, 1, 1, 9)
+    rows = [
+        Appointment(
+            user_id=booking_refs["user"].user_id,
+            car_id=booking_refs["car"].car_id,
+            service_id=booking_refs["service"].service_id,
+            mechanic_id=booking_refs["mechanic"].mechanic_id,
+            appointment_date=start + timedelta(days=day),
+            status=AppointmentStatus.COMPLETED,
+        )
+        for day in range(5)
+    ]
+    async_session.add_all(rows)
+    await async_session.commit()
+    return rows
+
+
+@pytest.fixture
+def session_factory(async_engine):
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+@pytest.fixture
+async def export_runner(session_factory):
+    """Run the process-wide export runner against the test database."""
+    runner = exports.get_export_runner()
+    runner.session_factory = session_factory
+    runner.start()
+    yield runner
+    await exports.close_export_runner()
+
+
+async def wait_for_export(async_client, export_id: int) -> dict:
+    """Poll the export until it has finished."""
+    for _ in range(100):
+        export = (await async_client.get(f"/exports/{export_id}")).json()
+        if export["status"] in ("COMPLETED", "FAILED"):
+            return export
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"Export {export_id} did not finish.")
+
+
+async def job_status(async_session, export_id: int) -> ExportStatus:
+    job = await async_session.get(ExportJob, export_id)
+    await async_session.refresh(job)
+    return job.status
+
+
+async def download(async_client, export_id: int) -> str:
+    response = await async_client.get(f"/exports/{export_id}/download")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    return gzip.decompress(response.content).decode()
+
+
+@pytest.mark.asyncio
+async def test_export_jsonl(
+        async_client,
+        appointments,
+        export_folder,
+        export_runner
+):
+    """Test that a JSONL export contains every appointment in order."""
+    response = await async_client.post(
+        "/exports/appointments", json={"format": "jsonl"}
+    )
+    assert response.status_code == 202
+    export_id = response.json()["export_id"]
+
+    export = await wait_for_export(async_client, export_id)
+    assert export["status"] == "COMPLETED"
+    assert export["row_count"] == 5
+    assert export["download_url"] == f"/exports/{export_id}/download"
+
+    lines = (await download(async_client, export_id)).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record["appointment_id"] for record in records] == [
+        appointment.appointment_id for appointment in appointments
+    ]
+    assert records[0]["appointment_date"] == "2025-01-01T09:00:00"
+    assert records[0]["status"] == "COMPLETED"
+
+
+@pytest.mark.asyncio
+async def test_export_csv_with_date_range(
+        async_client,
+        appointments,
+        export_folder,
+        export_runner
+):
+    """Test that a CSV export has a header and honours the date range."""
+    response = await async_client.post("/exports/appointments", json={
+        "format": "csv",
+        "date_from": "2025-01-02T00:00:00Z",
+        "date_to": "2025-01-04T00:00:00Z",
+    })
+    export_id = response.json()["export_id"]
+    await wait_for_export(async_client, export_id)
+
+    reader = csv.DictReader(io.StringIO(
+        await download(async_client, export_id)
+    ))
+    assert reader.fieldnames == exports.EXPORT_FIELDS
+    assert [row["appointment_date"] for row in reader] == [
+        "2025-01-02T09:00:00", "2025-01-03T09:00:00"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_runs_outside_the_request(
+        async_client,
+        appointments,
+        export_folder,
+        session_factory
+):
+    """Test that creating an export only queues it for the runner."""
+    response = await async_client.post(
+        "/exports/appointments", json={"format": "jsonl"}
+    )
+    assert response.json()["status"] == "PENDING"
+    export_id = response.json()["export_id"]
+    export = (await async_client.get(f"/exports/{export_id}")).json()
+    assert export["status"] == "PENDING"
+
+    runner = exports.ExportRunner(session_factory)
+    runner.start()
+    try:
+        export = await wait_for_export(async_client, export_id)
+    finally:
+        await runner.stop()
+    assert export["row_count"] == 5
+
+
+@pytest.mark.asyncio
+async def test_export_streams_in_chunks(
+        async_session,
+        appointments,
+        export_folder,
+        monkeypatch
+):
+    """Test that rows are fetched and written one chunk at a time."""
+    chunks = []
+    encode_rows = exports.encode_rows
+
+    def recording_encode(rows, export_format):
+        chunks.append(len(rows))
+        return encode_rows(rows, export_format)
+
+    monkeypatch.setattr(exports, "encode_rows", recording_encode)
+    job = exports.ExportJob(format=exports.ExportFormat.JSONL)
+    path = export_folder / "chunks.jsonl.gz"
+
+    row_count = await exports.write_export(
+        async_session, job, str(path), chunk_rows=2
+    )
+    assert row_count == 5
+    assert chunks == [2, 2, 1]
+    assert len(gzip.decompress(path.read_bytes()).splitlines()) == 5
+
+
+@pytest.mark.asyncio
+async def test_export_not_found(async_client):
+    """Test that an unknown export returns 404."""
+    response = await async_client.get("/exports/999")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Export not found."
+
+
+@pytest.mark.asyncio
+async def test_queue_recovers_jobs_of_stopped_workers(
+        async_session,
+        appointments,
+        export_folder,
+        session_factory
+):
+    """Test that left behind jobs run and abandoned ones fail."""
+    pending = ExportJob(format=ExportFormat.JSONL)
+    abandoned = ExportJob(
+        format=ExportFormat.CSV,
+        status=ExportStatus.RUNNING,
+        started_at=utcnow() - timedelta(seconds=exports.EXPORT_TIMEOUT + 1),
+    )
+    running = ExportJob(
+        format=ExportFormat.CSV,
+        status=ExportStatus.RUNNING,
+        started_at=utcnow(),
+    )
+    async_session.add_all([pending, abandoned, running])
+    await async_session.commit()
+
+    runner = exports.ExportRunner(session_factory)
+    runner.start()
+    try:
+        for _ in range(100):
+            if await job_status(async_session, pending.export_id) \
+                    == ExportStatus.COMPLETED:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await runner.stop()
+
+    assert await job_status(
+        async_session, pending.export_id
+    ) == ExportStatus.COMPLETED
+    assert await job_status(
+        async_session, abandoned.export_id
+    ) == ExportStatus.FAILED
+    assert abandoned.error == exports.INTERRUPTED_MESSAGE
+    assert await job_status(
+        async_session, running.export_id
+    ) == ExportStatus.RUNNING
+
+
+@pytest.mark.asyncio
+async def test_cancelled_export_is_requeued(
+        async_session,
+        export_folder,
+        session_factory,
+        monkeypatch
+):
+    """Test that an export stopped by shutdown can run again."""
+    started = asyncio.Event()
+
+    async def endless_export(db, job, path):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(exports, "write_export", endless_export)
+    job = ExportJob(format=ExportFormat.JSONL)
+    async_session.add(job)
+    await async_session.commit()
+
+    task = asyncio.create_task(
+        exports.run_export(job.export_id, session_factory)
+    )
+    await started.wait()
+    # A second worker cannot claim a job that is running.
+    async with session_factory() as db:
+        assert await exports.claim_export(db, job.export_id) is None
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert await job_status(async_session, job.export_id) \
+        == ExportStatus.PENDING
+    assert job.started_at is None
+    assert list(export_folder.iterdir()) == []
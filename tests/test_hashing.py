@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+from passlib.hash import argon2
+
+from models.users import Users
+from utils.hashing import PasswordHasher, needs_rehash, password_policy
+
+
+@pytest.fixture
+def hasher():
+    """A single-worker hasher that is shut down after the test."""
+    hasher = PasswordHasher(workers=1)
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify(hasher):
+    """Test that a hash made in the pool verifies only its password."""
+    hashed = await hasher.hash("secret")
+
+    assert hashed.startswith("$argon2")
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_calls_are_bounded(hasher):
+    """Test that calls beyond the pool size wait and are counted."""
+    tasks = [
+        asyncio.create_task(hasher.hash(f"secret{i}")) for i in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    assert hasher.stats() == {"workers": 1, "in_flight": 1, "waiting": 2}
+    await asyncio.gather(*tasks)
+    assert hasher.stats() == {"workers": 1, "in_flight": 0, "waiting": 0}
+
+
+@pytest.mark.asyncio
+async def test_batch_does_not_starve_other_calls(hasher):
+    """Test that a call made during a batch waits for `limit` hashes only."""
+    batch = asyncio.create_task(
+        hasher.hash_many([f"secret{i}" for i in range(6)], limit=1)
+    )
+    await asyncio.sleep(0.01)
+    assert hasher.stats()["in_flight"] + hasher.stats()["waiting"] == 1
+
+    hashed = await hasher.hash("login")
+    assert not batch.done()
+    assert await hasher.verify("login", hashed)
+
+    hashes = await batch
+    assert await hasher.verify("secret5", hashes[5])
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive(hasher):
+    """Test that the loop keeps serving other work while hashing."""
+    await hasher.hash("warm up the worker")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.001)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(hasher.hash("secret") for _ in range(3)))
+    elapsed = time.perf_counter() - started
+    task.cancel()
+
+    # A blocked loop would not tick at all while the hashes run.
+    assert ticks >= elapsed / 0.001 / 10
+
+
+@pytest.mark.asyncio
+async def test_login_with_pooled_hashing(async_client):
+    """Test that a user created through the API can log in."""
+    response = await async_client.post("/users/", json={
+        "name": "John",
+        "email": "john@example.com",
+        "password": "secret123",
+        "role": "CUSTOMER",
+    })
+    assert response.status_code == 201
+
+    response = await async_client.post("/users/auth/login", data={
+        "username": "john@example.com", "password": "secret123"
+    })
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+    response = await async_client.post("/users/auth/login", data={
+        "username": "john@example.com", "password": "wrong"
+    })
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_hash(async_client, async_session):
+    """Test that logging in moves a hash to the current policy."""
+    outdated = argon2.using(rounds=1, memory_cost=1024, parallelism=1)
+    user = Users(
+        name="John",
+        email="john@example.com",
+        password=outdated.hash("secret123")
+    )
+    async_session.add(user)
+    await async_session.commit()
+    assert needs_rehash(user.password)
+
+    response = await async_client.post("/users/auth/login", data={
+        "username": "john@example.com", "password": "secret123"
+    })
+    assert response.status_code == 200
+
+    await async_session.refresh(user)
+    assert not needs_rehash(user.password)
+    assert password_policy.verify("secret123", user.password)
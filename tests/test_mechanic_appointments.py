@@ -0,0 +1,55 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.appointments import Appointment
+
+
+@pytest.fixture
+async def mechanic_appointments(async_session: AsyncSession, booking_refs):
+    """Ten appointments of the same mechanic."""
+    base = datetime(2030, 1, 1, 9, 0)
+    records = [
+        Appointment(
+            user_id=booking_refs["user"].user_id,
+            car_id=booking_refs["car"].car_id,
+            service_id=booking_refs["service"].service_id,
+            mechanic_id=booking_refs["mechanic"].mechanic_id,
+            appointment_date=base + timedelta(days=i),
+        )
+        for i in range(10)
+    ]
+    async_session.add_all(records)
+    await async_session.commit()
+    return records
+
+
+@pytest.mark.asyncio
+async def test_appointments_embed_car_and_service(
+        async_client,
+        booking_refs,
+        mechanic_appointments
+):
+    """Test that each appointment carries its car and service."""
+    mechanic_id = booking_refs["mechanic"].mechanic_id
+    response = await async_client.get(f"/mechanics/{mechanic_id}/appointments")
+
+    assert response.status_code == 200
+    appointments = response.json()
+    assert len(appointments) == 10
+    assert appointments[0]["car"]["plate_number"] == "AA1234BB"
+    assert appointments[0]["service"]["name"] == "Oil Change"
+
+
+@pytest.mark.asyncio
+async def test_query_count_is_constant(
+        async_client,
+        booking_refs,
+        mechanic_appointments,
+        query_counter
+):
+    """Test that the endpoint no longer issues queries per appointment."""
+    mechanic_id = booking_refs["mechanic"].mechanic_id
+    await async_client.get(f"/mechanics/{mechanic_id}/appointments")
+
+    assert len(query_counter) == 2
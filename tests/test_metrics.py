@@ -0,0 +1,159 @@
+import json
+import os
+import re
+
+import pytest
+
+import routers.metrics
+import serve
+import utils.metrics
+from db.engine import make_engine
+from db.settings import DatabaseSettings
+from utils.metrics import (
+    Histogram,
+    UNMATCHED_ROUTE,
+    instrument_engine,
+    registry,
+)
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Value of the series `name` with exactly `labels` in `text`."""
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(
+        rf"^{re.escape(name)}{{{re.escape(pairs)}}} (\S+)$", text, re.M
+    )
+    assert match, f"{name}{{{pairs}}} not exported"
+    return float(match.group(1))
+
+
+@pytest.fixture
+def metrics(async_engine):
+    instrument_engine(async_engine, "test")
+    registry.clear()
+    yield registry
+    registry.clear()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Latency.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(("/a",), value)
+
+    assert histogram.render()[2:] == [
+        'latency_bucket{route="/a",le="0.1"} 1',
+        'latency_bucket{route="/a",le="1.0"} 3',
+        'latency_bucket{route="/a",le="+Inf"} 4',
+        'latency_sum{route="/a"} 4.25',
+        'latency_count{route="/a"} 4',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_request_and_query_metrics(async_client, metrics):
+    """Test that requests are labelled by route template, not by path."""
+    await async_client.get("/services/")
+    await async_client.get("/services/41")
+    await async_client.get("/services/42")
+    await async_client.get("/no/such/path")
+
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    route = "/services/{service_id}"
+    assert sample(
+        text, "http_requests_total", method="GET", route=route, status="404"
+    ) == 2
+    assert sample(
+        text, "http_request_duration_seconds_count", method="GET", route=route
+    ) == 2
+    assert sample(
+        text,
+        "http_requests_total",
+        method="GET",
+        route=UNMATCHED_ROUTE,
+        status="404"
+    ) == 1
+    assert "/services/41" not in text
+
+    # The scrape itself is the one request in flight.
+    assert sample(
+        text, "http_requests_in_progress", method="GET", route="/metrics"
+    ) == 1
+    assert sample(
+        text, "http_requests_in_progress", method="GET", route="/services/"
+    ) == 0
+
+    # Each request reads the table version for its ETag, then the rows.
+    assert sample(
+        text, "db_query_duration_seconds_count", route="/services/"
+    ) == 2
+    assert sample(text, "db_query_duration_seconds_count", route=route) == 4
+
+
+@pytest.mark.asyncio
+async def test_pool_and_queue_gauges(async_client, metrics, monkeypatch):
+    monkeypatch.setattr(utils.metrics, "instrumented_engines", {})
+    engine = make_engine(DatabaseSettings(
+        url="mysql+aiomysql://app:secret@db/car_service", pool_size=3
+    ))
+    instrument_engine(engine, "pooled")
+
+    text = (await async_client.get("/metrics")).text
+
+    assert sample(
+        text, "db_pool_connections", engine="pooled", state="size"
+    ) == 3
+    assert sample(
+        text, "db_pool_connections", engine="pooled", state="checked_out"
+    ) == 0
+    for queue in ("email", "hashing"):
+        assert sample(
+            text, "worker_queue_calls", queue=queue, state="waiting"
+        ) == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_of_other_workers_are_added(
+        async_client,
+        metrics,
+        monkeypatch,
+        tmp_path
+):
+    """Test that a scrape adds up the snapshots of every worker."""
+    await async_client.get("/services/")
+    registry.write_snapshot(str(tmp_path))
+    snapshot = registry.snapshot()
+    snapshot["worker_queue_calls"] = [[["hashing", "waiting"], 4]]
+    for pid in (1, 2):
+        (tmp_path / f"metrics-{pid}.json").write_text(json.dumps(snapshot))
+    # The second worker stopped writing long ago.
+    os.utime(tmp_path / "metrics-2.json", (0, 0))
+    # Other files in the directory are not snapshots.
+    (tmp_path / "settings.json").write_text(json.dumps(snapshot))
+    monkeypatch.setattr(routers.metrics, "METRICS_DIR", str(tmp_path))
+
+    text = (await async_client.get("/metrics")).text
+
+    # This worker's own snapshot is not counted a second time.
+    for name in ("http_requests_total", "http_request_duration_seconds_count"):
+        labels = {"status": "404"} if name == "http_requests_total" else {}
+        assert sample(
+            text, name, method="GET", route="/services/", **labels
+        ) == 3
+    assert sample(
+        text, "worker_queue_calls", queue="hashing", state="waiting"
+    ) == 4
+
+
+def test_server_start_removes_only_snapshots(monkeypatch, tmp_path):
+    """Test that earlier snapshots are cleared and other files kept."""
+    for name in ("metrics-7.json", "metrics-8.json.tmp", "settings.json"):
+        (tmp_path / name).write_text("{}")
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path))
+    monkeypatch.setenv("HASH_WORKERS", "1")
+
+    assert serve.share_out_workers(2) is None
+    assert [path.name for path in tmp_path.iterdir()] == ["settings.json"]
@@ -0,0 +1,117 @@
+import logging
+
+import pytest
+from fastapi import APIRouter, Depends
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import utils.query_budget
+from db.engine import get_async_db
+from main import app
+from utils.query_budget import (
+    QueryBudgetExceeded,
+    query_budget,
+    statement_shape,
+)
+
+router = APIRouter()
+
+
+@router.get("/budget-test/within")
+@query_budget(2)
+async def within_budget(db: AsyncSession = Depends(get_async_db)):
+    await db.execute(text("SELECT 1"))
+    await db.execute(text("SELECT 2"))
+    return {}
+
+
+@router.get("/budget-test/over")
+@query_budget(1)
+async def over_budget(db: AsyncSession = Depends(get_async_db)):
+    await db.execute(text("SELECT 1"))
+    await db.execute(text("SELECT 2"))
+    return {}
+
+
+@router.get("/budget-test/n-plus-one")
+async def n_plus_one(db: AsyncSession = Depends(get_async_db)):
+    for number in range(10):
+        await db.execute(text("SELECT :number"), {"number": number})
+    return {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def test_routes():
+    """Mount endpoints that stay within and break their budgets."""
+    routes = list(app.router.routes)
+    app.include_router(router)
+    yield
+    app.router.routes[:] = routes
+
+
+def test_statement_shape():
+    assert statement_shape(
+        "SELECT *\n  FROM cars WHERE car_id IN (?, ?, ?)"
+    ) == statement_shape("SELECT * FROM cars WHERE car_id IN (?, ?)")
+
+
+@pytest.mark.asyncio
+async def test_within_budget(async_client, request_queries):
+    response = await async_client.get("/budget-test/within")
+    assert response.status_code == 200
+
+    [queries] = request_queries
+    assert queries.route == "/budget-test/within"
+    assert (queries.count, queries.budget) == (2, 2)
+
+
+@pytest.mark.asyncio
+async def test_over_budget_fails_the_test(async_client):
+    with pytest.raises(QueryBudgetExceeded, match="ran 2 statements"):
+        await async_client.get("/budget-test/over")
+
+
+@pytest.mark.asyncio
+async def test_repeated_select_is_flagged(async_client):
+    """Test that a SELECT run once per item is reported as an N+1."""
+    with pytest.raises(QueryBudgetExceeded, match="repeated 10 times"):
+        await async_client.get("/budget-test/n-plus-one")
+
+
+@pytest.mark.asyncio
+async def test_warns_outside_tests(async_client, monkeypatch, caplog):
+    monkeypatch.setattr(utils.query_budget, "QUERY_BUDGET_MODE", "warn")
+
+    with caplog.at_level(logging.WARNING, logger="utils.query_budget"):
+        response = await async_client.get("/budget-test/over")
+
+    assert response.status_code == 200
+    assert "GET /budget-test/over: ran 2 statements, budget is 1" \
+        in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_mechanic_appointments_is_not_n_plus_one(
+        async_client,
+        booking_refs,
+        request_queries
+):
+    """Test that listing appointments loads cars and services eagerly."""
+    for hour in (9, 10, 11, 12, 13, 14, 15):
+        response = await async_client.post("/appointments/", json={
+            "user_id": booking_refs["user"].user_id,
+            "car_id": booking_refs["car"].car_id,
+            "service_id": booking_refs["service"].service_id,
+            "mechanic_id": booking_refs["mechanic"].mechanic_id,
+            "appointment_date": f"2099-01-05T{hour:02}:00:00Z",
+            "status": "PENDING",
+        })
+        assert response.status_code == 201
+    request_queries.clear()
+
+    mechanic_id = booking_refs["mechanic"].mechanic_id
+    response = await async_client.get(
+        f"/mechanics/{mechanic_id}/appointments"
+    )
+    assert len(response.json()) == 7
+    assert request_queries[0].count == 2
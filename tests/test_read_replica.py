@@ -0,0 +1,116 @@
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import db.engine
+from db.engine import Base, make_engine
+from db.routing import PRIMARY_COOKIE
+from db.settings import DatabaseSettings
+from main import app
+from models.services import Service
+
+
+@pytest.fixture
+async def databases(tmp_path, monkeypatch):
+    """Two SQLite files standing in for the primary and a lagging replica."""
+    sessions = {}
+    engines = []
+    for role in ("primary", "replica"):
+        engine = make_engine(
+            DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path}/{role}.db")
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        engines.append(engine)
+        sessions[role] = sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    monkeypatch.setattr(db.engine, "SessionLocal", sessions["primary"])
+    monkeypatch.setattr(db.engine, "ReadSessionLocal", sessions["replica"])
+    yield sessions
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.fixture
+async def client(databases):
+    """A client that talks to the app's real database dependencies."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def add_service(session_factory, name: str) -> Service:
+    async with session_factory() as session:
+        service = Service(name=name, price=50.0, duration=60)
+        session.add(service)
+        await session.commit()
+        return service
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(client, databases):
+    """Test that list and detail reads are served by the replica."""
+    service = await add_service(databases["replica"], "Oil Change")
+
+    response = await client.get("/services/")
+    assert [item["name"] for item in response.json()] == ["Oil Change"]
+
+    response = await client.get(f"/services/{service.service_id}")
+    assert response.status_code == 200
+    assert PRIMARY_COOKIE not in response.cookies
+
+
+@pytest.mark.asyncio
+async def test_writer_reads_its_own_writes(client, databases):
+    """Test that a client reads from the primary right after a write."""
+    response = await client.post("/services/", json={
+        "name": "Tire Rotation", "price": 30.0, "duration": 30
+    })
+    assert response.status_code == 201
+    assert PRIMARY_COOKIE in response.cookies
+    service_id = response.json()["service_id"]
+
+    response = await client.get(f"/services/{service_id}")
+    assert response.status_code == 200
+
+    # Another client still reads the replica, which has not caught up.
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test"
+    ) as other:
+        response = await other.get(f"/services/{service_id}")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bulk_statement_marks_a_write(client, databases):
+    """Test that an INSERT statement, which never flushes, counts."""
+    response = await client.post("/users/bulk", json=[{
+        "name": "John", "email": "john@example.com", "password": "secret123"
+    }])
+    assert response.status_code == 200
+    assert response.json()[0]["user"] is not None
+    assert PRIMARY_COOKIE in response.cookies
+
+    response = await client.get("/users/")
+    assert [user["name"] for user in response.json()] == ["John"]
+
+
+@pytest.mark.asyncio
+async def test_expired_window_reads_replica(client, databases):
+    service = await add_service(databases["primary"], "Oil Change")
+
+    client.cookies.set(PRIMARY_COOKIE, str(time.time() - 1))
+    response = await client.get(f"/services/{service.service_id}")
+    assert response.status_code == 404
+
+    client.cookies.set(PRIMARY_COOKIE, str(time.time() + 60))
+    response = await client.get(f"/services/{service.service_id}")
+    assert response.status_code == 200
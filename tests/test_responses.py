@@ -0,0 +1,27 @@
+import json
+
+import pytest
+from fastapi.responses import ORJSONResponse
+
+from main import app
+
+
+@pytest.mark.asyncio
+async def test_responses_are_rendered_with_orjson(async_client, booking_refs):
+    """Test that router endpoints use the app's orjson response class."""
+    route = next(
+        route for route in app.routes
+        if getattr(route, "path", None) == "/services/"
+        and "GET" in route.methods
+    )
+    assert route.response_class is ORJSONResponse
+
+    response = await async_client.get("/services/")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+    # Same compact, unescaped output as the stdlib renderer produced.
+    body = response.json()
+    assert response.content == json.dumps(
+        body, ensure_ascii=False, separators=(",", ":")
+    ).encode()
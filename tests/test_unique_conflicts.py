@@ -0,0 +1,132 @@
+import pytest
+from datetime import date
+
+from models.car import Car
+from models.mechanics import Mechanic
+from models.services import Service
+from models.users import Users
+
+
+def car_payload(user_id: int, **overrides) -> dict:
+    payload = {
+        "user_id": user_id,
+        "brand": "Honda",
+        "model": "Civic",
+        "year": 2021,
+        "plate_number": "BB5678CC",
+        "vin": "2HGFC2F59MH123456",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def statements_before_insert(query_counter) -> list[str]:
+    return [
+        statement for statement in query_counter
+        if statement.lstrip().upper().startswith("SELECT")
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("field, detail", [
+    ("plate_number", "Car with this plate number already exists."),
+    ("vin", "Car with this VIN already exists."),
+])
+async def test_duplicate_car(
+        async_client,
+        booking_refs,
+        query_counter,
+        field,
+        detail
+):
+    """Test that a taken plate or VIN fails without a pre-check SELECT."""
+    car = booking_refs["car"]
+    query_counter.clear()
+    response = await async_client.post("/cars/", json=car_payload(
+        car.user_id, **{field: getattr(car, field)}
+    ))
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+    assert statements_before_insert(query_counter) == []
+
+
+@pytest.mark.asyncio
+async def test_duplicate_car_on_update(
+        async_client,
+        booking_refs,
+        async_session
+):
+    """Test that updating a car to a taken VIN keeps the message."""
+    other = Car(**car_payload(booking_refs["user"].user_id))
+    async_session.add(other)
+    await async_session.commit()
+
+    response = await async_client.put(
+        f"/cars/{other.car_id}", json={"vin": booking_refs["car"].vin}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Car with this VIN already exists."
+
+
+@pytest.mark.asyncio
+async def test_duplicate_service_name(async_client, async_session):
+    """Test that service names are unique on create and update."""
+    async_session.add_all([
+        Service(name="Oil Change", price=50.0, duration=60),
+        Service(name="Tire Rotation", price=30.0, duration=30),
+    ])
+    await async_session.commit()
+
+    response = await async_client.post("/services/", json={
+        "name": "Oil Change", "price": 10.0, "duration": 15
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == \
+        "A service with the name 'Oil Change' already exists."
+
+    service = (await async_client.get("/services/")).json()[1]
+    response = await async_client.put(
+        f"/services/{service['service_id']}", json={"name": "Oil Change"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_duplicate_mechanic_login(async_client, async_session):
+    """Test that a taken mechanic login keeps its message."""
+    async_session.add(Mechanic(
+        name="Jane",
+        birth_date=date(1990, 1, 1),
+        login="jane",
+        password="hash",
+        position="Technician"
+    ))
+    await async_session.commit()
+
+    response = await async_client.post("/mechanics/", json={
+        "name": "Jane Two",
+        "birth_date": "1991-01-01",
+        "login": "jane",
+        "password": "secret123",
+        "position": "Technician",
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == \
+        "Mechanic with this login already exists."
+
+
+@pytest.mark.asyncio
+async def test_duplicate_user_email(async_client, async_session):
+    """Test that a taken email keeps its message."""
+    async_session.add(
+        Users(name="John", email="john@example.com", password="hash")
+    )
+    await async_session.commit()
+
+    response = await async_client.post("/users/", json={
+        "name": "Johnny",
+        "email": "john@example.com",
+        "password": "secret123",
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already exists."
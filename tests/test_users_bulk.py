@@ -0,0 +1,172 @@
+import json
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+import import_users
+from models.users import Users
+from routers import users as users_router
+from utils.hashing import password_policy
+
+
+def user_payload(number: int, **overrides) -> dict:
+    payload = {
+        "name": f"User {number}",
+        "email": f"user{number}@example.com",
+        "password": "secret123",
+    }
+    payload.update(overrides)
+    return payload
+
+
+async def user_count(async_session) -> int:
+    stmt = select(func.count()).select_from(Users)
+    return (await async_session.execute(stmt)).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_bulk_creates_users(async_client, async_session, monkeypatch):
+    """Test that every valid row is created, inserted in chunks."""
+    monkeypatch.setattr(users_router, "USER_IMPORT_CHUNK_SIZE", 2)
+    response = await async_client.post(
+        "/users/bulk", json=[user_payload(i) for i in range(5)]
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["user"]["email"] for result in results] == [
+        f"user{i}@example.com" for i in range(5)
+    ]
+    assert await user_count(async_session) == 5
+
+    user = (await async_session.execute(
+        select(Users).where(Users.email == "user0@example.com")
+    )).scalar_one()
+    assert password_policy.verify("secret123", user.password)
+
+
+@pytest.mark.asyncio
+async def test_bulk_reports_duplicates(async_client, async_session):
+    """Test that taken or repeated emails and names fail per row."""
+    async_session.add(
+        Users(name="Taken", email="taken@example.com", password="hash")
+    )
+    await async_session.commit()
+
+    response = await async_client.post("/users/bulk", json=[
+        user_payload(1),
+        user_payload(2, email="taken@example.com"),
+        user_payload(3, name="Taken"),
+        user_payload(4, email="user1@example.com"),
+    ])
+    results = response.json()
+    assert results[0]["user"] is not None
+    assert [result["error"] for result in results[1:]] == [
+        "Email already exists.",
+        "Name already exists.",
+        "Email already exists.",
+    ]
+    assert await user_count(async_session) == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_reports_invalid_rows(async_client, async_session):
+    """Test that a row failing validation does not reject the batch."""
+    response = await async_client.post("/users/bulk", json=[
+        user_payload(1),
+        {"email": "not-an-email", "password": "x"},
+        user_payload(3, password="x"),
+        user_payload(4),
+    ])
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert results[0]["user"]["email"] == "user1@example.com"
+    assert results[1]["error"] == "Field required"
+    assert "at least 8 characters" in results[2]["error"]
+    assert results[3]["user"]["email"] == "user4@example.com"
+    assert await user_count(async_session) == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_survives_concurrent_insert(
+        async_client,
+        async_session,
+        monkeypatch
+):
+    """Test that a row taken after the check fails alone."""
+    async_session.add(
+        Users(name="Taken", email="taken@example.com", password="hash")
+    )
+    await async_session.commit()
+
+    async def nothing_taken(emails, names, db):
+        return set(), set()
+
+    monkeypatch.setattr(
+        users_router, "get_taken_emails_and_names", nothing_taken
+    )
+    response = await async_client.post("/users/bulk", json=[
+        user_payload(1),
+        user_payload(2, email="taken@example.com"),
+        user_payload(3),
+    ])
+    results = response.json()
+    assert results[0]["user"] is not None
+    assert results[1]["error"] == "Email already exists."
+    assert results[2]["user"] is not None
+    assert await user_count(async_session) == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_uses_one_uniqueness_query(async_client, query_counter):
+    """Test that uniqueness is checked once for the whole batch."""
+    await async_client.post(
+        "/users/bulk", json=[user_payload(i) for i in range(10)]
+    )
+    selects = [
+        statement for statement in query_counter
+        if statement.lstrip().upper().startswith("SELECT")
+    ]
+    # One uniqueness check and one read-back of the inserted users.
+    assert len(selects) == 2
+
+
+@pytest.mark.asyncio
+async def test_largest_import_fits_the_budget(
+        async_client,
+        async_session,
+        monkeypatch,
+        request_queries
+):
+    """Test that an import of the most rows in the most chunks passes."""
+    class FastHasher:
+        async def hash_many(self, passwords):
+            return ["hash"] * len(passwords)
+
+    monkeypatch.setattr(users_router, "get_hasher", FastHasher)
+    response = await async_client.post("/users/bulk", json=[
+        user_payload(i) for i in range(users_router.USER_IMPORT_MAX_ROWS)
+    ])
+    assert response.status_code == 200
+    assert all(result["user"] for result in response.json())
+    assert await user_count(async_session) == \
+        users_router.USER_IMPORT_MAX_ROWS
+    [queries] = request_queries
+    assert queries.count == users_router.USER_IMPORT_QUERY_BUDGET
+
+
+def test_cli_reads_csv_and_json(tmp_path):
+    """Test that the import script accepts CSV and JSON files."""
+    csv_path = tmp_path / "users.csv"
+    csv_path.write_text(
+        "name,email,password,role\n"
+        "John,john@example.com,secret123,\n"
+    )
+    json_path = tmp_path / "users.json"
+    json_path.write_text(json.dumps([user_payload(1)]))
+
+    assert import_users.read_rows(str(csv_path)) == [{
+        "name": "John", "email": "john@example.com", "password": "secret123"
+    }]
+    assert import_users.read_rows(str(json_path)) == [user_payload(1)]
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from utils.availability import availability_index
+from utils.warmup import open_connections, preload_reference_data
+
+
+@pytest.mark.asyncio
+async def test_open_connections_fills_the_pool(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'warmup.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=3
+    )
+    try:
+        await open_connections(engine, 3)
+        assert engine.pool.checkedin() == 3
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_preload_serves_calendars_without_queries(
+        async_engine,
+        async_session,
+        booking_refs,
+        query_counter
+):
+    """Test that the first availability lookup after warm-up is cached."""
+    availability_index.invalidate()
+    Session = sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+    assert await preload_reference_data(Session) == 1
+
+    query_counter.clear()
+    mechanic_id = booking_refs["mechanic"].mechanic_id
+    await availability_index.calendars([mechanic_id], async_session)
+    assert query_counter == []
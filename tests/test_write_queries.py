@@ -0,0 +1,170 @@
+import pytest
+
+import routers.documents
+from tests.test_appointment_booking import booking_payload
+from tests.test_appointments_bulk import at
+
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+def selects_after_write(query_counter) -> list[str]:
+    """SELECTs issued after the first statement that wrote a row."""
+    verbs = [
+        statement.lstrip().split(None, 1)[0].upper()
+        for statement in query_counter
+    ]
+    first_write = next(
+        (i for i, verb in enumerate(verbs) if verb in WRITES), None
+    )
+    assert first_write is not None, "the request wrote nothing"
+    return [
+        query_counter[i] for i, verb in enumerate(verbs)
+        if i > first_write and verb == "SELECT"
+    ]
+
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(routers.documents, "UPLOAD_FOLDER", str(tmp_path))
+
+
+def user_payload(**overrides) -> dict:
+    payload = {
+        "name": "Mary",
+        "email": "mary@example.com",
+        "password": "secret123",
+        "role": "CUSTOMER",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def mechanic_payload(**overrides) -> dict:
+    payload = {
+        "name": "Bob",
+        "birth_date": "1985-05-05",
+        "login": "bob",
+        "password": "secret123",
+        "position": "Technician",
+    }
+    payload.update(overrides)
+    return payload
+
+
+async def create_document(async_client, booking_refs, name="a.pdf"):
+    return await async_client.post(
+        "/documents/",
+        data={
+            "mechanic_id": booking_refs["mechanic"].mechanic_id,
+            "type": "passport",
+        },
+        files={"file": (name, b"%PDF-1.4", "application/pdf")},
+    )
+
+
+async def create_appointment(async_client, booking_refs):
+    return await async_client.post("/appointments/", json=booking_payload(
+        booking_refs, appointment_date=at(2, 9)
+    ))
+
+
+WRITE_REQUESTS = {
+    "create user": lambda client, refs: client.post(
+        "/users/", json=user_payload()
+    ),
+    "update user": lambda client, refs: client.put(
+        f"/users/{refs['user'].user_id}",
+        json={"name": "Johnny", "email": refs["user"].email},
+    ),
+    "create car": lambda client, refs: client.post("/cars/", json={
+        "user_id": refs["user"].user_id,
+        "brand": "Honda",
+        "model": "Civic",
+        "year": 2021,
+        "plate_number": "BB5678CC",
+        "vin": "2HGFC2F59MH123456",
+    }),
+    "update car": lambda client, refs: client.put(
+        f"/cars/{refs['car'].car_id}", json={"year": 2022}
+    ),
+    "create service": lambda client, refs: client.post("/services/", json={
+        "name": "Tire Rotation", "price": 30.0, "duration": 30
+    }),
+    "update service": lambda client, refs: client.put(
+        f"/services/{refs['service'].service_id}", json={"price": 55.0}
+    ),
+    "create mechanic": lambda client, refs: client.post(
+        "/mechanics/", json=mechanic_payload()
+    ),
+    "update mechanic": lambda client, refs: client.put(
+        f"/mechanics/{refs['mechanic'].mechanic_id}",
+        json={"position": "Senior Technician"},
+    ),
+    "create appointment": create_appointment,
+    "create document": create_document,
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", list(WRITE_REQUESTS))
+async def test_no_select_after_write(
+        async_client,
+        booking_refs,
+        query_counter,
+        upload_folder,
+        name
+):
+    """Test that the response is built without reading the row back."""
+    query_counter.clear()
+    response = await WRITE_REQUESTS[name](async_client, booking_refs)
+    assert response.status_code in (200, 201), response.text
+    assert selects_after_write(query_counter) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method, path, body", [
+    ("put", "", {"status": "COMPLETED"}),
+    ("patch", "/status?status=COMPLETED", None),
+])
+async def test_no_select_after_appointment_update(
+        async_client,
+        booking_refs,
+        query_counter,
+        method,
+        path,
+        body
+):
+    """Test that appointment updates return without a refresh SELECT."""
+    created = (await create_appointment(async_client, booking_refs)).json()
+    query_counter.clear()
+    response = await async_client.request(
+        method.upper(),
+        f"/appointments/{created['appointment_id']}{path}",
+        json=body,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "COMPLETED"
+    assert selects_after_write(query_counter) == []
+
+
+@pytest.mark.asyncio
+async def test_no_select_after_document_update(
+        async_client,
+        booking_refs,
+        query_counter,
+        upload_folder
+):
+    """Test that replacing a document returns without a refresh SELECT."""
+    created = (await create_document(async_client, booking_refs)).json()
+    query_counter.clear()
+    response = await async_client.put(
+        f"/documents/{created['document_id']}",
+        data={
+            "mechanic_id": booking_refs["mechanic"].mechanic_id,
+            "type": "license",
+        },
+        files={"file": ("b.pdf", b"%PDF-1.4", "application/pdf")},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["type"] == "license"
+    assert selects_after_write(query_counter) == []
@@ -0,0 +1,338 @@
+import heapq
+import itertools
+import os
+import time as clock
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+from typing import Hashable, Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+
+from models.appointments import Appointment, AppointmentStatus
+from models.mechanics import Mechanic
+from models.services import Service
+from utils.dates import utcnow
+
+load_dotenv()
+
+WORKDAY_START = time.fromisoformat(os.getenv("WORKDAY_START", "09:00"))
+WORKDAY_END = time.fromisoformat(os.getenv("WORKDAY_END", "18:00"))
+AVAILABILITY_CACHE_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL", 30))
+SLOT_STEP_MINUTES = int(os.getenv("SLOT_STEP_MINUTES", 15))
+SLOT_SEARCH_DAYS = int(os.getenv("SLOT_SEARCH_DAYS", 60))
+
+# Appointments that started this long ago may still be running.
+LOOKBACK = timedelta(days=1)
+
+
+class MechanicCalendar:
+    """
+    Booked `[start, end)` intervals of one mechanic, kept sorted by start.
+    Intervals may overlap, e.g. rows booked before overlaps were checked,
+    so lookups scan back as far as the longest booking could reach.
+    """
+
+    def __init__(self):
+        self._starts: list[datetime] = []
+        self._ends: list[datetime] = []
+        self._keys: list[Hashable] = []
+        self._by_key: dict[Hashable, datetime] = {}
+        self._longest = timedelta(0)
+        self.loaded_at = clock.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def add(self, key: Hashable, start: datetime, end: datetime):
+        """Book `[start, end)` under `key`, replacing any previous booking."""
+        self.remove(key)
+        index = bisect_right(self._starts, start)
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        self._keys.insert(index, key)
+        self._by_key[key] = start
+        self._longest = max(self._longest, end - start)
+
+    def remove(self, key: Hashable):
+        """Drop the booking stored under `key`, if any."""
+        start = self._by_key.pop(key, None)
+        if start is None:
+            return
+        index = bisect_left(self._starts, start)
+        while self._keys[index] != key:
+            index += 1
+        del self._starts[index]
+        del self._ends[index]
+        del self._keys[index]
+
+    def is_free(
+            self,
+            start: datetime,
+            end: datetime,
+            ignore: Optional[Hashable] = None
+    ) -> bool:
+        """Whether `[start, end)` overlaps no booking other than `ignore`."""
+        first = bisect_left(self._starts, start - self._longest)
+        for index in range(bisect_left(self._starts, end) - 1, first - 1, -1):
+            if self._ends[index] > start and self._keys[index] != ignore:
+                return False
+        return True
+
+    def free_slots(
+            self,
+            window_start: datetime,
+            window_end: datetime
+    ) -> list[tuple[datetime, datetime]]:
+        """Gaps between bookings inside `[window_start, window_end)`."""
+        slots = []
+        cursor = window_start
+        index = bisect_left(self._starts, window_start - self._longest)
+        while index < len(self._starts) and self._starts[index] < window_end:
+            if self._starts[index] > cursor:
+                slots.append((cursor, self._starts[index]))
+            cursor = max(cursor, self._ends[index])
+            index += 1
+        if cursor < window_end:
+            slots.append((cursor, window_end))
+        return slots
+
+
+def working_hours(day) -> tuple[datetime, datetime]:
+    """Start and end of the working day `day`."""
+    return (
+        datetime.combine(day, WORKDAY_START),
+        datetime.combine(day, WORKDAY_END),
+    )
+
+
+def _round_up(value: datetime, step: timedelta) -> datetime:
+    """Round `value` up to the next multiple of `step` since midnight."""
+    midnight = datetime.combine(value.date(), time())
+    steps = -(-(value - midnight) // step)
+    return midnight + steps * step
+
+
+def _candidate_starts(
+        calendar: MechanicCalendar,
+        duration: timedelta,
+        window_start: datetime,
+        window_end: datetime,
+        step: timedelta
+) -> Iterator[datetime]:
+    """Yield, in order, every start time in the window where the job fits."""
+    for gap_start, gap_end in calendar.free_slots(window_start, window_end):
+        start = _round_up(gap_start, step)
+        while start + duration <= gap_end:
+            yield start
+            start += step
+
+
+def next_free_slots(
+        calendars: dict[int, MechanicCalendar],
+        duration: int,
+        after: datetime,
+        count: int,
+        step_minutes: int = SLOT_STEP_MINUTES,
+        days: int = SLOT_SEARCH_DAYS
+) -> list[tuple[int, datetime, datetime]]:
+    """
+    The first `count` `(mechanic_id, start, end)` slots across all
+    `calendars` where a job of `duration` minutes fits, earliest first.
+    Days are searched in order and every mechanic's gaps for a day are
+    merged lazily by start time, so the search stops at the first day
+    that completes the answer.
+    """
+    length = timedelta(minutes=duration)
+    step = timedelta(minutes=step_minutes)
+    slots = []
+    for offset in range(days):
+        day_start, day_end = working_hours(after.date() + timedelta(offset))
+        day_start = max(day_start, after)
+        if day_start >= day_end:
+            continue
+
+        streams = [
+            zip(
+                _candidate_starts(
+                    calendar, length, day_start, day_end, step
+                ),
+                itertools.repeat(mechanic_id)
+            )
+            for mechanic_id, calendar in sorted(calendars.items())
+        ]
+        merged = heapq.merge(*streams)
+        slots.extend(
+            (mechanic_id, start, start + length)
+            for start, mechanic_id in itertools.islice(
+                merged, count - len(slots)
+            )
+        )
+        if len(slots) == count:
+            break
+    return slots
+
+
+def build_calendar_query(
+        mechanic_ids: list[int],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+) -> Select:
+    """
+    Select the active bookings of the mechanics with their durations,
+    only those that may overlap `[start, end)` if given.
+    """
+    stmt = (
+        select(
+            Appointment.mechanic_id,
+            Appointment.appointment_id,
+            Appointment.appointment_date,
+            Service.duration,
+        )
+        .join(Service, Service.service_id == Appointment.service_id)
+        .where(
+            Appointment.mechanic_id.in_(mechanic_ids),
+            Appointment.status != AppointmentStatus.CANCELED,
+            Appointment.appointment_date >= utcnow() - LOOKBACK,
+        )
+    )
+    if start is not None:
+        stmt = stmt.where(Appointment.appointment_date >= start - LOOKBACK)
+    if end is not None:
+        stmt = stmt.where(Appointment.appointment_date < end)
+    return stmt
+
+
+async def load_calendars(
+        mechanic_ids: list[int],
+        db: AsyncSession,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+) -> dict[int, MechanicCalendar]:
+    """Read the mechanics' calendars from the database with one query."""
+    calendars = {
+        mechanic_id: MechanicCalendar() for mechanic_id in mechanic_ids
+    }
+    if not calendars:
+        return calendars
+    rows = await db.execute(build_calendar_query(mechanic_ids, start, end))
+    for mechanic_id, appointment_id, booked_at, duration in rows:
+        calendars[mechanic_id].add(
+            appointment_id, booked_at, booked_at + timedelta(minutes=duration)
+        )
+    return calendars
+
+
+async def lock_mechanics(mechanic_ids: Iterable[int], db: AsyncSession):
+    """
+    Lock the mechanics' rows until the transaction ends, so bookings of a
+    mechanic are checked and committed one at a time across all workers.
+    Rows are locked in ID order so concurrent batches cannot deadlock.
+    """
+    mechanic_ids = sorted(mechanic_ids)
+    if not mechanic_ids:
+        return
+    stmt = (
+        select(Mechanic.mechanic_id)
+        .where(Mechanic.mechanic_id.in_(mechanic_ids))
+        .order_by(Mechanic.mechanic_id)
+        .with_for_update()
+    )
+    await db.execute(stmt)
+
+
+class AvailabilityIndex:
+    """
+    Process-wide cache of mechanic calendars for the free-slot searches.
+    A calendar is loaded from the database on first use, kept up to date
+    by this process's writes and reloaded after `ttl` seconds to pick up
+    other workers' bookings. It may be that stale, so bookings are never
+    checked against it; see `lock_mechanics` and `load_calendars`.
+    """
+
+    def __init__(self, ttl: float = AVAILABILITY_CACHE_TTL):
+        self.ttl = ttl
+        self._calendars: dict[int, MechanicCalendar] = {}
+
+    async def calendar(
+            self,
+            mechanic_id: int,
+            db: AsyncSession
+    ) -> MechanicCalendar:
+        """Return the mechanic's calendar, loading it if missing or stale."""
+        calendar = self._calendars.get(mechanic_id)
+        if calendar is None or self._is_stale(calendar):
+            await self._load([mechanic_id], db)
+        return self._calendars[mechanic_id]
+
+    async def all_calendars(
+            self,
+            db: AsyncSession
+    ) -> dict[int, MechanicCalendar]:
+        """
+        Return the calendar of every mechanic, loading all missing or
+        stale ones with a single query.
+        """
+        stmt = select(Mechanic.mechanic_id)
+        mechanic_ids = (await db.execute(stmt)).scalars().all()
+        return await self.calendars(mechanic_ids, db)
+
+    async def calendars(
+            self,
+            mechanic_ids: Iterable[int],
+            db: AsyncSession
+    ) -> dict[int, MechanicCalendar]:
+        """
+        Return the calendars of the given mechanics, loading all missing
+        or stale ones with a single query.
+        """
+        mechanic_ids = list(mechanic_ids)
+        missing = [
+            mechanic_id for mechanic_id in mechanic_ids
+            if mechanic_id not in self._calendars
+            or self._is_stale(self._calendars[mechanic_id])
+        ]
+        if missing:
+            await self._load(missing, db)
+        return {
+            mechanic_id: self._calendars[mechanic_id]
+            for mechanic_id in mechanic_ids
+        }
+
+    def _is_stale(self, calendar: MechanicCalendar) -> bool:
+        return clock.monotonic() - calendar.loaded_at > self.ttl
+
+    async def _load(self, mechanic_ids: list[int], db: AsyncSession):
+        self._calendars.update(await load_calendars(mechanic_ids, db))
+
+    def record(
+            self,
+            mechanic_id: int,
+            appointment_id: int,
+            start: datetime,
+            duration: int
+    ):
+        """Add a committed booking to the mechanic's cached calendar."""
+        calendar = self._calendars.get(mechanic_id)
+        if calendar is not None:
+            calendar.add(
+                appointment_id, start, start + timedelta(minutes=duration)
+            )
+
+    def forget(self, mechanic_id: Optional[int], appointment_id: int):
+        """Remove a booking that was canceled, moved or deleted."""
+        calendar = self._calendars.get(mechanic_id)
+        if calendar is not None:
+            calendar.remove(appointment_id)
+
+    def invalidate(self, mechanic_id: Optional[int] = None):
+        """Drop one cached calendar, or all of them."""
+        if mechanic_id is None:
+            self._calendars.clear()
+        else:
+            self._calendars.pop(mechanic_id, None)
+
+
+availability_index = AvailabilityIndex()
@@ -0,0 +1,110 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 1024))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 4096))
+PRINCIPAL_CACHE_CHECK_INTERVAL = float(
+    os.getenv("PRINCIPAL_CACHE_CHECK_INTERVAL", 1)
+)
+
+
+class TTLCache:
+    """
+    LRU cache of at most `maxsize` entries, each of which also expires
+    `ttl` seconds after it was set or at an explicit `expires_at`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[object, float]] = \
+            OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        """Return the live value under `key`, marking it recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(
+            self,
+            key: Hashable,
+            value,
+            expires_at: Optional[float] = None
+    ):
+        """
+        Store `value` until `expires_at` (a UNIX timestamp) or for `ttl`
+        seconds, whichever comes first, evicting the least recently used
+        entry when full.
+        """
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        self._entries[key] = (value, deadline)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """Drop the entry under `key`, if any."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class VersionedCache(TTLCache):
+    """
+    TTL cache that is emptied whenever the version of the data it holds
+    changes. The caller reads the version, e.g. a table version, when
+    `needs_check` says so, at most every `check_interval` seconds, and
+    passes it to `check`. Writes made by any process are seen within
+    that interval.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, check_interval: float):
+        super().__init__(maxsize, ttl)
+        self.check_interval = check_interval
+        self.version = None
+        self._checked_at = float("-inf")
+
+    def needs_check(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def check(self, version):
+        """Record the current version, dropping every entry if it moved."""
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+        self._checked_at = time.monotonic()
+
+    def clear(self):
+        super().clear()
+        self.version = None
+        self._checked_at = float("-inf")
+
+
+# Users by ID, so authenticated requests skip the user SELECT. Each worker
+# has its own cache; it is emptied when the users table version changes.
+principal_cache = VersionedCache(
+    PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_CHECK_INTERVAL
+)
+
+# User IDs of verified tokens by token hash, kept until the token expires.
+token_cache = TTLCache(TOKEN_CACHE_SIZE, float("inf"))
@@ -0,0 +1,245 @@
+"""
+Negotiated response compression.
+
+Responses of a text or JSON type of at least `COMPRESSION_MIN_SIZE`
+bytes are compressed with the best encoding the client accepts: zstd,
+then Brotli, then gzip. zstd and Brotli are offered only when the
+`zstandard` and `Brotli` packages are installed. Streamed responses are
+compressed chunk by chunk as they are sent. Bodies and chunks of at
+least `COMPRESSION_THREAD_MIN_SIZE` bytes are compressed in a thread,
+so a large list does not hold up the other requests of the worker.
+"""
+import asyncio
+import os
+import zlib
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+load_dotenv()
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_THREAD_MIN_SIZE = int(
+    os.getenv("COMPRESSION_THREAD_MIN_SIZE", 256 * 1024)
+)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3))
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+
+class GzipEncoder:
+    def __init__(self, level: int = COMPRESSION_GZIP_LEVEL):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        compressed = self._compressor.compress(data)
+        if flush:
+            compressed += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return compressed
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int = COMPRESSION_BROTLI_QUALITY):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        compressed = self._compressor.process(data)
+        if flush:
+            compressed += self._compressor.flush()
+        return compressed
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int = COMPRESSION_ZSTD_LEVEL):
+        self._compressor = zstandard.ZstdCompressor(
+            level=level
+        ).compressobj()
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        compressed = self._compressor.compress(data)
+        if flush:
+            compressed += self._compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+        return compressed
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# In order of preference when the client accepts several equally.
+ENCODERS: dict[str, Callable] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+ENCODERS["gzip"] = GzipEncoder
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """The codings in an Accept-Encoding header with their q-values."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """The preferred available encoding the client accepts, if any."""
+    accepted = accepted_encodings(header)
+    best, best_quality = None, 0.0
+    for encoding in ENCODERS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers or "content-range" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    media_type = content_type.partition(";")[0].strip()
+    return media_type.startswith(COMPRESSIBLE_TYPES) \
+        or media_type.endswith(("+json", "+xml"))
+
+
+class CompressionMiddleware:
+    """Compress large text and JSON responses, including streamed ones."""
+
+    def __init__(
+            self,
+            app,
+            minimum_size: int = COMPRESSION_MIN_SIZE,
+            thread_minimum_size: int = COMPRESSION_THREAD_MIN_SIZE
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+
+    async def run(self, func: Callable, data: bytes) -> bytes:
+        if len(data) < self.thread_minimum_size:
+            return func(data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, data)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # E.g. the pathsend extension; leave the response as is.
+                if encoder is None:
+                    passthrough = True
+                    await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is not None:
+                # A later chunk of a streamed response.
+                body = await self.run(encoder.compress, body)
+                if not more_body:
+                    body += encoder.finish()
+                await send({
+                    "type": "http.response.body",
+                    "body": body,
+                    "more_body": more_body,
+                })
+                return
+
+            headers = MutableHeaders(scope=start)
+            if "content-length" in headers:
+                size = int(headers["content-length"])
+            else:
+                # A stream of unknown length is assumed to be large.
+                size = self.minimum_size if more_body else len(body)
+            if not is_compressible(headers) or size < self.minimum_size:
+                passthrough = True
+            else:
+                headers.add_vary_header("Accept-Encoding")
+                passthrough = encoding is None
+            if passthrough:
+                await send(start)
+                await send(message)
+                return
+
+            encoder = ENCODERS[encoding]()
+            headers["Content-Encoding"] = encoding
+            # The compressed body is a different representation, so its
+            # tag can only be weak; If-None-Match still compares it.
+            etag = headers.get("etag")
+            if etag is not None and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+
+            if more_body:
+                del headers["Content-Length"]
+                body = await self.run(encoder.compress, body)
+            else:
+                body = await self.run(
+                    lambda data: encoder.compress(data, flush=False)
+                    + encoder.finish(),
+                    body
+                )
+                headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({
+                "type": "http.response.body",
+                "body": body,
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
@@ -1,8 +1,11 @@
+import asyncio
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import formataddr
+from typing import Iterable, Optional
 
+import aiosmtplib
 from dotenv import load_dotenv
 import os
 
@@ -10,26 +13,191 @@ load_dotenv()
 
 SMTP_SERVER = os.getenv("SMTP_SERVER")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_START_TLS = os.getenv("SMTP_START_TLS", "true").lower() == "true"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 4))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
 EMAIL_USERNAME = os.getenv("EMAIL_USERNAME")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 
 
-def send_email(to_email: str, subject: str, body: str):
-    try:
+def build_message(
+        to_email: str,
+        subject: str,
+        body: str,
+        from_email: Optional[str] = None
+) -> MIMEMultipart:
+    """Build a plain-text message sent from the service mailbox."""
+    msg = MIMEMultipart()
+    msg['From'] = formataddr(
+        ("Car Service API", from_email or EMAIL_USERNAME)
+    )
+    msg['To'] = to_email
+    msg['Subject'] = subject
 
-        msg = MIMEMultipart()
-        msg['From'] = formataddr(("Car Service API", EMAIL_USERNAME))
-        msg['To'] = to_email
-        msg['Subject'] = subject
+    msg.attach(MIMEText(body, "plain"))
+    return msg
 
-        msg.attach(MIMEText(body, "plain"))
 
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
+def deliver_email(to_email: str, subject: str, body: str):
+    """
+    Send a single email over a fresh connection, raising on any SMTP
+    failure. Blocks the calling thread; prefer `SMTPTransport` in
+    async code.
+    """
+    msg = build_message(to_email, subject, body)
+
+    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
+        if SMTP_START_TLS:
             server.starttls()
+        if EMAIL_USERNAME:
             server.login(EMAIL_USERNAME, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_USERNAME, to_email, msg.as_string())
+        server.sendmail(EMAIL_USERNAME, to_email, msg.as_string())
+
 
+def send_email(to_email: str, subject: str, body: str):
+    try:
+        deliver_email(to_email, subject, body)
         print(f"Email sent to {to_email}")
 
     except Exception as e:
         print(f"Error sending email: {e}")
+
+
+class SMTPTransport:
+    """
+    Async SMTP client that keeps up to `pool_size` authenticated sessions
+    open and reuses them across messages. At most `pool_size` messages
+    are in flight at once; further sends wait for a free session.
+    """
+
+    def __init__(
+            self,
+            hostname: Optional[str] = None,
+            port: Optional[int] = None,
+            username: Optional[str] = None,
+            password: Optional[str] = None,
+            start_tls: Optional[bool] = None,
+            pool_size: Optional[int] = None,
+            timeout: Optional[float] = None,
+            from_email: Optional[str] = None
+    ):
+        self.hostname = hostname or SMTP_SERVER
+        self.port = port or SMTP_PORT
+        self.username = username if username is not None else EMAIL_USERNAME
+        self.password = password if password is not None else EMAIL_PASSWORD
+        self.start_tls = SMTP_START_TLS if start_tls is None else start_tls
+        self.pool_size = pool_size or SMTP_POOL_SIZE
+        self.timeout = timeout or SMTP_TIMEOUT
+        self.from_email = from_email or self.username
+
+        self._slots = asyncio.Semaphore(self.pool_size)
+        self._idle: list[aiosmtplib.SMTP] = []
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username or None,
+            password=self.password if self.username else None,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        return client
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client = self._idle.pop()
+            if client.is_connected:
+                return client
+        return await self._connect()
+
+    @staticmethod
+    def _discard(client: aiosmtplib.SMTP):
+        if client.is_connected:
+            client.close()
+
+    def stats(self) -> dict[str, int]:
+        """Pool size and the number of sending and queued messages."""
+        return {
+            "pool_size": self.pool_size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+        }
+
+    async def send(self, to_email: str, subject: str, body: str):
+        """Send one email on a pooled session, raising on failure."""
+        msg = build_message(to_email, subject, body, self.from_email)
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            client = await self._acquire()
+            try:
+                try:
+                    await client.send_message(msg)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The server dropped an idle session; retry on a new one.
+                    self._discard(client)
+                    client = await self._connect()
+                    await client.send_message(msg)
+            except BaseException:
+                self._discard(client)
+                raise
+            self._idle.append(client)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def send_many(
+            self,
+            messages: Iterable[tuple[str, str, str]]
+    ) -> list[Optional[Exception]]:
+        """
+        Send `(to_email, subject, body)` tuples concurrently within the
+        pool limit. Returns one entry per message: `None` on success or
+        the exception that message failed with.
+        """
+        results = await asyncio.gather(
+            *(self.send(*message) for message in messages),
+            return_exceptions=True,
+        )
+        return [
+            result if isinstance(result, Exception) else None
+            for result in results
+        ]
+
+    async def close(self):
+        """Politely end every idle session."""
+        idle, self._idle = self._idle, []
+        for client in idle:
+            try:
+                await client.quit()
+            except aiosmtplib.SMTPException:
+                self._discard(client)
+
+
+_transport: Optional[SMTPTransport] = None
+
+
+def get_transport() -> SMTPTransport:
+    """Return the process-wide SMTP transport, creating it on first use."""
+    global _transport
+    if _transport is None:
+        _transport = SMTPTransport()
+    return _transport
+
+
+async def close_transport():
+    """Close the process-wide SMTP transport, if it was created."""
+    global _transport
+    if _transport is not None:
+        await _transport.close()
+        _transport = None
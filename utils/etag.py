@@ -0,0 +1,44 @@
+from typing import Callable
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.engine import get_async_read_db
+from db.versions import table_versions
+
+
+def if_none_match(request: Request) -> set[str]:
+    """The entity tags in the request's If-None-Match header."""
+    header = request.headers.get("if-none-match", "")
+    return {
+        tag.strip().removeprefix("W/") for tag in header.split(",")
+        if tag.strip()
+    }
+
+
+def table_etag(*table_names: str) -> Callable:
+    """
+    Dependency that tags the response with the versions of the tables
+    it is built from, and answers 304 Not Modified without running the
+    endpoint when the client already has that version.
+
+    The versions are read before the endpoint's own queries, so a write
+    in between can only make the tag older than the body, never newer.
+    """
+    async def check_etag(
+            request: Request,
+            response: Response,
+            db: AsyncSession = Depends(get_async_read_db)
+    ):
+        versions = await table_versions(db, table_names)
+        if versions is None:
+            return
+        etag = '"' + "-".join(
+            f"{name}.{versions[name]}" for name in table_names
+        ) + '"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in if_none_match(request):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return check_etag
@@ -0,0 +1,336 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+import aiofiles
+from dotenv import load_dotenv
+from sqlalchemy import func, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+
+from db.engine import SessionLocal
+from models.appointments import Appointment
+from models.export_jobs import ExportFormat, ExportJob, ExportStatus
+from utils.dates import utcnow
+
+load_dotenv()
+
+EXPORT_FOLDER = os.getenv("EXPORT_FOLDER", "exported_files/")
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 1000))
+EXPORT_COMPRESSION_LEVEL = int(os.getenv("EXPORT_COMPRESSION_LEVEL", 6))
+EXPORT_RUNNER_ENABLED = (
+    os.getenv("EXPORT_RUNNER_ENABLED", "true").lower() == "true"
+)
+EXPORT_POLL_INTERVAL = float(os.getenv("EXPORT_POLL_INTERVAL", 10))
+# A job still running this long after it started is taken to have been
+# abandoned by a worker that crashed or was killed.
+EXPORT_TIMEOUT = int(os.getenv("EXPORT_TIMEOUT", 3600))
+INTERRUPTED_MESSAGE = "Export was interrupted."
+
+EXPORT_COLUMNS = (
+    Appointment.appointment_id,
+    Appointment.user_id,
+    Appointment.car_id,
+    Appointment.service_id,
+    Appointment.mechanic_id,
+    Appointment.appointment_date,
+    Appointment.status,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+logger = logging.getLogger(__name__)
+
+
+def build_export_query(
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> Select:
+    """
+    Select the exported appointment columns in keyset order, fetched
+    `chunk_rows` at a time from a server-side cursor.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .order_by(Appointment.appointment_date, Appointment.appointment_id)
+        .execution_options(yield_per=chunk_rows)
+    )
+    if date_from is not None:
+        stmt = stmt.where(Appointment.appointment_date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Appointment.appointment_date < date_to)
+    return stmt
+
+
+def _plain(value):
+    """Value as it is written to the file."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+
+def encode_rows(rows: Sequence[Row], export_format: ExportFormat) -> bytes:
+    """Serialize a chunk of rows as JSON lines or CSV records."""
+    if export_format == ExportFormat.JSONL:
+        lines = (
+            json.dumps(dict(zip(EXPORT_FIELDS, map(_plain, row))))
+            for row in rows
+        )
+        return "".join(line + "\n" for line in lines).encode()
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [_plain(value) for value in row] for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+def csv_header() -> bytes:
+    """First line of a CSV export."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_FIELDS)
+    return buffer.getvalue().encode()
+
+
+def export_path(job: ExportJob) -> str:
+    """Where the finished export of `job` is stored."""
+    return os.path.join(
+        EXPORT_FOLDER,
+        f"appointments-{job.export_id}.{job.format.value}.gz"
+    )
+
+
+async def write_export(
+        db: AsyncSession,
+        job: ExportJob,
+        path: str,
+        chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> int:
+    """
+    Stream the appointments selected by `job` into a gzip file at `path`.
+    Rows are fetched, encoded and compressed one chunk at a time, so
+    memory use does not depend on the size of the table. Returns the
+    number of rows written.
+    """
+    # wbits=31 makes zlib write a gzip header and trailer.
+    compressor = zlib.compressobj(EXPORT_COMPRESSION_LEVEL, wbits=31)
+    stmt = build_export_query(job.date_from, job.date_to, chunk_rows)
+    row_count = 0
+
+    async with aiofiles.open(path, "wb") as file:
+        if job.format == ExportFormat.CSV:
+            await file.write(compressor.compress(csv_header()))
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            data = compressor.compress(encode_rows(rows, job.format))
+            if data:
+                await file.write(data)
+            row_count += len(rows)
+        await file.write(compressor.flush())
+    return row_count
+
+
+async def claim_export(
+        db: AsyncSession,
+        export_id: int
+) -> Optional[ExportJob]:
+    """
+    Mark a pending job as running and return it; None if it does not
+    exist or was claimed already. The claim is one conditional UPDATE,
+    so a job runs once however many workers try to start it.
+    """
+    result = await db.execute(
+        update(ExportJob)
+        .where(
+            ExportJob.export_id == export_id,
+            ExportJob.status == ExportStatus.PENDING
+        )
+        .values(status=ExportStatus.RUNNING, started_at=utcnow())
+    )
+    await db.commit()
+    if result.rowcount != 1:
+        return None
+    return await db.get(ExportJob, export_id)
+
+
+async def run_export(export_id: int, session_factory: async_sessionmaker):
+    """
+    Run an export job to completion, recording its outcome. If the task
+    is cancelled, as on shutdown, the job is put back in the queue.
+    """
+    async with session_factory() as db:
+        job = await claim_export(db, export_id)
+        if job is None:
+            return
+
+        os.makedirs(EXPORT_FOLDER, exist_ok=True)
+        path = export_path(job)
+        # Write under a temporary name so a download never sees a
+        # partial file.
+        partial_path = path + ".part"
+        try:
+            row_count = await write_export(db, job, partial_path)
+            os.replace(partial_path, path)
+        except asyncio.CancelledError:
+            await db.rollback()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            job.status = ExportStatus.PENDING
+            job.started_at = None
+            await db.commit()
+            raise
+        except Exception as e:
+            logger.exception("Export %s failed.", export_id)
+            await db.rollback()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            job.status = ExportStatus.FAILED
+            job.error = str(e)[:255]
+        else:
+            job.status = ExportStatus.COMPLETED
+            job.file_path = path
+            job.row_count = row_count
+        job.finished_at = utcnow()
+        await db.commit()
+
+
+async def fail_abandoned_exports(db: AsyncSession) -> int:
+    """
+    Mark jobs running for longer than `EXPORT_TIMEOUT` as failed, and
+    return how many there were.
+    """
+    started_before = utcnow() - timedelta(seconds=EXPORT_TIMEOUT)
+    result = await db.execute(
+        update(ExportJob)
+        .where(
+            ExportJob.status == ExportStatus.RUNNING,
+            # Jobs started before `started_at` was recorded.
+            func.coalesce(ExportJob.started_at, ExportJob.created_at)
+            < started_before
+        )
+        .values(
+            status=ExportStatus.FAILED,
+            error=INTERRUPTED_MESSAGE,
+            finished_at=utcnow()
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def run_export_queue(
+        stop_event: Optional[asyncio.Event] = None,
+        session_factory: async_sessionmaker = SessionLocal,
+        wake_event: Optional[asyncio.Event] = None
+):
+    """
+    Until `stop_event` is set, fail abandoned jobs and run pending ones,
+    oldest first, then wait for `wake_event` or the next poll. Pending
+    jobs of a worker that stopped first are picked up the same way.
+    """
+    stop_event = stop_event or asyncio.Event()
+    wake_event = wake_event or asyncio.Event()
+    while not stop_event.is_set():
+        wake_event.clear()
+        try:
+            async with session_factory() as db:
+                failed = await fail_abandoned_exports(db)
+                if failed:
+                    logger.warning("Failed %s abandoned exports.", failed)
+                export_ids = (await db.execute(
+                    select(ExportJob.export_id)
+                    .where(ExportJob.status == ExportStatus.PENDING)
+                    .order_by(ExportJob.created_at, ExportJob.export_id)
+                )).scalars().all()
+            for export_id in export_ids:
+                if stop_event.is_set():
+                    break
+                await run_export(export_id, session_factory)
+        except Exception:
+            logger.exception("Export queue check failed.")
+
+        if stop_event.is_set():
+            break
+        try:
+            await asyncio.wait_for(
+                wake_event.wait(), timeout=EXPORT_POLL_INTERVAL
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+class ExportRunner:
+    """
+    Runs `run_export_queue` as a background task of the application.
+    Exports run in that task rather than in the request that created
+    them, so they are not timed as part of the request and a shutdown
+    does not wait for them.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker = SessionLocal):
+        self.session_factory = session_factory
+        self._stop_event: Optional[asyncio.Event] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        # Created here so they belong to the running loop.
+        self._stop_event = asyncio.Event()
+        self._wake_event = asyncio.Event()
+        self._task = asyncio.create_task(run_export_queue(
+            self._stop_event, self.session_factory, self._wake_event
+        ))
+
+    def wake(self):
+        """Look for pending jobs now rather than at the next poll."""
+        if self._wake_event is not None:
+            self._wake_event.set()
+
+    async def stop(self):
+        """Stop polling; an export in progress goes back in the queue."""
+        if self._task is None:
+            return
+        self._stop_event.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._stop_event = self._wake_event = None
+
+
+_runner: Optional[ExportRunner] = None
+
+
+def get_export_runner() -> ExportRunner:
+    """Return the process-wide export runner, creating it on first use."""
+    global _runner
+    if _runner is None:
+        _runner = ExportRunner()
+    return _runner
+
+
+async def close_export_runner():
+    """Stop the process-wide export runner, if it was created."""
+    global _runner
+    if _runner is not None:
+        await _runner.stop()
+        _runner = None
+
+
+async def main():
+    await run_export_queue()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from passlib.hash import argon2
+
+load_dotenv()
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+# Pool slots one bulk import may take, so logins are not queued behind it.
+IMPORT_HASH_WORKERS = int(
+    os.getenv("IMPORT_HASH_WORKERS", max(HASH_WORKERS // 2, 1))
+)
+
+# Unset parameters keep passlib's defaults, which existing hashes use.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", argon2.default_rounds))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", argon2.memory_cost))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", argon2.parallelism))
+
+password_policy = argon2.using(
+    rounds=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+)
+
+
+def _hash(password: str) -> str:
+    return password_policy.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return password_policy.verify(password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Whether a hash was made with parameters other than the policy's.
+    Only parses the hash, so it is cheap enough for the event loop.
+    """
+    return password_policy.needs_update(hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs Argon2 hashing and verification in a pool of `workers` processes
+    so they do not block the event loop. At most `workers` calls run at
+    once; further calls wait their turn and are counted in `waiting`.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or HASH_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, func: Callable, *args):
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool(), func, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool on the next call.
+            self._executor = None
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with Argon2."""
+        return await self._run(_hash, password)
+
+    async def hash_many(
+            self,
+            passwords: list[str],
+            limit: Optional[int] = None
+    ) -> list[str]:
+        """
+        Hash the passwords, keeping at most `limit` of them in the pool
+        or its queue at once. Other calls wait behind `limit` hashes at
+        most, not behind the whole batch.
+        """
+        slots = asyncio.Semaphore(limit or IMPORT_HASH_WORKERS)
+
+        async def hash_one(password: str) -> str:
+            async with slots:
+                return await self.hash(password)
+
+        return await asyncio.gather(*map(hash_one, passwords))
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Check a password against its Argon2 hash."""
+        return await self._run(_verify, password, hashed_password)
+
+    def stats(self) -> dict[str, int]:
+        """Pool size and the number of running and queued calls."""
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+        }
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+_hasher: Optional[PasswordHasher] = None
+
+
+def get_hasher() -> PasswordHasher:
+    """Return the process-wide password hasher, creating it on first use."""
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher()
+    return _hasher
+
+
+def close_hasher():
+    """Shut down the process-wide password hasher, if it was created."""
+    global _hasher
+    if _hasher is not None:
+        _hasher.shutdown()
+        _hasher = None
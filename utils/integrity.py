@@ -0,0 +1,41 @@
+import re
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# How each backend names the column or key of a violated unique index.
+UNIQUE_VIOLATION_PATTERNS = (
+    # SQLite: UNIQUE constraint failed: cars.vin
+    re.compile(r"UNIQUE constraint failed: \w+\.(\w+)"),
+    # MySQL: Duplicate entry '...' for key 'cars.vin'
+    re.compile(r"Duplicate entry .* for key '(?:\w+\.)?(\w+)'"),
+)
+
+
+def violated_unique_key(error: IntegrityError) -> Optional[str]:
+    """Column or index name of the unique constraint `error` violated."""
+    message = str(error.orig)
+    for pattern in UNIQUE_VIOLATION_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return match.group(1)
+    return None
+
+
+async def commit_or_conflict(db: AsyncSession, messages: dict[str, str]):
+    """
+    Commit, letting the database enforce uniqueness instead of checking
+    with a SELECT first. A unique violation is rolled back and reported
+    as a 400 with the message for the violated column or index in
+    `messages`; any other integrity error is re-raised.
+    """
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        message = messages.get(violated_unique_key(e))
+        if message is None:
+            raise
+        raise HTTPException(status_code=400, detail=message)
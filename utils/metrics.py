@@ -0,0 +1,449 @@
+"""
+In-process request, database and queue metrics, exposed on `/metrics`
+in the Prometheus text format.
+
+When several workers serve the API, `METRICS_DIR` is a directory they
+share: each worker writes a snapshot of its metrics there every
+`METRICS_SYNC_INTERVAL` seconds, and the worker that answers a scrape
+adds up the snapshots of the others with its own metrics.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from utils.email import get_transport
+from utils.hashing import get_hasher
+
+load_dotenv()
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_SYNC_INTERVAL = float(os.getenv("METRICS_SYNC_INTERVAL", 5))
+# Gauges of a worker that has not written for this many intervals, most
+# likely one that exited, are left out; its counters still count.
+METRICS_STALE_INTERVALS = 3
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "metrics-"
+SNAPSHOT_NAME = re.compile(rf"^{SNAPSHOT_PREFIX}\d+\.json$")
+
+REQUEST_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0
+)
+# Label for requests that match no route, so that scans of random paths
+# cannot create a series per path.
+UNMATCHED_ROUTE = "<unmatched>"
+# Label for queries run outside a request, such as the outbox dispatcher.
+BACKGROUND_ROUTE = "<background>"
+
+# The scope of the request being handled. Starlette adds the matched
+# route to it while dispatching, so the route is known without matching
+# the path a second time.
+current_scope: ContextVar[Optional[dict]] = ContextVar(
+    "current_scope", default=None
+)
+# Scopes of the requests being handled, counted by route on scrape.
+in_flight_scopes: dict[int, dict] = {}
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n") \
+        .replace('"', r'\"')
+
+
+def format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def snapshot_path(directory: str) -> str:
+    """Where this worker writes its snapshot in `directory`."""
+    return os.path.join(directory, f"{SNAPSHOT_PREFIX}{os.getpid()}.json")
+
+
+def is_snapshot(name: str) -> bool:
+    """Whether a file name is that of a worker's snapshot."""
+    return SNAPSHOT_NAME.match(name) is not None
+
+
+class Metric:
+    """A metric family with one series per combination of label values."""
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.series: dict[tuple, object] = {}
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self, series: Optional[dict] = None) -> list[str]:
+        lines = self.header()
+        series = self.series if series is None else series
+        for values, value in sorted(series.items()):
+            labels = format_labels(self.labels, values)
+            lines.append(f"{self.name}{labels} {format_value(value)}")
+        return lines
+
+    def combine(self, total, value):
+        """Add the value of a series in another worker to `total`."""
+        return total + value
+
+    def clear(self):
+        self.series.clear()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, values: tuple = (), amount: float = 1):
+        self.series[values] = self.series.get(values, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, values: tuple = (), amount: float = 1):
+        self.series[values] = self.series.get(values, 0) + amount
+
+    def dec(self, values: tuple = (), amount: float = 1):
+        self.inc(values, -amount)
+
+    def set(self, values: tuple, value: float):
+        self.series[values] = value
+
+
+class Histogram(Metric):
+    """Counts per bucket are kept flat and made cumulative on render."""
+    kind = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            description: str,
+            labels: tuple = (),
+            buckets: tuple = REQUEST_BUCKETS
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+
+    def observe(self, values: tuple, amount: float):
+        series = self.series.get(values)
+        if series is None:
+            # One slot per bucket, one for +Inf, then the sum.
+            series = self.series[values] = [0] * (len(self.buckets) + 1) \
+                + [0.0]
+        series[bisect_left(self.buckets, amount)] += 1
+        series[-1] += amount
+
+    def render(self, series: Optional[dict] = None) -> list[str]:
+        lines = self.header()
+        bounds = self.buckets + (float("inf"),)
+        series = self.series if series is None else series
+        for values, counts in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = format_labels(
+                    self.labels + ("le",), values + (format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {counts[-1]!r}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def combine(self, total, value):
+        return [a + b for a, b in zip(total, value)]
+
+
+class Registry:
+    """
+    The metrics of this process. Gauges that mirror state kept elsewhere,
+    such as pool usage, are filled by collectors just before rendering.
+    """
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, func: Callable[[], None]) -> Callable[[], None]:
+        self.collectors.append(func)
+        return func
+
+    def collect(self):
+        for collect in self.collectors:
+            collect()
+
+    def render(self, snapshots: Iterable[dict] = ()) -> str:
+        """The metrics of this process, added up with `snapshots`."""
+        snapshots = list(snapshots)
+        self.collect()
+        lines = []
+        for metric in self.metrics:
+            series = dict(metric.series)
+            for snapshot in snapshots:
+                for values, value in snapshot.get(metric.name, ()):
+                    values = tuple(values)
+                    if values in series:
+                        value = metric.combine(series[values], value)
+                    series[values] = value
+            lines.extend(metric.render(series))
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Every series of this process, in a form JSON can hold."""
+        self.collect()
+        return {
+            metric.name: [
+                [list(values), value]
+                for values, value in metric.series.items()
+            ]
+            for metric in self.metrics
+        }
+
+    def write_snapshot(self, directory: str):
+        path = snapshot_path(directory)
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(self.snapshot(), file)
+        # Readers never see a half-written snapshot.
+        os.replace(f"{path}.tmp", path)
+
+    def read_snapshots(self, directory: str) -> list[dict]:
+        """The latest snapshots of the other workers in `directory`."""
+        gauges = {
+            metric.name for metric in self.metrics if metric.kind == "gauge"
+        }
+        stale_before = time.time() \
+            - METRICS_STALE_INTERVALS * METRICS_SYNC_INTERVAL
+        snapshots = []
+        own_path = snapshot_path(directory)
+        for entry in os.scandir(directory):
+            if not is_snapshot(entry.name) or entry.path == own_path:
+                continue
+            try:
+                modified = entry.stat().st_mtime
+                with open(entry.path) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if modified < stale_before:
+                snapshot = {
+                    name: series for name, series in snapshot.items()
+                    if name not in gauges
+                }
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render_all(self, directory: Optional[str] = None) -> str:
+        """The metrics of every worker sharing `directory`, if any."""
+        if directory is None:
+            return self.render()
+        return self.render(self.read_snapshots(directory))
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Time to respond to a request, by route template.",
+    ("method", "route"),
+))
+requests_total = registry.register(Counter(
+    "http_requests_total",
+    "Requests answered, by route template and status code.",
+    ("method", "route", "status"),
+))
+requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress",
+    "Requests being handled, by route template.",
+    ("method", "route"),
+))
+query_duration = registry.register(Histogram(
+    "db_query_duration_seconds",
+    "Time the database took per statement, by the route that ran it.",
+    ("route",),
+    QUERY_BUCKETS,
+))
+pool_connections = registry.register(Gauge(
+    "db_pool_connections",
+    "Pool connections by engine and state: size, checked_out, overflow.",
+    ("engine", "state"),
+))
+queue_depth = registry.register(Gauge(
+    "worker_queue_calls",
+    "Email and password hashing calls, running or waiting for a slot.",
+    ("queue", "state"),
+))
+
+# Engines to report pool usage for, by the name used as their label.
+instrumented_engines = {}
+
+
+def instrument_engine(engine, name: str):
+    """Time every statement `engine` runs and report its pool usage."""
+    sync_engine = engine.sync_engine
+    if name in instrumented_engines:
+        return
+    instrumented_engines[name] = sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, many):
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - context.query_started
+        scope = current_scope.get()
+        route = BACKGROUND_ROUTE if scope is None else route_template(scope)
+        query_duration.observe((route,), elapsed)
+
+
+@registry.collector
+def collect_pools():
+    for name, engine in instrumented_engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        pool_connections.set((name, "size"), pool.size())
+        pool_connections.set((name, "checked_out"), pool.checkedout())
+        pool_connections.set((name, "overflow"), max(pool.overflow(), 0))
+
+
+@registry.collector
+def collect_queues():
+    for queue, stats in (
+            ("email", get_transport().stats()),
+            ("hashing", get_hasher().stats()),
+    ):
+        queue_depth.set((queue, "in_flight"), stats["in_flight"])
+        queue_depth.set((queue, "waiting"), stats["waiting"])
+
+
+def route_template(scope: dict) -> str:
+    """The path template of the route that handles the request."""
+    route = scope.get("route")
+    return UNMATCHED_ROUTE if route is None else route.path
+
+
+@registry.collector
+def collect_in_flight():
+    # Routes seen before stay exported, at zero when idle.
+    for labels in requests_in_progress.series:
+        requests_in_progress.series[labels] = 0
+    for scope in list(in_flight_scopes.values()):
+        requests_in_progress.inc((scope["method"], route_template(scope)))
+
+
+class MetricsMiddleware:
+    """Record latency, status and in-flight count of every request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = current_scope.set(scope)
+        in_flight_scopes[id(scope)] = scope
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            del in_flight_scopes[id(scope)]
+            current_scope.reset(token)
+            labels = (scope["method"], route_template(scope))
+            request_duration.observe(labels, elapsed)
+            requests_total.inc(labels + (status,))
+            requests_in_progress.series.setdefault(labels, 0)
+
+
+async def run_metrics_sync(
+        directory: str,
+        stop_event: Optional[asyncio.Event] = None
+):
+    """Write this worker's snapshot to `directory` until `stop_event`."""
+    stop_event = stop_event or asyncio.Event()
+    while True:
+        try:
+            registry.write_snapshot(directory)
+        except OSError:
+            logger.exception("Writing the metrics snapshot failed.")
+        if stop_event.is_set():
+            return
+        try:
+            await asyncio.wait_for(
+                stop_event.wait(), timeout=METRICS_SYNC_INTERVAL
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+class MetricsSync:
+    """Runs `run_metrics_sync` as a background task of the application."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._stop_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._task = asyncio.create_task(
+            run_metrics_sync(self.directory, self._stop_event)
+        )
+
+    async def stop(self):
+        """Write a last snapshot, so the worker's counters are kept."""
+        if self._task is None:
+            return
+        self._stop_event.set()
+        await self._task
+        self._task = None
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+
+from db.engine import SessionLocal
+from models.email_outbox import EmailOutbox, EmailOutboxStatus
+from utils.dates import utcnow
+from utils.email import close_transport, get_transport
+
+load_dotenv()
+
+OUTBOX_DISPATCHER_ENABLED = (
+    os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() == "true"
+)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 2))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", 30))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", 3600))
+
+logger = logging.getLogger(__name__)
+
+Sender = Callable[[str, str, str], Awaitable[None]]
+
+
+async def smtp_sender(to_email: str, subject: str, body: str):
+    """Deliver an email over the pooled SMTP transport."""
+    await get_transport().send(to_email, subject, body)
+
+
+def enqueue_email(
+        db: AsyncSession,
+        to_email: str,
+        subject: str,
+        body: str
+) -> EmailOutbox:
+    """
+    Add an email to the outbox. It is persisted by the caller's commit,
+    so it is only sent if the surrounding transaction succeeds.
+    """
+    email = EmailOutbox(to_email=to_email, subject=subject, body=body)
+    db.add(email)
+    return email
+
+
+async def enqueue_emails(
+        db: AsyncSession,
+        messages: Iterable[tuple[str, str, str]]
+):
+    """
+    Add many `(to_email, subject, body)` emails to the outbox with one
+    multi-row INSERT, in the caller's transaction like `enqueue_email`.
+    """
+    rows = [
+        {"to_email": to_email, "subject": subject, "body": body}
+        for to_email, subject, body in messages
+    ]
+    if rows:
+        await db.execute(insert(EmailOutbox), rows)
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Exponential delay before the next delivery attempt."""
+    seconds = OUTBOX_BACKOFF_BASE * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, OUTBOX_BACKOFF_MAX))
+
+
+def build_due_emails_query(now: datetime, batch_size: int) -> Select:
+    """
+    Select pending emails whose next attempt is due, oldest first, and
+    lock them so concurrent dispatchers skip each other's rows.
+    """
+    return (
+        select(EmailOutbox)
+        .where(
+            EmailOutbox.status == EmailOutboxStatus.PENDING,
+            EmailOutbox.next_attempt_at <= now
+        )
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+async def dispatch_pending(
+        db: AsyncSession,
+        sender: Sender = smtp_sender,
+        batch_size: int = OUTBOX_BATCH_SIZE
+) -> int:
+    """
+    Send one batch of due outbox emails and record the outcome.
+    Returns the number of emails processed.
+    """
+    now = utcnow()
+    stmt = build_due_emails_query(now, batch_size)
+    emails = (await db.execute(stmt)).scalars().all()
+
+    results = await asyncio.gather(
+        *(sender(email.to_email, email.subject, email.body)
+          for email in emails),
+        return_exceptions=True,
+    )
+
+    for email, error in zip(emails, results):
+        email.attempts += 1
+        if isinstance(error, Exception):
+            email.last_error = str(error)[:255]
+            if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+                email.status = EmailOutboxStatus.FAILED
+                logger.error(
+                    "Giving up on email %s to %s after %s attempts: %s",
+                    email.email_id, email.to_email, email.attempts, error
+                )
+            else:
+                email.next_attempt_at = now + backoff_delay(email.attempts)
+        else:
+            email.status = EmailOutboxStatus.SENT
+            email.sent_at = utcnow()
+            email.last_error = None
+
+    await db.commit()
+    return len(emails)
+
+
+async def run_dispatcher(
+        stop_event: Optional[asyncio.Event] = None,
+        sender: Sender = smtp_sender
+):
+    """Drain the outbox until `stop_event` is set."""
+    stop_event = stop_event or asyncio.Event()
+    while not stop_event.is_set():
+        processed = 0
+        try:
+            async with SessionLocal() as db:
+                processed = await dispatch_pending(db, sender)
+        except Exception:
+            logger.exception("Email outbox dispatch failed.")
+
+        if processed < OUTBOX_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(
+                    stop_event.wait(), timeout=OUTBOX_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+class OutboxDispatcher:
+    """Runs `run_dispatcher` as a background task of the application."""
+
+    def __init__(self, sender: Sender = smtp_sender):
+        self.sender = sender
+        self._stop_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._task = asyncio.create_task(
+            run_dispatcher(self._stop_event, self.sender)
+        )
+
+    async def stop(self):
+        """Let the current batch finish, then stop polling."""
+        if self._task is None:
+            return
+        self._stop_event.set()
+        await self._task
+        self._task = None
+
+
+async def main():
+    try:
+        await run_dispatcher()
+    finally:
+        await close_transport()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""
+Per-request SQL statement budgets and N+1 detection.
+
+Endpoints declare how many statements they may run with `@query_budget`;
+undecorated ones get `QUERY_BUDGET_DEFAULT`. A request that runs more,
+or that repeats the same SELECT more than `QUERY_REPEAT_LIMIT` times, is
+logged as a warning, or raises `QueryBudgetExceeded` when
+`QUERY_BUDGET_MODE` is `raise`, as it is in the tests.
+"""
+import logging
+import os
+import re
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+load_dotenv()
+
+# One of `off`, `warn` or `raise`.
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "warn").lower()
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", 20))
+QUERY_REPEAT_LIMIT = int(os.getenv("QUERY_REPEAT_LIMIT", 5))
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists differ only in their number of placeholders.
+PLACEHOLDER = r"(?:\?|%s|:\w+)"
+PLACEHOLDER_LIST = re.compile(
+    rf"\(\s*{PLACEHOLDER}(?:\s*,\s*{PLACEHOLDER})+\s*\)"
+)
+WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """An endpoint ran more statements than its budget allows."""
+
+
+def query_budget(limit: int) -> Callable:
+    """Declare the most statements one call of the endpoint may run."""
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.query_budget = limit
+        return endpoint
+    return decorator
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace and IN list lengths normalized."""
+    shape = WHITESPACE.sub(" ", statement).strip()
+    return PLACEHOLDER_LIST.sub("(?)", shape)
+
+
+@dataclass
+class RequestQueries:
+    """Statements run while handling one request."""
+    method: str
+    path: str
+    route: Optional[str] = None
+    budget: Optional[int] = None
+    shapes: Counter = field(default_factory=Counter)
+    # Set once the response is sent; background tasks are not counted.
+    closed: bool = False
+
+    @property
+    def count(self) -> int:
+        return sum(self.shapes.values())
+
+    def repeated(self, limit: int) -> dict[str, int]:
+        """SELECTs run more than `limit` times, the sign of an N+1."""
+        return {
+            shape: count for shape, count in self.shapes.items()
+            if count > limit and shape.upper().startswith("SELECT")
+        }
+
+    def problems(self, repeat_limit: int) -> list[str]:
+        problems = []
+        if self.budget is not None and self.count > self.budget:
+            problems.append(
+                f"ran {self.count} statements, budget is {self.budget}"
+            )
+        for shape, count in self.repeated(repeat_limit).items():
+            problems.append(f"repeated {count} times: {shape[:200]}")
+        return problems
+
+
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar(
+    "current_queries", default=None
+)
+# When set to a list, every request's statements are appended to it.
+recorded_requests: Optional[list[RequestQueries]] = None
+
+
+def track_queries(engine):
+    """Count the statements `engine` runs against the current request."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", count_statement):
+        return
+    event.listen(sync_engine, "before_cursor_execute", count_statement)
+
+
+def count_statement(conn, cursor, statement, parameters, context, many):
+    queries = current_queries.get()
+    if queries is not None and not queries.closed:
+        queries.shapes[statement_shape(statement)] += 1
+
+
+class QueryBudgetMiddleware:
+    """Check every request against its endpoint's statement budget."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or QUERY_BUDGET_MODE == "off":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries(scope["method"], scope["path"])
+
+        async def send_and_close(message):
+            if message["type"] == "http.response.body" \
+                    and not message.get("more_body", False):
+                queries.closed = True
+            await send(message)
+
+        token = current_queries.set(queries)
+        try:
+            await self.app(scope, receive, send_and_close)
+        finally:
+            current_queries.reset(token)
+
+        route = scope.get("route")
+        if route is not None:
+            queries.route = route.path
+            queries.budget = getattr(
+                route.endpoint, "query_budget", QUERY_BUDGET_DEFAULT
+            )
+        if recorded_requests is not None:
+            recorded_requests.append(queries)
+
+        problems = queries.problems(QUERY_REPEAT_LIMIT)
+        if not problems:
+            return
+        message = f"{queries.method} {queries.route or queries.path}: " \
+            + "; ".join(problems)
+        if QUERY_BUDGET_MODE == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning("Query budget exceeded by %s", message)
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from db.engine import SessionLocal, engine, read_engine
+from db.settings import settings
+from utils.availability import availability_index
+
+load_dotenv()
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", settings.pool_size))
+
+logger = logging.getLogger(__name__)
+
+
+async def open_connections(engine: AsyncEngine, count: int):
+    """Open `count` connections at once so they wait in the pool."""
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(count)))
+
+
+async def preload_reference_data(session_factory=SessionLocal) -> int:
+    """Load every mechanic's calendar; returns how many were loaded."""
+    async with session_factory() as db:
+        return len(await availability_index.all_calendars(db))
+
+
+async def warm_up():
+    """
+    Fill the connection pools and the availability index before the
+    worker takes traffic. A database that is not reachable yet only
+    delays this to the first requests.
+    """
+    if not WARMUP_ENABLED:
+        return
+    started = time.perf_counter()
+    try:
+        for pool_engine in {engine, read_engine}:
+            await open_connections(pool_engine, WARMUP_CONNECTIONS)
+        calendars = await preload_reference_data()
+    except Exception:
+        logger.exception("Warm-up failed; starting with cold caches.")
+        return
+    logger.info(
+        "Warmed up %s connections and %s calendars in %.2f s.",
+        WARMUP_CONNECTIONS, calendars, time.perf_counter() - started
+    )